@@ -0,0 +1,84 @@
+import os, time, asyncio, logging, contextvars
+from sqlmodel import Session
+from database import router
+import metrics, catalog
+
+logger = logging.getLogger("Adjnt.Batcher")
+
+# Group commit: vault writes from concurrent chats that arrive within a short
+# window are applied in one transaction (one fsync) per database. Each caller
+# awaits its own result, which is only delivered once the commit is durable.
+GROUP_COMMIT_WINDOW_MS = float(os.getenv("GROUP_COMMIT_WINDOW_MS", "5"))
+GROUP_COMMIT_MAX = int(os.getenv("GROUP_COMMIT_MAX", "64"))
+
+
+class WriteBatcher:
+    def __init__(self, run, window_ms=GROUP_COMMIT_WINDOW_MS, max_batch=GROUP_COMMIT_MAX):
+        self.run = run                # runs blocking work off the event loop
+        self.window = window_ms / 1000
+        self.max_batch = max_batch
+        self.pending = {}             # shard -> [(group_id, fn, args, future)]
+        self.flushers = {}            # shard -> flusher task
+
+    async def submit(self, group_id, fn, *args):
+        """Queue fn(session, group_id, *args); returns its result once committed."""
+        shard = router.shard_for(group_id)
+        future = asyncio.get_running_loop().create_future()
+        self.pending.setdefault(shard, []).append((group_id, fn, args, future))
+        if shard not in self.flushers:
+            # Fresh context: the flusher serves many messages, not the one that woke it
+            self.flushers[shard] = contextvars.Context().run(asyncio.create_task, self._flusher(shard))
+        return await future
+
+    async def _flusher(self, shard):
+        try:
+            while self.pending.get(shard):
+                if len(self.pending[shard]) < self.max_batch:
+                    await asyncio.sleep(self.window)
+                batch = self.pending[shard][:self.max_batch]
+                del self.pending[shard][:self.max_batch]
+                await self._commit(shard, batch)
+        finally:
+            del self.flushers[shard]
+
+    async def _commit(self, shard, batch):
+        started = time.perf_counter()
+        try:
+            results = await self.run(self._apply, shard, batch)
+        except Exception as e:
+            # One bad write must not fail its neighbours: redo them one by one
+            logger.warning(f"⚠️ Batch of {len(batch)} failed ({e}); retrying individually")
+            metrics.inc("db.batch_fallback")
+            for group_id, _, _, _ in batch:
+                catalog.cache.invalidate(group_id)
+            results = await self.run(self._apply_each, shard, batch)
+
+        metrics.observe("db.commit_seconds", time.perf_counter() - started)
+        metrics.observe("db.batch_size", len(batch))
+        metrics.inc("db.commits")
+        for (group_id, _, _, future), (ok, value) in zip(batch, results):
+            if future.done():
+                continue
+            if ok:
+                future.set_result(value)
+            else:
+                future.set_exception(value)
+                catalog.cache.invalidate(group_id)
+
+    def _apply(self, shard, batch):
+        with Session(router.engine_named(shard)) as session:
+            results = [(True, fn(session, group_id, *args)) for group_id, fn, args, _ in batch]
+            session.commit()
+        return results
+
+    def _apply_each(self, shard, batch):
+        results = []
+        for group_id, fn, args, _ in batch:
+            try:
+                with Session(router.engine_named(shard)) as session:
+                    value = fn(session, group_id, *args)
+                    session.commit()
+                results.append((True, value))
+            except Exception as e:
+                results.append((False, e))
+        return results
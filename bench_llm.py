@@ -0,0 +1,79 @@
+"""LLM reply benchmark: completion tokens and latency per wire format.
+
+Sends every TEST_CASES message in test_adjnt.py through the full prompt once
+per format (sequentially, so latencies are comparable) and prints tokens,
+latency and intent accuracy for each, plus the compact/verbose ratios.
+
+    python bench_llm.py                  # verbose vs compact
+    python bench_llm.py compact          # a single format
+    BENCH_REPEAT=3 python bench_llm.py
+"""
+import os, sys, json, asyncio
+from datetime import datetime
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import brain, usage, intent_model
+
+BENCH_REPEAT = int(os.getenv("BENCH_REPEAT", "1"))
+FORMATS = ("verbose", "compact")
+
+
+def _pct(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else None
+
+
+def _avg(values):
+    return round(sum(values) / len(values), 1) if values else None
+
+
+async def run(fmt, cases, now):
+    b = brain.AdjntBrain()
+    b.wire_format = fmt
+    # Fresh tracker: its records are this format's decisions only
+    usage.tracker = usage.UsageTracker(sink="", window=len(cases) * BENCH_REPEAT)
+    correct = 0
+    for _ in range(BENCH_REPEAT):
+        for text, expected in cases:
+            result = await b._complete(b._wire(b.system_prompt(now)), text, now, b.model, brain.LLM_MAX_TOKENS)
+            correct += result.get("intent") == expected
+    records = list(usage.tracker.records)
+    completion = [r["completion_tokens"] for r in records if r["completion_tokens"] is not None]
+    prompt = [r["prompt_tokens"] for r in records if r["prompt_tokens"] is not None]
+    walls = [r["wall_seconds"] for r in records]
+    return {
+        "format": fmt,
+        "calls": len(records),
+        "accuracy": round(correct / (len(cases) * BENCH_REPEAT), 3),
+        "avg_completion_tokens": _avg(completion),
+        "p95_completion_tokens": _pct(completion, 0.95),
+        "avg_prompt_tokens": _avg(prompt),
+        "wall_p50": _pct(walls, 0.5),
+        "wall_p95": _pct(walls, 0.95),
+        "parse_failures": sum(1 for r in records if r["parse_failed"]),
+        "errors": sum(1 for r in records if r["error"]),
+        "retried": sum(1 for r in records if r["retried"]),
+    }
+
+
+async def main(formats):
+    cases = intent_model.test_cases()
+    if not cases:
+        sys.exit("No TEST_CASES found")
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    reports = {}
+    for fmt in formats:
+        reports[fmt] = await run(fmt, cases, now)
+        print(json.dumps(reports[fmt], indent=2))
+    if set(FORMATS) <= set(reports):
+        v, c = reports["verbose"], reports["compact"]
+        ratio = lambda k: round(c[k] / v[k], 3) if c[k] and v[k] else None
+        print(json.dumps({
+            "compact_vs_verbose": {k: ratio(k) for k in ("avg_completion_tokens", "avg_prompt_tokens", "wall_p50", "wall_p95")}
+        }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main(sys.argv[1:] or FORMATS))
@@ -1,18 +1,53 @@
-import os, json, logging, re
-from groq import Groq
-from dotenv import load_dotenv
+import os, json, logging, re, time, asyncio
+from functools import lru_cache
 from datetime import datetime, timedelta
+import usage, metrics, intent_model, wire, shadow
 
-load_dotenv()
 logger = logging.getLogger("Adjnt.Brain")
 
+# Intents with no data to extract: a confident prediction needs no LLM at all
+LOCAL_INTENTS = {"TIME", "ONBOARD", "STATS"}
+
+# Reply format the model is asked for: compact (see wire.py) or verbose
+LLM_WIRE_FORMAT = os.getenv("LLM_WIRE_FORMAT", "compact")
+# Completion ceilings per stage; a reply cut off at one is retried once
+# with LLM_MAX_TOKENS_RETRY
+LLM_MAX_TOKENS = int(os.getenv("LLM_MAX_TOKENS", "256"))
+LLM_MAX_TOKENS_FAST = int(os.getenv("LLM_MAX_TOKENS_FAST", "128"))
+LLM_MAX_TOKENS_RETRY = int(os.getenv("LLM_MAX_TOKENS_RETRY", "1024"))
+
+def focus_prompt(system_prompt, intent):
+    """The prompt cut down to its core rules and one intent's definition."""
+    head, _, definitions = system_prompt.partition("=== INTENT DEFINITIONS ===")
+    section = re.search(rf"\*\* {intent} \(.*?(?=\n\*\* |\n=== )", definitions, re.S)
+    if not section:
+        return system_prompt
+    return (
+        head + "=== INTENT ===\n" + section.group(0).strip() + "\n\n"
+        "If the message is clearly not this intent, return {'intent': 'UNKNOWN', 'data': {}}.\n"
+    )
+
 class AdjntBrain:
     def __init__(self):
         self.api_key = os.getenv("GROQ_API_KEY")
         self.model = os.getenv("MODEL_NAME", "llama3-8b-8192")
-        self.client = Groq(api_key=self.api_key)
+        # Used with the focused prompt when the local classifier is confident
+        self.fast_model = os.getenv("FAST_MODEL_NAME", self.model)
+        self.wire_format = LLM_WIRE_FORMAT
+        # Prefixed to the model name in usage records ("shadow:" for the candidate)
+        self.usage_label = ""
+        self._client = None
 
-    async def decide(self, text: str, current_now: str):
+    @property
+    def client(self):
+        # Built on first use: importing and configuring groq is slow
+        if self._client is None:
+            from groq import Groq
+            self._client = Groq(api_key=self.api_key)
+        return self._client
+
+    def quick_decide(self, text: str):
+        """Rule-based parse for common exact phrases; None if the LLM is needed."""
         clean_text = text.lower().strip()
         
         # Quick returns for common patterns
@@ -22,14 +57,61 @@ class AdjntBrain:
             return {"intent": "LIST", "data": {"store": "All"}}
         if clean_text in ["list reminders", "show reminders", "my reminders"]:
             return {"intent": "LIST_REMINDERS", "data": {}}
+        if clean_text in ["more", "next", "show more"]:
+            return {"intent": "MORE", "data": {}}
+        if clean_text in ["pause reminders", "pause all reminders"]:
+            return {"intent": "PAUSE_REMINDERS", "data": {}}
+        if clean_text in ["resume reminders", "resume all reminders", "unpause reminders"]:
+            return {"intent": "PAUSE_REMINDERS", "data": {"resume": True}}
+        if clean_text in ["stats", "vault stats", "statistics", "show stats"]:
+            return {"intent": "STATS", "data": {}}
+        digest = re.fullmatch(r"digest (on|off|window (\d+)s?)", clean_text)
+        if digest:
+            if digest.group(2):
+                return {"intent": "DIGEST", "data": {"window": int(digest.group(2))}}
+            return {"intent": "DIGEST", "data": {"enabled": digest.group(1) == "on"}}
         
         # Handle simple greetings/thanks (but not capability questions with context)
         # Avoid catching phrases like "what's on..." which should go to LLM
         simple_chat = ["how are you", "hello", "hi there", "hey there", "thanks", "thank you", "goodbye", "bye"]
         if clean_text in simple_chat or (clean_text.startswith(("hi", "hello", "hey")) and len(clean_text.split()) <= 2):
             return {"intent": "CHAT", "data": {"answer": "I'm Adjnt, your personal assistant! Type 'help' to see what I can do."}}
+        return None
+
+    async def decide(self, text: str, current_now: str):
+        quick = self.quick_decide(text)
+        if quick:
+            return quick
+
+        system_prompt = self.system_prompt(current_now)
+        started = time.perf_counter()
+
+        # Confident local prediction: answer locally, or a focused prompt on the
+        # fast model; anything it rejects falls through to the full prompt
+        prediction = intent_model.predict(text)
+        if prediction and prediction[1] >= intent_model.INTENT_CONFIDENCE:
+            fast_intent = prediction[0]
+            if fast_intent in LOCAL_INTENTS:
+                metrics.inc("router.local")
+                return {"intent": fast_intent, "data": {}}
+            result = await self._complete(self._wire(focus_prompt(system_prompt, fast_intent)), text, current_now,
+                                          self.fast_model, LLM_MAX_TOKENS_FAST)
+            if result.get("intent") != "UNKNOWN":
+                metrics.inc("router.fast")
+                shadow.evaluator.observe(self, text, current_now, result, time.perf_counter() - started,
+                                         self.fast_model)
+                return result
+            metrics.inc("router.fallback")
 
-        system_prompt = (
+        result = await self._complete(self._wire(system_prompt), text, current_now, self.model, LLM_MAX_TOKENS)
+        if result.get("intent") != "UNKNOWN":
+            intent_model.log_example(text, result["intent"])
+        shadow.evaluator.observe(self, text, current_now, result, time.perf_counter() - started, self.model)
+        return result
+
+    def system_prompt(self, current_now):
+        """The full parsing prompt (verbose examples; see _wire)."""
+        return (
             f"SYSTEM: You are a logic parser for 'Adjnt', a shopping list and reminder manager. "
             f"Current time: {current_now}. Output ONLY valid JSON.\n\n"
             
@@ -130,6 +212,13 @@ class AdjntBrain:
             "  - 'reschedule dentist to tomorrow 2pm' → Calculate tomorrow + 14:00\n"
             "  - 'move meeting to 4pm' → {'intent': 'UPDATE_REMINDER', 'data': {'item': 'meeting', 'new_timestamp': '[calculated timestamp]'}}\n\n"
             
+            "** PAUSE_REMINDERS (Pause or Resume Reminders) **\n"
+            "Triggers: 'pause', 'mute', 'resume', 'unpause' (reminders)\n"
+            "Structure: {'intent': 'PAUSE_REMINDERS', 'data': {'item': 'gym', 'resume': false}} ('item' empty for all)\n"
+            "Examples:\n"
+            "  - 'pause the gym reminder' → {'intent': 'PAUSE_REMINDERS', 'data': {'item': 'gym'}}\n"
+            "  - 'resume all reminders' → {'intent': 'PAUSE_REMINDERS', 'data': {'resume': true}}\n\n"
+            
             "** LIST (Show Shopping List) **\n"
             "Triggers: 'list', 'show vault', 'show list', 'what do I need'\n"
             "IMPORTANT: This is for SHOPPING LIST items (groceries, physical items), NOT reminders/appointments.\n"
@@ -164,12 +253,16 @@ class AdjntBrain:
             "Triggers: 'what time', 'current time', 'time now', 'what's the time'\n"
             "Structure: {'intent': 'TIME', 'data': {}}\n\n"
             
+            "** STATS (Shopping History) **\n"
+            "Triggers: 'stats', 'what do we buy most', 'how long do items stay on the list'\n"
+            "Structure: {'intent': 'STATS', 'data': {}}\n\n"
+            
             "** CHAT (General Conversation) **\n"
             "Any message that doesn't match above patterns.\n"
             "Triggers: greetings, questions about capabilities, thank you messages, general queries\n"
             "Structure: {'intent': 'CHAT', 'data': {'answer': 'Your helpful response'}}\n"
             "Examples:\n"
-            "  - 'how are you?' → {'intent': 'CHAT', 'data': {'answer': 'I'm doing well! How can I help you?'}}\n"
+            "  - 'how are you?' → {'intent': 'CHAT', 'data': {'answer': 'I am doing well! How can I help you?'}}\n"
             "  - 'what can you do?' → {'intent': 'CHAT', 'data': {'answer': 'I can help with shopping lists and reminders. Type help for more info.'}}\n"
             "  - 'hello' → {'intent': 'CHAT', 'data': {'answer': 'Hi! How can I assist you today?'}}\n\n"
             
@@ -186,29 +279,83 @@ class AdjntBrain:
             "10. When unclear, ask yourself: Is this a physical item (LIST) or a scheduled event (LIST_REMINDERS)?\n\n"
         )
 
+    def _wire(self, prompt):
+        return wire.compact_prompt(prompt) if self.wire_format == "compact" else prompt
+
+    async def _complete(self, system_prompt, text, current_now, model, max_tokens=LLM_MAX_TOKENS):
+        """Parsed reply for one decision; recorded as a single usage row even when retried."""
+        started = time.perf_counter()
+        result, response, parse_failed, error = await self._complete_once(system_prompt, text, current_now, model, max_tokens)
+        responses = [response]
+        if result is None:
+            # Cut off mid-reply (long item lists, chat answers): once more with room
+            metrics.inc("llm.truncated_retry")
+            logger.warning(f"✂️ LLM reply hit {max_tokens} tokens; retrying with {LLM_MAX_TOKENS_RETRY}")
+            result, response, parse_failed, error = await self._complete_once(
+                system_prompt, text, current_now, model, LLM_MAX_TOKENS_RETRY
+            )
+            responses.append(response)
+        self._record_usage(responses, model, result.get("intent"), time.perf_counter() - started, parse_failed, error)
+        return result
+
+    async def _complete_once(self, system_prompt, text, current_now, model, max_tokens):
+        """(result, response, parse_failed, error); result is None if the reply was
+        truncated and a larger ceiling is left to try."""
+        response, parse_failed = None, False
         try:
-            response = self.client.chat.completions.create(
-                model=self.model,
+            # Off the event loop so prefetches and other chats run meanwhile
+            response = await asyncio.to_thread(
+                self.client.chat.completions.create,
+                model=model,
                 messages=[
                     {"role": "system", "content": system_prompt}, 
                     {"role": "user", "content": text}
                 ],
                 response_format={"type": "json_object"},
-                temperature=0.1
+                temperature=0.1,
+                max_tokens=max_tokens,
             )
             raw = response.choices[0].message.content
-            logger.info(f"🧠 BRAIN RAW: {raw}")
+            if response.choices[0].finish_reason == "length":
+                metrics.inc("llm.truncated")
+                if max_tokens < LLM_MAX_TOKENS_RETRY:
+                    return None, response, False, "truncated"
+            logger.info("🧠 BRAIN RAW: %s", raw, extra={"category": "brain_raw"})
             
-            result = json.loads(raw)
+            try:
+                result = wire.decode(json.loads(raw))
+            except json.JSONDecodeError:
+                parse_failed = True
+                raise
             
             # Post-process to ensure data quality
-            result = self._post_process(result, current_now)
-            
-            return result
+            return self._post_process(result, current_now), response, False, None
             
         except Exception as e:
             logger.error(f"💥 BRAIN ERROR: {e}")
-            return {"intent": "UNKNOWN", "data": {}}
+            return {"intent": "UNKNOWN", "data": {}}, response, parse_failed, type(e).__name__
+
+    def _record_usage(self, responses, model, intent, wall_seconds, parse_failed, error):
+        """One usage row for a decision; tokens summed over its calls."""
+        usages = [getattr(r, "usage", None) for r in responses]
+
+        def total(field):
+            values = [getattr(u, field, None) for u in usages]
+            values = [v for v in values if v is not None]
+            return sum(values) if values else None
+
+        usage.tracker.record(
+            model=self.usage_label + (getattr(responses[-1], "model", None) or model),
+            intent=intent or "UNKNOWN",
+            wall_seconds=wall_seconds,
+            prompt_tokens=total("prompt_tokens"),
+            completion_tokens=total("completion_tokens"),
+            # Groq reports how long the request waited server-side
+            queue_seconds=total("queue_time"),
+            parse_failed=parse_failed,
+            error=error,
+            retried=len(responses) > 1,
+        )
     
     def _post_process(self, result, current_now):
         """Post-process LLM output for consistency."""
@@ -329,24 +476,29 @@ class AdjntBrain:
             return timestamp_str
     
     def _singularize(self, word):
-        """Simple singularization."""
-        word = word.lower().strip()
-        
-        irregulars = {
-            "children": "child", "people": "person", "teeth": "tooth",
-            "feet": "foot", "mice": "mouse", "geese": "goose"
-        }
-        
-        if word in irregulars:
-            return irregulars[word]
-        
-        if word.endswith("ies") and len(word) > 4:
-            return word[:-3] + "y"
-        elif word.endswith("es") and len(word) > 3:
-            if word.endswith(("shes", "ches", "sses", "xes", "zes")):
-                return word[:-2]
-            return word[:-1]
-        elif word.endswith("s") and len(word) > 2:
-            return word[:-1]
-        
-        return word
\ No newline at end of file
+        return singularize(word)
+
+
+IRREGULARS = {
+    "children": "child", "people": "person", "teeth": "tooth",
+    "feet": "foot", "mice": "mouse", "geese": "goose"
+}
+
+@lru_cache(maxsize=4096)
+def singularize(word):
+    """Simple singularization (memoized; item names repeat constantly)."""
+    word = word.lower().strip()
+    
+    if word in IRREGULARS:
+        return IRREGULARS[word]
+    
+    if word.endswith("ies") and len(word) > 4:
+        return word[:-3] + "y"
+    elif word.endswith("es") and len(word) > 3:
+        if word.endswith(("shes", "ches", "sses", "xes", "zes")):
+            return word[:-2]
+        return word[:-1]
+    elif word.endswith("s") and len(word) > 2:
+        return word[:-1]
+    
+    return word
\ No newline at end of file
@@ -0,0 +1,155 @@
+import copy, pickle, logging
+import apscheduler
+from sqlalchemy import select
+from apscheduler.jobstores.base import JobLookupError
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.util import datetime_to_utc_timestamp
+import reminder_index
+
+logger = logging.getLogger("Adjnt.Bulk")
+
+# Bulk reminder mutations. APScheduler's remove_job/modify_job each load,
+# write and commit one job and wake the scheduler; these apply a whole set in
+# one job-store transaction, update the reminder index in one more, and wake
+# the scheduler once. They bypass the scheduler's job events, so the index is
+# kept in step here. Blocking: run them off the event loop.
+#
+# That relies on APScheduler 3 internals (the job store's table and pickled
+# job state); _raw_store is the only place that reaches for them, and with
+# any other store or version the same operations go job by job through the
+# public API instead.
+
+CHUNK = 500  # ids per IN (...) clause, well under SQLite's variable limit
+
+
+def _raw_store(scheduler):
+    """The default job store if its table layout is the known one, else None."""
+    if apscheduler.version_info[0] != 3:
+        return None
+    store = getattr(scheduler, "_jobstores", {}).get("default")
+    if not isinstance(store, SQLAlchemyJobStore) or not hasattr(store, "jobs_t") or not hasattr(store, "pickle_protocol"):
+        return None
+    return store
+
+
+def _chunks(ids):
+    ids = list(ids)
+    for i in range(0, len(ids), CHUNK):
+        yield ids[i:i + CHUNK]
+
+
+def remove(scheduler, job_ids):
+    """Delete reminder jobs; returns the ids that existed."""
+    store = _raw_store(scheduler)
+    removed = []
+    if store is None:
+        for job_id in job_ids:
+            try:
+                scheduler.remove_job(job_id)
+                removed.append(job_id)
+            except JobLookupError:
+                pass
+    else:
+        t = store.jobs_t
+        with store.engine.begin() as conn:
+            for chunk in _chunks(job_ids):
+                found = conn.execute(select(t.c.id).where(t.c.id.in_(chunk))).scalars().all()
+                if found:
+                    conn.execute(t.delete().where(t.c.id.in_(found)))
+                removed.extend(found)
+        if removed:
+            scheduler.wakeup()
+    # Stale index rows for ids that were already gone go as well
+    reminder_index.index.remove_many(job_ids)
+    return removed
+
+
+def _update(scheduler, job_ids, change):
+    """Apply change(state) to each job's state (as pickled by APScheduler) in one transaction."""
+    store = _raw_store(scheduler)
+    if store is None:
+        return _update_each(scheduler, job_ids, change)
+    t = store.jobs_t
+    updated = []
+    with store.engine.begin() as conn:
+        for chunk in _chunks(job_ids):
+            rows = conn.execute(select(t.c.id, t.c.job_state).where(t.c.id.in_(chunk))).all()
+            for job_id, job_state in rows:
+                state = pickle.loads(job_state)
+                if change(state) is False:
+                    continue
+                conn.execute(
+                    t.update().where(t.c.id == job_id).values(
+                        next_run_time=datetime_to_utc_timestamp(state["next_run_time"]),
+                        job_state=pickle.dumps(state, store.pickle_protocol),
+                    )
+                )
+                updated.append(job_id)
+    if updated:
+        scheduler.wakeup()
+    return updated
+
+
+def _update_each(scheduler, job_ids, change):
+    """_update through the public API: one modify_job per changed job."""
+    updated = []
+    for job_id in job_ids:
+        job = scheduler.get_job(job_id)
+        if job is None:
+            continue
+        before = job.__getstate__()
+        state = copy.deepcopy(before)
+        if change(state) is False:
+            continue
+        changes = {k: v for k, v in state.items() if k != "version" and v != before.get(k)}
+        scheduler.modify_job(job_id, **changes)
+        updated.append(job_id)
+    return updated
+
+
+def reschedule(scheduler, run_times, **opts):
+    """Turn jobs into one-shots at new times ({job_id: aware datetime}); returns updated ids."""
+    def change(state):
+        run_time = run_times[state["id"]]
+        state["trigger"] = DateTrigger(run_time)
+        state["next_run_time"] = run_time
+        # No longer a late catch-up replay
+        state["kwargs"].pop("due_at", None)
+        state.update(opts)
+    return _update(scheduler, run_times, change)
+
+
+def pause(scheduler, job_ids):
+    """Stop jobs from firing until resumed; returns the ids paused."""
+    def change(state):
+        if state["next_run_time"] is None:
+            return False
+        state["next_run_time"] = None
+    return _update(scheduler, job_ids, change)
+
+
+def resume(scheduler, job_ids, now):
+    """Resume paused jobs at their trigger's next time after now; returns the ids resumed.
+
+    A one-shot whose time passed while it was paused fires right away.
+    """
+    def change(state):
+        if state["next_run_time"] is not None:
+            return False
+        trigger = state["trigger"]
+        if isinstance(trigger, DateTrigger):
+            state["next_run_time"] = max(trigger.run_date, now)
+        else:
+            state["next_run_time"] = trigger.get_next_fire_time(None, now)
+        if state["next_run_time"] is None:
+            return False
+    return _update(scheduler, job_ids, change)
+
+
+def reminder_ids(recipient_ids):
+    """Reminder job ids for many recipients, from the index."""
+    ids = []
+    for recipient_id in recipient_ids:
+        ids.extend(job_id for job_id, _, _ in reminder_index.index.all_for(recipient_id))
+    return ids
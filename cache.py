@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+import metrics
+
+
+class LRUCache:
+    """Small thread-safe LRU map that reports hits/misses/evictions to metrics."""
+
+    def __init__(self, name, max_entries):
+        self.name = name
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        metrics.gauge(f"{name}.size", lambda: len(self._data))
+        metrics.gauge(f"{name}.hit_rate", self.hit_rate)
+
+    def get(self, key):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                metrics.inc(f"{self.name}.hit")
+                return self._data[key]
+        metrics.inc(f"{self.name}.miss")
+        return None
+
+    def peek(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                metrics.inc(f"{self.name}.evicted")
+
+    def pop(self, key):
+        with self._lock:
+            return self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def hit_rate(self):
+        hits, misses = metrics.get(f"{self.name}.hit"), metrics.get(f"{self.name}.miss")
+        return round(hits / (hits + misses), 4) if hits + misses else None
@@ -0,0 +1,105 @@
+import os, json, threading
+from datetime import datetime
+from sqlmodel import select
+from sqlalchemy.dialects.sqlite import insert
+from models import Task, ItemCatalog
+from brain import singularize
+from cache import LRUCache
+
+# Per-group item catalog: canonical names, aliases and the store each item was
+# last added to or moved to. A group's catalog is loaded once into the LRU and
+# then kept current in memory, so TASK auto-location needs no per-item queries.
+CATALOG_CACHE_GROUPS = int(os.getenv("CATALOG_CACHE_GROUPS", "1000"))
+
+
+def load_aliases(value):
+    """Aliases column: a JSON list; empty for a row with none."""
+    return json.loads(value) if value else []
+
+
+class GroupCatalog:
+    def __init__(self, group_id):
+        self.group_id = group_id
+        self.stores = {}    # canonical name -> last store
+        self.aliases = {}   # alias -> canonical name
+        self.dirty = set()
+        # Records arrive from DB worker threads
+        self.lock = threading.Lock()
+
+    def canonical(self, raw):
+        raw = raw.lower().strip()
+        if raw in self.aliases:
+            return self.aliases[raw]
+        # Names arrive already singularized by the brain; only fold a plural
+        # onto an item the group already has, never invent a new stem
+        return self.aliases.get(singularize(raw), raw)
+
+    def store_for(self, name):
+        return self.stores.get(name)
+
+    def record(self, name, store, alias=None):
+        """Remember the store an item was just put in (and how it was spelled)."""
+        with self.lock:
+            self.stores[name] = store
+            self.aliases.setdefault(name, name)
+            if alias:
+                self.aliases[alias.lower().strip()] = name
+            self.dirty.add(name)
+
+    def rows(self, names):
+        for name in names:
+            aliases = sorted(a for a, n in self.aliases.items() if n == name and a != name)
+            yield {
+                "group_id": self.group_id, "name": name, "aliases": json.dumps(aliases),
+                "last_store": self.stores[name], "updated_at": datetime.now(),
+            }
+
+
+class CatalogCache:
+    def __init__(self, max_groups=CATALOG_CACHE_GROUPS):
+        self.lru = LRUCache("catalog", max_groups)
+
+    def get(self, session, group_id):
+        cat = self.lru.get(group_id)
+        if cat is None:
+            cat = self._load(session, group_id)
+            self.lru.put(group_id, cat)
+        return cat
+
+    def flush(self, session, cat):
+        """Write changed entries in one upsert, inside the caller's transaction."""
+        with cat.lock:
+            rows = list(cat.rows(cat.dirty))
+            cat.dirty.clear()
+        if not rows:
+            return
+        stmt = insert(ItemCatalog)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["group_id", "name"],
+            set_={"aliases": stmt.excluded.aliases, "last_store": stmt.excluded.last_store, "updated_at": stmt.excluded.updated_at},
+        )
+        session.exec(stmt, params=rows)
+
+    def invalidate(self, group_id):
+        self.lru.pop(group_id)
+
+    def _load(self, session, group_id):
+        cat = GroupCatalog(group_id)
+        rows = session.exec(select(ItemCatalog).where(ItemCatalog.group_id == group_id)).all()
+        for row in rows:
+            cat.stores[row.name] = row.last_store
+            cat.aliases[row.name] = row.name
+            for alias in load_aliases(row.aliases):
+                cat.aliases[alias] = row.name
+
+        if not rows:
+            # Groups that predate the catalog: seed it from the vault itself
+            tasks = session.exec(
+                select(Task.description, Task.store).where(Task.group_id == group_id).order_by(Task.created_at)
+            ).all()
+            for description, store in tasks:
+                cat.record(description, store)
+        return cat
+
+
+cache = CatalogCache()
@@ -0,0 +1,106 @@
+import os, logging
+from datetime import datetime, timedelta
+from apscheduler.triggers.date import DateTrigger
+import metrics
+
+logger = logging.getLogger("Adjnt.Catchup")
+
+# What to do with reminders that came due while the app was down.
+#   replay - overdue reminders within their grace are sent late (paced)
+#   drop   - overdue reminders are skipped; recurring ones just move on
+CATCHUP_POLICY = os.getenv("CATCHUP_POLICY", "replay")
+# Per-job misfire grace: a one-shot is still useful hours late, a recurring
+# "standup" reminder is not.
+ONESHOT_GRACE_SECONDS = int(os.getenv("ONESHOT_GRACE_SECONDS", str(6 * 3600)))
+RECURRING_GRACE_SECONDS = int(os.getenv("RECURRING_GRACE_SECONDS", "900"))
+# Replay pace (sends per second) so a restart does not flood WAHA
+CATCHUP_RATE = float(os.getenv("CATCHUP_RATE", "5"))
+
+ONESHOT_JOB_OPTS = {"misfire_grace_time": ONESHOT_GRACE_SECONDS}
+RECURRING_JOB_OPTS = {"misfire_grace_time": RECURRING_GRACE_SECONDS, "coalesce": True}
+
+last_report = {}
+
+
+def _is_recurring(job):
+    return not isinstance(job.trigger, DateTrigger)
+
+
+def _grace_for(job):
+    # Jobs created before per-job grace existed carry APScheduler's 1s default
+    if job.misfire_grace_time is not None and job.misfire_grace_time > 1:
+        return job.misfire_grace_time
+    return RECURRING_GRACE_SECONDS if _is_recurring(job) else ONESHOT_GRACE_SECONDS
+
+
+def _due_at(job):
+    # A reminder already rescheduled by an earlier catch-up keeps its real due time
+    return job.kwargs.get("due_at") or job.next_run_time
+
+
+def plan_catch_up(scheduler, tz):
+    """Resolve overdue jobs before the scheduler is resumed.
+
+    Must run while the scheduler is started paused. Recurring jobs are moved to
+    their next future run (missed runs coalesced into one send); overdue
+    one-shots are dropped or, when replayed, moved to a paced run time in the
+    job store. A replayed recurring run becomes a one-shot "<id>_catchup" job.
+    Replays carry due_at so the reminder can say when it was due; they go out
+    through the scheduler like any other reminder, so one still due survives
+    another restart. Returns the number of replays scheduled.
+    """
+    now = datetime.now(tz)
+    report = {"overdue": 0, "replayed": 0, "coalesced": 0, "dropped": 0}
+    replay = []
+
+    for job in scheduler.get_jobs():
+        if not job.id.startswith("rem_") or job.next_run_time is None or job.next_run_time > now:
+            continue
+        report["overdue"] += 1
+        due_at = _due_at(job)
+        late = (now - due_at).total_seconds()
+        keep = CATCHUP_POLICY == "replay" and late <= _grace_for(job)
+
+        if _is_recurring(job):
+            run_times = job._get_run_times(now)
+            next_run = job.trigger.get_next_fire_time(run_times[-1], now)
+            if next_run:
+                job.modify(next_run_time=next_run)
+            else:
+                job.remove()
+            if keep:
+                report["coalesced"] += len(run_times) - 1
+                replay.append((due_at, job, True))
+            else:
+                report["dropped"] += len(run_times)
+        elif keep:
+            replay.append((due_at, job, False))
+        else:
+            job.remove()
+            report["dropped"] += 1
+
+    # Oldest first, CATCHUP_RATE per second, so a restart does not flood WAHA
+    replay.sort(key=lambda r: r[0])
+    delay = timedelta(seconds=1 / CATCHUP_RATE if CATCHUP_RATE > 0 else 0)
+    for i, (due_at, job, recurring) in enumerate(replay):
+        run_at = now + delay * i
+        if recurring:
+            scheduler.add_job(
+                job.func, DateTrigger(run_at), args=job.args, kwargs={"due_at": due_at},
+                id=f"{job.id}_catchup", replace_existing=True, **ONESHOT_JOB_OPTS,
+            )
+        else:
+            job.modify(trigger=DateTrigger(run_at), next_run_time=run_at, kwargs={**job.kwargs, "due_at": due_at})
+
+    report["replayed"] = len(replay)
+    for k in ("replayed", "coalesced", "dropped"):
+        metrics.inc(f"catchup.{k}", report[k])
+
+    last_report.clear()
+    last_report.update(report)
+    logger.info(f"⏪ Catch-up ({CATCHUP_POLICY}): {report}")
+    return len(replay)
+
+
+def late_note(due_at, tz):
+    return f" _(was due {due_at.astimezone(tz).strftime('%a %I:%M %p')})_"
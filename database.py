@@ -1,12 +1,100 @@
-from sqlmodel import create_engine, SQLModel, Session
-import os
+from sqlmodel import create_engine, SQLModel, Session, select, func
+from bisect import bisect
+import os, glob, hashlib
+from models import Group, Task
 
 sqlite_url = "sqlite:///adjnt_vault.db"
 engine = create_engine(sqlite_url, connect_args={"check_same_thread": False})
 
+# Optional sharding: with DB_SHARDS > 0 each group's vault (groups, tasks,
+# catalog) lives in one of N SQLite files picked by a consistent-hash ring,
+# so commits from different groups no longer share one writer lock. The
+# scheduler job store and reminder index stay in the main database.
+DB_SHARDS = int(os.getenv("DB_SHARDS", "0"))
+SHARD_DIR = os.getenv("SHARD_DIR", ".")
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode()).digest()[:8], "big")
+
+
+def shard_path(name):
+    return os.path.join(SHARD_DIR, f"adjnt_{name}.db")
+
+
+class ShardRouter:
+    def __init__(self, shards=DB_SHARDS, vnodes=SHARD_VNODES):
+        self.names = [f"shard{i}" for i in range(shards)]
+        self.ring = sorted((_hash(f"{name}#{v}"), name) for name in self.names for v in range(vnodes))
+        self.points = [p for p, _ in self.ring]
+        self.engines = {}
+
+    def shard_for(self, group_id):
+        """Shard name for a group; None when sharding is off (main database)."""
+        if not self.ring:
+            return None
+        i = bisect(self.points, _hash(group_id)) % len(self.ring)
+        return self.ring[i][1]
+
+    def engine_named(self, name):
+        if name is None:
+            return engine
+        if name not in self.engines:
+            self.engines[name] = create_engine(f"sqlite:///{shard_path(name)}", connect_args={"check_same_thread": False})
+        return self.engines[name]
+
+    def engine_for(self, group_id):
+        return self.engine_named(self.shard_for(group_id))
+
+    def all_engines(self):
+        """(name, engine) for every database that can hold vault data."""
+        if not self.names:
+            return [("main", engine)]
+        return [(name, self.engine_named(name)) for name in self.names]
+
+
+router = ShardRouter()
+
+
 def init_db():
     SQLModel.metadata.create_all(engine)
+    for name, shard in router.all_engines():
+        if shard is not engine:
+            SQLModel.metadata.create_all(shard)
 
 def get_session():
     with Session(engine) as session:
-        yield session
\ No newline at end of file
+        yield session
+
+def session_for(group_id):
+    """Session on the database that owns group_id."""
+    return Session(router.engine_for(group_id))
+
+def shard_stats():
+    """Group and task counts per database (cross-shard admin query)."""
+    stats = []
+    for name, shard in router.all_engines():
+        with Session(shard) as session:
+            stats.append({
+                "shard": name,
+                "groups": session.exec(select(func.count()).select_from(Group)).one(),
+                "tasks": session.exec(select(func.count()).select_from(Task)).one(),
+            })
+    return stats
+
+def inactive_groups():
+    """Ids of groups with is_active unset, across every database."""
+    ids = []
+    for _, shard in router.all_engines():
+        with Session(shard) as session:
+            ids.extend(session.exec(select(Group.id).where(Group.is_active == False)).all())  # noqa: E712
+    return ids
+
+def existing_databases():
+    """Main database plus every shard file on disk, for migrations."""
+    found = [("main", engine)]
+    for path in sorted(glob.glob(os.path.join(SHARD_DIR, "adjnt_shard*.db"))):
+        name = os.path.basename(path)[len("adjnt_"):-len(".db")]
+        found.append((name, router.engine_named(name)))
+    return found
@@ -0,0 +1,69 @@
+import os, asyncio, logging
+from reminder_index import REMINDER_PREFIX
+from cache import LRUCache
+import metrics
+
+logger = logging.getLogger("Adjnt.Digest")
+
+# Reminders firing for the same chat close together are sent as one digest
+# message (one HTTP call, one notification). A reminder in a quiet chat goes
+# out after DIGEST_SETTLE_SECONDS, together with any others of the same
+# scheduler wave; reminders firing within the window after a send wait for
+# the window to end and go out as one digest. Groups can change the window
+# or opt out ("digest off"); see GroupPrefs.
+DIGEST_WINDOW_SECONDS = float(os.getenv("DIGEST_WINDOW_SECONDS", "10"))
+DIGEST_MAX_WINDOW_SECONDS = 300
+DIGEST_SETTLE_SECONDS = float(os.getenv("DIGEST_SETTLE_SECONDS", "1"))
+
+
+def render(texts):
+    if len(texts) == 1:
+        return texts[0]
+    items = [t[len(REMINDER_PREFIX):] if t.startswith(REMINDER_PREFIX) else t for t in texts]
+    return f"⏰ *REMINDERS ({len(items)}):*\n" + "\n".join(f"- {i}" for i in items)
+
+
+class Digester:
+    def __init__(self, send, prefs):
+        self.send = send      # async send(to, text)
+        self.prefs = prefs    # async prefs(group_id) -> GroupPrefs
+        self.pending = {}     # recipient -> (texts, future)
+        self.quiet_at = LRUCache("digest.quiet_at", 10000)  # recipient -> loop time its window ends
+        self.tasks = set()
+
+    async def fire(self, to, text):
+        """Deliver a due reminder; returns once the (digest) message is sent."""
+        prefs = await self.prefs(to)
+        window = DIGEST_WINDOW_SECONDS if prefs.digest_window is None else prefs.digest_window
+        if not prefs.digest_enabled or window <= 0:
+            await self.send(to, text)
+            return
+
+        if to in self.pending:
+            texts, done = self.pending[to]
+            texts.append(text)
+        else:
+            loop = asyncio.get_running_loop()
+            done = loop.create_future()
+            self.pending[to] = ([text], done)
+            delay = max(DIGEST_SETTLE_SECONDS, (self.quiet_at.peek(to) or 0) - loop.time())
+            task = asyncio.create_task(self._flush_later(to, delay, window))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+        # Every job in the digest completes when the message goes out, so the
+        # lateness listener sees the real delivery time
+        await asyncio.shield(done)
+
+    async def _flush_later(self, to, delay, window):
+        await asyncio.sleep(delay)
+        texts, done = self.pending.pop(to)
+        self.quiet_at.put(to, asyncio.get_running_loop().time() + window)
+        try:
+            await self.send(to, render(texts))
+            metrics.inc("digest.sent")
+            metrics.inc("digest.coalesced", len(texts) - 1)
+            if len(texts) > 1:
+                logger.info("⏰ Digest of %d reminders sent to %s", len(texts), to)
+            done.set_result(None)
+        except Exception as e:
+            done.set_exception(e)
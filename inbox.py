@@ -0,0 +1,272 @@
+import os, time, asyncio, logging, contextvars
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import bindparam, text as sql
+from database import engine
+import metrics
+
+logger = logging.getLogger("Adjnt.Inbox")
+
+# Durable inbox: the webhook only appends the message to an SQLite table and
+# acks. A dispatcher claims pending rows in arrival order and runs them, one
+# at a time per chat and one worker per chat; rows still claimed when the
+# process dies are replayed on the next start (at-least-once). WAHA message
+# ids are unique here, so a redelivery after a restart is still recognised as
+# a duplicate.
+INBOX_WORKERS = int(os.getenv("INBOX_WORKERS", "16"))       # chats in flight
+INBOX_BATCH = int(os.getenv("INBOX_BATCH", "32"))           # rows per claim
+INBOX_MAX_ATTEMPTS = int(os.getenv("INBOX_MAX_ATTEMPTS", "3"))
+INBOX_POLL_SECONDS = float(os.getenv("INBOX_POLL_SECONDS", "5"))
+INBOX_RETENTION_HOURS = float(os.getenv("INBOX_RETENTION_HOURS", "24"))
+
+
+class Inbox:
+    def __init__(self, engine, workers=INBOX_WORKERS, batch=INBOX_BATCH):
+        self.engine = engine
+        self.workers = workers
+        self.batch = batch
+        # One writer thread: appends, claims and acks queued while a commit is
+        # in flight all go into the next one
+        self.writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adjnt-inbox")
+        self.pending = []             # [(fn, args, future)] for the next commit
+        self.flusher = None
+        self.ready = asyncio.Event()  # set once the table exists, or on failure
+        self.error = None
+        self.wakeup = asyncio.Event()
+        self.slot = asyncio.Event()
+        self.backlog = 0
+        self.inflight = 0
+        self.chains = {}              # chat_id -> task running that chat's claimed rows
+        self.tasks = set()
+        self.pruned_at = 0.0
+        self.given_up = []            # chats whose rows ran out of attempts before a restart
+
+    def init(self):
+        """Create the table and requeue rows a previous process left unfinished."""
+        with self.engine.begin() as conn:
+            conn.execute(sql(
+                "CREATE TABLE IF NOT EXISTS inbox ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, message_id TEXT UNIQUE, "
+                "chat_id TEXT NOT NULL, sender_id TEXT, text TEXT NOT NULL, "
+                "status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0, "
+                "received_at REAL NOT NULL, claimed_at REAL, finished_at REAL)"
+            ))
+            conn.execute(sql("CREATE INDEX IF NOT EXISTS inbox_status ON inbox (status, id)"))
+            now = time.time()
+            # Out of attempts: run() tells these chats once it has an on_failed
+            failed = conn.execute(sql(
+                "UPDATE inbox SET status = 'failed', finished_at = :now "
+                "WHERE status = 'processing' AND attempts >= :max RETURNING id, chat_id"
+            ), {"now": now, "max": INBOX_MAX_ATTEMPTS}).all()
+            self.given_up = list(dict.fromkeys(row.chat_id for row in sorted(failed)))
+            failed = len(failed)
+            replayed = conn.execute(sql("UPDATE inbox SET status = 'pending' WHERE status = 'processing'")).rowcount
+            self._prune(conn, now)
+            self.backlog = conn.execute(sql("SELECT count(*) FROM inbox WHERE status = 'pending'")).scalar()
+        metrics.inc("inbox.replayed", replayed)
+        metrics.inc("inbox.failed", failed)
+        if replayed or failed or self.backlog:
+            logger.info(f"📥 Inbox recovered: {self.backlog} pending ({replayed} interrupted), {failed} given up")
+
+    # --- writer ---
+
+    async def _write(self, fn, *args):
+        """Run fn(conn, *args) in the next inbox commit; returns once durable."""
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((fn, args, future))
+        if self.flusher is None:
+            # Fresh context: the flusher serves many messages, not the one that woke it
+            self.flusher = contextvars.Context().run(asyncio.create_task, self._flush())
+        return await future
+
+    async def _flush(self):
+        loop = asyncio.get_running_loop()
+        try:
+            while self.pending:
+                batch, self.pending = self.pending, []
+                try:
+                    results = await loop.run_in_executor(self.writer, self._apply, batch)
+                except Exception as e:
+                    logger.error(f"❌ Inbox commit of {len(batch)} op(s) failed: {e}")
+                    results = [e] * len(batch)
+                metrics.observe("inbox.batch_size", len(batch))
+                for (_, _, future), result in zip(batch, results):
+                    if future.done():
+                        continue
+                    if isinstance(result, Exception):
+                        future.set_exception(result)
+                    else:
+                        future.set_result(result)
+        finally:
+            self.flusher = None
+
+    def _apply(self, batch):
+        with self.engine.begin() as conn:
+            return [fn(conn, *args) for fn, args, _ in batch]
+
+    def _insert(self, conn, msg, now):
+        return conn.execute(sql(
+            "INSERT INTO inbox (message_id, chat_id, sender_id, text, received_at) "
+            "VALUES (:message_id, :chat_id, :sender_id, :text, :now) ON CONFLICT (message_id) DO NOTHING"
+        ), {"message_id": msg.id, "chat_id": msg.chat_id, "sender_id": msg.sender_id, "text": msg.text, "now": now}).rowcount == 1
+
+    def _claim(self, conn, busy, chats, limit, now):
+        """Claim the oldest pending rows of up to `chats` chats that are not busy."""
+        rows = conn.execute(sql(
+            "SELECT id, chat_id FROM inbox WHERE status = 'pending' AND chat_id NOT IN :busy ORDER BY id LIMIT :limit"
+        ).bindparams(bindparam("busy", expanding=True)), {"busy": busy, "limit": limit}).all()
+        picked, ids = set(), []
+        for row in rows:
+            if row.chat_id not in picked:
+                if len(picked) >= chats:
+                    continue
+                picked.add(row.chat_id)
+            ids.append(row.id)
+        claimed = []
+        for i in range(0, len(ids), 500):
+            claimed += conn.execute(sql(
+                "UPDATE inbox SET status = 'processing', attempts = attempts + 1, claimed_at = :now "
+                "WHERE id IN :ids RETURNING id, chat_id, sender_id, text, attempts, received_at"
+            ).bindparams(bindparam("ids", expanding=True)), {"now": now, "ids": ids[i:i + 500]}).all()
+        if now - self.pruned_at > 3600:
+            self._prune(conn, now)
+        return sorted(claimed, key=lambda r: r.id)
+
+    def _release(self, conn, ids):
+        """Hand claimed rows that never started back to the queue."""
+        conn.execute(sql(
+            "UPDATE inbox SET status = 'pending', attempts = attempts - 1 WHERE id IN :ids"
+        ).bindparams(bindparam("ids", expanding=True)), {"ids": ids})
+
+    def _finish(self, conn, row_id, status, now):
+        conn.execute(sql("UPDATE inbox SET status = :status, finished_at = :now WHERE id = :id"),
+                     {"status": status, "now": now, "id": row_id})
+
+    def _prune(self, conn, now):
+        conn.execute(sql("DELETE FROM inbox WHERE status IN ('done', 'failed') AND finished_at < :cutoff"),
+                     {"cutoff": now - INBOX_RETENTION_HOURS * 3600})
+        self.pruned_at = now
+
+    # --- ingress ---
+
+    def fail(self, error):
+        """Storage never came up: release waiting appends with an error."""
+        if not self.ready.is_set():
+            self.error = str(error)
+            self.ready.set()
+
+    async def append(self, msg, timeout=None):
+        """Durably queue a webhook message; False if it was already received.
+
+        Raises asyncio.TimeoutError if the table is not up within timeout and
+        RuntimeError if it never will be.
+        """
+        if not self.ready.is_set():
+            await asyncio.wait_for(self.ready.wait(), timeout)
+        if self.error:
+            raise RuntimeError(f"inbox unavailable: {self.error}")
+        added = await self._write(self._insert, msg, time.time())
+        if added:
+            self.backlog += 1
+            metrics.inc("inbox.appended")
+            self.wakeup.set()
+        else:
+            metrics.inc("inbox.duplicate")
+        return added
+
+    # --- dispatch ---
+
+    async def run(self, handler, on_failed=None, retry_on=(Exception,)):
+        """Claim pending rows in order and run handler(text, chat_id, sender_id) on each.
+
+        A chat's rows run one after another and take one worker between them;
+        rows of chats already running stay pending until the chat is free.
+        A retry_on exception retries the row (the chat's later rows wait for
+        it) until INBOX_MAX_ATTEMPTS; any other fails it at once. A failed row
+        calls on_failed(chat_id), as do rows given up on during init().
+        """
+        given_up, self.given_up = self.given_up, []
+        for chat_id in given_up:
+            await self._give_up(chat_id, on_failed)
+        while True:
+            while self.inflight >= self.workers:
+                self.slot.clear()
+                await self.slot.wait()
+            # Cleared before claiming so an append during the claim is not missed
+            self.wakeup.clear()
+            rows = await self._write(self._claim, list(self.chains), self.workers - self.inflight,
+                                     self.batch, time.time())
+            if not rows:
+                try:
+                    await asyncio.wait_for(self.wakeup.wait(), INBOX_POLL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            self.backlog -= len(rows)
+            by_chat = {}
+            for row in rows:
+                by_chat.setdefault(row.chat_id, []).append(row)
+            for chat_id, chat_rows in by_chat.items():
+                self._start(chat_id, chat_rows, handler, on_failed, retry_on)
+
+    def _start(self, chat_id, rows, handler, on_failed, retry_on):
+        self.inflight += 1
+        task = contextvars.Context().run(asyncio.create_task, self._drain(chat_id, rows, handler, on_failed, retry_on))
+        self.chains[chat_id] = task
+        self.tasks.add(task)
+        task.add_done_callback(lambda t: self._done(t, chat_id))
+
+    def _done(self, task, chat_id):
+        self.tasks.discard(task)
+        if self.chains.get(chat_id) is task:
+            del self.chains[chat_id]
+        self.inflight -= 1
+        self.slot.set()
+        if self.backlog:
+            # The chat's later rows can be claimed now
+            self.wakeup.set()
+
+    async def _drain(self, chat_id, rows, handler, on_failed, retry_on):
+        for i, row in enumerate(rows):
+            if await self._process(row, handler, on_failed, retry_on) == "pending":
+                # Retried first: the rest go back behind it
+                rest = [r.id for r in rows[i + 1:]]
+                if rest:
+                    await self._write(self._release, rest)
+                    self.backlog += len(rest)
+                return
+
+    async def _process(self, row, handler, on_failed, retry_on):
+        metrics.observe("inbox.wait_seconds", time.time() - row.received_at)
+        try:
+            await handler(row.text, row.chat_id, row.sender_id)
+            status = "done"
+        except Exception as e:
+            logger.error(f"❌ Inbox message {row.id} failed (attempt {row.attempts}): {e}", exc_info=True)
+            # A deterministic failure would fail again, after paying for the LLM again
+            retry = isinstance(e, retry_on) and row.attempts < INBOX_MAX_ATTEMPTS
+            status = "pending" if retry else "failed"
+        # Cancelled (shutdown) rows stay claimed and are replayed on the next start
+        await self._write(self._finish, row.id, status, time.time())
+        if status == "pending":
+            self.backlog += 1
+        metrics.inc(f"inbox.{status}" if status != "pending" else "inbox.retried")
+        if status == "failed":
+            await self._give_up(row.chat_id, on_failed)
+        return status
+
+    async def _give_up(self, chat_id, on_failed):
+        if on_failed is None:
+            return
+        try:
+            await on_failed(chat_id)
+        except Exception as e:
+            logger.error(f"❌ Inbox on_failed for {chat_id} failed: {e}")
+
+    def stop(self):
+        for task in list(self.tasks):
+            task.cancel()
+
+
+queue = Inbox(engine)
+metrics.gauge("inbox.backlog", lambda: queue.backlog)
+metrics.gauge("inbox.inflight", lambda: queue.inflight)
@@ -0,0 +1,90 @@
+import os
+from cache import LRUCache
+import metrics
+
+try:
+    import orjson
+    loads = orjson.loads
+except ImportError:  # optional speedup
+    import json
+    loads = json.loads
+
+# Webhook ingress: WAHA posts every subscribed event (WHATSAPP_HOOK_EVENTS),
+# including `message.any` duplicates and echoes of our own replies. Those are
+# rejected here, most of them by a byte scan before the body is parsed at all.
+WEBHOOK_EVENTS = set(os.getenv("WEBHOOK_EVENTS", "message").split(","))
+WEBHOOK_DEDUP_SIZE = int(os.getenv("WEBHOOK_DEDUP_SIZE", "50000"))
+
+# WAHA serializes compactly, and quotes inside string values are escaped, so
+# these byte patterns can only match the real keys
+_FROM_ME = b'"fromMe":true'
+_ANY_EVENT = b'"event":"message.any"'
+
+
+class Message:
+    __slots__ = ("id", "chat_id", "sender_id", "text", "session")
+
+    def __init__(self, id, chat_id, sender_id, text, session=None):
+        self.id = id
+        self.chat_id = chat_id
+        self.sender_id = sender_id
+        self.text = text
+        # WAHA session that received it; every session posts to the same webhook
+        self.session = session
+
+
+seen = LRUCache("ingress.seen", WEBHOOK_DEDUP_SIZE)
+
+
+def forget(msg):
+    """Let a redelivery of msg through again (it was refused, not handled)."""
+    if msg.id is not None:
+        seen.pop(msg.id)
+
+
+def drop(reason):
+    metrics.inc(f"ingress.dropped.{reason}")
+    return None, reason
+
+
+def parse(raw):
+    """(Message, None) for a new inbound text message, else (None, drop reason)."""
+    if not raw:
+        return drop("empty")
+    if _FROM_ME in raw:
+        return drop("from_me")
+    if _ANY_EVENT in raw and "message.any" not in WEBHOOK_EVENTS:
+        return drop("event")
+
+    try:
+        data = loads(raw)
+    except ValueError:
+        return drop("bad_json")
+    if not isinstance(data, dict):
+        return drop("bad_json")
+    if data.get("event", "message") not in WEBHOOK_EVENTS:
+        return drop("event")
+
+    payload = data.get("payload")
+    if not isinstance(payload, dict):
+        return drop("bad_json")
+    if payload.get("fromMe"):
+        return drop("from_me")
+    text = payload.get("body")
+    if not isinstance(text, str) or not text.strip():
+        # Media without a caption, reactions, receipts, ...
+        return drop("not_text")
+    chat_id = str(payload.get("from") or "").strip()
+    if not chat_id:
+        return drop("no_chat")
+
+    msg_id = payload.get("id")
+    if msg_id is not None:
+        if seen.peek(msg_id) is not None:
+            return drop("duplicate")
+        seen.put(msg_id, True)
+
+    metrics.inc("ingress.accepted")
+    # In group chats the individual sender is the participant
+    sender_id = payload.get("participant") or payload.get("author") or chat_id
+    return Message(msg_id, chat_id, sender_id, text, data.get("session")), None
@@ -0,0 +1,234 @@
+"""Local intent classifier: character n-gram features, softmax linear model.
+
+Predicts an intent with a confidence in microseconds so confident messages can
+take a cheaper path than the full LLM prompt. Trained from TEST_CASES in
+test_adjnt.py plus LLM-labelled production traffic (INTENT_LOG).
+
+    python intent_model.py train     # retrain, save, print report
+    python intent_model.py report    # evaluate the saved model
+"""
+import os, sys, ast, json, math, time, random, logging, threading
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger("Adjnt.IntentModel")
+
+INTENT_MODEL_PATH = os.getenv("INTENT_MODEL_PATH", "intent_model.json")
+# Predictions at or above this confidence take the cheap path
+INTENT_CONFIDENCE = float(os.getenv("INTENT_CONFIDENCE", "0.9"))
+# JSONL of {"text", "intent"} labelled by the full LLM path, for retraining
+INTENT_LOG = os.getenv("INTENT_LOG", "")
+TEST_CASES_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "test_adjnt.py")
+
+NGRAMS = (2, 3)
+
+
+def features(text):
+    t = f" {text.lower().strip()} "
+    feats = Counter()
+    for n in NGRAMS:
+        for i in range(len(t) - n + 1):
+            feats[t[i:i + n]] += 1
+    for w in t.split():
+        feats[f"w:{w}"] += 1
+    norm = math.sqrt(sum(v * v for v in feats.values())) or 1.0
+    return {k: v / norm for k, v in feats.items()}
+
+
+def _softmax(scores):
+    top = max(scores)
+    exps = [math.exp(s - top) for s in scores]
+    total = sum(exps)
+    return [e / total for e in exps]
+
+
+class IntentModel:
+    def __init__(self, labels, weights, bias):
+        self.labels = labels
+        self.weights = weights    # feature -> [weight per label]
+        self.bias = bias
+
+    def probabilities(self, text):
+        scores = list(self.bias)
+        for f, v in features(text).items():
+            w = self.weights.get(f)
+            if w:
+                scores = [s + wi * v for s, wi in zip(scores, w)]
+        return _softmax(scores)
+
+    def predict(self, text):
+        """(intent, confidence)."""
+        probs = self.probabilities(text)
+        best = max(range(len(probs)), key=probs.__getitem__)
+        return self.labels[best], probs[best]
+
+    @classmethod
+    def train(cls, examples, epochs=40, lr=0.5, l2=1e-4, seed=0):
+        """SGD on softmax cross-entropy over (text, intent) pairs."""
+        labels = sorted({intent for _, intent in examples})
+        index = {l: i for i, l in enumerate(labels)}
+        data = [(features(text), index[intent]) for text, intent in examples]
+        weights = defaultdict(lambda: [0.0] * len(labels))
+        bias = [0.0] * len(labels)
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(data)
+            step = lr / (1 + epoch * 0.1)
+            for feats, y in data:
+                scores = list(bias)
+                for f, v in feats.items():
+                    for i, wi in enumerate(weights[f]):
+                        scores[i] += wi * v
+                probs = _softmax(scores)
+                for i in range(len(labels)):
+                    grad = probs[i] - (1.0 if i == y else 0.0)
+                    bias[i] -= step * grad
+                    for f, v in feats.items():
+                        weights[f][i] -= step * (grad * v + l2 * weights[f][i])
+        return cls(labels, dict(weights), bias)
+
+    def save(self, path=INTENT_MODEL_PATH):
+        weights = {f: [round(x, 5) for x in w] for f, w in self.weights.items()}
+        with open(path, "w") as fh:
+            json.dump({"labels": self.labels, "bias": self.bias, "weights": weights}, fh)
+
+    @classmethod
+    def load(cls, path=INTENT_MODEL_PATH):
+        with open(path) as fh:
+            raw = json.load(fh)
+        return cls(raw["labels"], raw["weights"], raw["bias"])
+
+
+# --- corpus ---
+
+def test_cases(path=TEST_CASES_FILE):
+    """TEST_CASES read with ast, so the interactive test deps are not imported."""
+    with open(path) as fh:
+        tree = ast.parse(fh.read())
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(getattr(t, "id", None) == "TEST_CASES" for t in node.targets):
+            return [(c["input"], c["expected_intent"]) for c in ast.literal_eval(node.value)]
+    return []
+
+
+def logged_traffic(path=INTENT_LOG):
+    if not path or not os.path.exists(path):
+        return []
+    examples = {}
+    with open(path) as fh:
+        for line in fh:
+            try:
+                row = json.loads(line)
+            except ValueError:
+                continue
+            if row.get("intent") and row["intent"] != "UNKNOWN":
+                # Latest label wins for repeated texts
+                examples[row["text"].lower().strip()] = row["intent"]
+    return list(examples.items())
+
+
+def corpus():
+    return test_cases() + logged_traffic()
+
+
+_log_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adjnt-intentlog") if INTENT_LOG else None
+
+
+def log_example(text, intent):
+    """Append an LLM-labelled message to INTENT_LOG (off the event loop)."""
+    if _log_writer:
+        _log_writer.submit(_append, json.dumps({"text": text, "intent": intent}) + "\n")
+
+
+def _append(line):
+    try:
+        with open(INTENT_LOG, "a") as fh:
+            fh.write(line)
+    except OSError as e:
+        logger.error(f"❌ Intent log write failed: {e}")
+
+
+# --- runtime ---
+
+_model = None
+_model_lock = threading.Lock()
+
+
+def model():
+    """The saved model, loaded on first use; None if it has not been trained."""
+    global _model
+    if _model is None and os.path.exists(INTENT_MODEL_PATH):
+        with _model_lock:
+            if _model is None:
+                _model = IntentModel.load(INTENT_MODEL_PATH)
+                logger.info(f"🧮 Intent model loaded: {len(_model.weights)} features, {len(_model.labels)} intents")
+    return _model
+
+
+def predict(text):
+    """(intent, confidence), or None without a trained model."""
+    m = model()
+    return m.predict(text) if m else None
+
+
+# --- report ---
+
+def report(m, examples, folds=5):
+    """Accuracy (training and k-fold), confident-path coverage and latency."""
+    train_acc = sum(m.predict(t)[0] == y for t, y in examples) / len(examples)
+
+    shuffled = list(examples)
+    random.Random(1).shuffle(shuffled)
+    correct, confident, confident_correct = 0, 0, 0
+    per_intent = defaultdict(lambda: [0, 0])
+    for k in range(folds):
+        test = shuffled[k::folds]
+        train = [e for i, e in enumerate(shuffled) if i % folds != k]
+        fold_model = IntentModel.train(train)
+        for text, y in test:
+            label, conf = fold_model.predict(text)
+            ok = label == y
+            correct += ok
+            per_intent[y][0] += ok
+            per_intent[y][1] += 1
+            if conf >= INTENT_CONFIDENCE:
+                confident += 1
+                confident_correct += ok
+
+    started = time.perf_counter()
+    for text, _ in examples:
+        m.predict(text)
+    per_call = (time.perf_counter() - started) / len(examples)
+
+    return {
+        "examples": len(examples),
+        "train_accuracy": round(train_acc, 3),
+        "cv_accuracy": round(correct / len(examples), 3),
+        "cv_per_intent": {y: f"{c}/{n}" for y, (c, n) in sorted(per_intent.items())},
+        "confident_share": round(confident / len(examples), 3),
+        "confident_accuracy": round(confident_correct / confident, 3) if confident else None,
+        "threshold": INTENT_CONFIDENCE,
+        "predict_microseconds": round(per_call * 1e6, 1),
+    }
+
+
+def main(argv):
+    command = argv[1] if len(argv) > 1 else "report"
+    examples = corpus()
+    if not examples:
+        sys.exit("No training examples found")
+    if command == "train":
+        m = IntentModel.train(examples)
+        m.save(INTENT_MODEL_PATH)
+        print(f"💾 Saved {INTENT_MODEL_PATH} ({len(examples)} examples, {len(m.weights)} features)")
+    elif command == "report":
+        m = model()
+        if m is None:
+            sys.exit(f"No model at {INTENT_MODEL_PATH}; run: python intent_model.py train")
+    else:
+        sys.exit(__doc__)
+    print(json.dumps(report(m, examples), indent=2))
+
+
+if __name__ == "__main__":
+    main(sys.argv)
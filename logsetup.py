@@ -0,0 +1,103 @@
+import os, sys, json, queue, atexit, random, logging
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+import metrics
+
+# Logging pipeline: callers only build a LogRecord and put it on a queue; a
+# background thread formats and writes it. High-volume INFO lines carry a
+# category (extra={"category": ...}) and are sampled per category before they
+# are queued, so dropped lines cost almost nothing.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")           # json | text
+LOG_FILE = os.getenv("LOG_FILE", "")                   # also write here, rotated by size
+LOG_MAX_BYTES = int(os.getenv("LOG_MAX_BYTES", str(10 * 1024 * 1024)))
+LOG_BACKUPS = int(os.getenv("LOG_BACKUPS", "5"))
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# category=rate pairs; categories not listed are always kept
+LOG_SAMPLING = os.getenv("LOG_SAMPLING", "start=0.1,brain_raw=0.1,reply=0.2,match=0.2")
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+
+
+def parse_sampling(spec):
+    rates = {}
+    for pair in filter(None, (p.strip() for p in spec.split(","))):
+        category, _, rate = pair.partition("=")
+        rates[category.strip()] = float(rate)
+    return rates
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; the message is only rendered here, off the hot path."""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        category = getattr(record, "category", None)
+        if category:
+            entry["category"] = category
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """Keeps a fraction of INFO-and-below records per category; warnings always pass."""
+
+    def __init__(self, rates):
+        super().__init__()
+        self.rates = rates
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        category = getattr(record, "category", None)
+        rate = self.rates.get(category)
+        if rate is None or random.random() < rate:
+            return True
+        metrics.inc(f"log.sampled_out.{category}")
+        return False
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    def prepare(self, record):
+        # The stock handler formats the message here, on the caller's thread;
+        # the listener's formatter does it instead
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            metrics.inc("log.dropped")
+
+
+def setup(level=LOG_LEVEL, fmt=LOG_FORMAT, path=LOG_FILE, sampling=LOG_SAMPLING):
+    """Route the root logger through a queue; returns the started listener."""
+    formatter = JsonFormatter() if fmt == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler(sys.stdout)]
+    if path:
+        handlers.append(RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding="utf-8"))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.Queue(LOG_QUEUE_SIZE)
+    front = NonBlockingQueueHandler(records)
+    front.addFilter(SamplingFilter(parse_sampling(sampling)))
+
+    root = logging.getLogger()
+    for old in list(root.handlers):
+        root.removeHandler(old)
+    root.addHandler(front)
+    root.setLevel(level)
+
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    listener.start()
+    # Flush what is still queued when the process exits
+    atexit.register(listener.stop)
+    metrics.gauge("log.queue_depth", records.qsize)
+    return listener
@@ -1,29 +1,55 @@
-import os, requests, logging, json
+import time
+_import_started = time.perf_counter()
+
+# Load .env once, before any module reads its configuration
+from dotenv import load_dotenv
+load_dotenv()
+
+import os, logging, json, asyncio
 from datetime import datetime, timedelta
 from contextlib import asynccontextmanager
-from collections import Counter
-from fastapi import FastAPI, Request, BackgroundTasks
-from sqlmodel import Session, select, delete
-from database import init_db, engine
-from models import Task, Group
+from fastapi import FastAPI, Request, Depends, Header, HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
+from sqlalchemy.exc import OperationalError
+import httpx
+from database import init_db, shard_stats, router, inactive_groups
+from repo import repo
+from ratelimit import admission
+from prefetch import Prefetch
 from brain import AdjntBrain
-from apscheduler.schedulers.background import BackgroundScheduler
-from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
-from dotenv import load_dotenv
+from delivery import WahaClient
+from scheduler import build_scheduler
+from apscheduler.events import EVENT_JOB_EXECUTED, EVENT_JOB_ERROR, EVENT_JOB_MISSED
+import metrics, catchup, reminder_index, startup, usage, transfer, ingress, digest, paging, inbox, rollups, logsetup, bulk, shadow
+from profiler import profiler
 import pytz
 
-load_dotenv()
-processed_ids = set()
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# Queue-backed logging: I/O on a background thread, JSON lines, sampled hot-path INFO
+logsetup.setup()
 logger = logging.getLogger("Adjnt")
 
 # Timezone configuration
 TIMEZONE = os.getenv("TIMEZONE", "America/Los_Angeles")  # Default to PST/PDT
 tz = pytz.timezone(TIMEZONE)
 
-db_url = os.getenv("DATABASE_URL", "sqlite:///adjnt_vault.db")
-scheduler = BackgroundScheduler(jobstores={'default': SQLAlchemyJobStore(url=db_url)})
+# Reminder lateness SLO: fraction of reminders delivered within the threshold
+REMINDER_SLO_SECONDS = float(os.getenv("REMINDER_SLO_SECONDS", "60"))
+REMINDER_SLO_OBJECTIVE = float(os.getenv("REMINDER_SLO_OBJECTIVE", "0.99"))
+
+# Shared secret for the admin endpoints (X-Admin-Token header)
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+
+# Inbox failures worth another attempt (warm-up, a locked database, the
+# network); anything else is a bug or bad input and fails on the first try
+RETRY_ERRORS = (startup.NotReady, OperationalError, httpx.TransportError, asyncio.TimeoutError, ConnectionError)
+
+# Created in warm_up(); the Groq client inside brain is built lazily
+scheduler = None
 brain = AdjntBrain()
+waha = WahaClient()
+background = set()
+metrics.slo("reminder_lateness", "reminder.lateness_seconds", REMINDER_SLO_SECONDS, REMINDER_SLO_OBJECTIVE)
+startup.report.record_import(_import_started)
 
 def get_guide():
     tz_name = TIMEZONE.replace("_", " ")  # Make timezone readable
@@ -40,20 +66,62 @@ def get_guide():
             "🔁 Monthly: 'Pay rent every month'\n"
             "📅 View: 'Reminders for today' or 'Plans tomorrow'\n"
             "🔄 Update: 'Change dentist to 3pm'\n"
-            "🗑️ Delete: 'Delete meeting reminder'\n\n"
+            "🗑️ Delete: 'Delete meeting reminder'\n"
+            "⏸️ Pause: 'Pause reminders' / 'Resume reminders'\n\n"
             "🕐 *OTHER*\n"
             "⏱️ Time: 'What time is it?'\n"
+            "🔕 Digest: 'Digest off' or 'Digest window 30'\n"
+            "📊 Stats: 'Stats'\n"
             f"🌍 Timezone: {tz_name}")
 
-def send_wa(to, text):
-    url = f"{os.getenv('WAHA_URL', 'http://waha:3000')}/api/sendText"
-    try:
-        requests.post(url, json={"chatId": to, "text": text, "session": "default"})
-    except Exception as e:
-        logger.error(f"❌ Send failed: {e}")
+async def send_wa(to, text):
+    with profiler.stage("send"):
+        await waha.send(to, text)
+
+digests = digest.Digester(send_wa, repo.prefs)
+
+async def fire_reminder(to, text, due_at=None):
+    """Reminder job target: sends via the recipient's digest buffer.
+
+    due_at is set on reminders replayed late by the catch-up policy.
+    """
+    if due_at:
+        text += catchup.late_note(due_at, tz)
+    await digests.fire(to, text)
+
+def migrate_reminder_jobs(scheduler):
+    """Point reminders created before digests existed at fire_reminder."""
+    moved = 0
+    for job in scheduler.get_jobs():
+        if job.id.startswith("rem_") and job.func_ref.endswith(":send_wa"):
+            job.modify(func=fire_reminder)
+            moved += 1
+    if moved:
+        logger.info(f"⏰ Migrated {moved} reminder job(s) to digest delivery")
+
+def on_reminder_event(event):
+    """Record per-reminder lateness (send completed minus scheduled time)."""
+    if not event.job_id.startswith("rem_"):
+        return
+    if event.code == EVENT_JOB_MISSED:
+        metrics.inc("reminder.missed")
+        return
+    lateness = (datetime.now(pytz.utc) - event.scheduled_run_time).total_seconds()
+    metrics.observe("reminder.lateness_seconds", lateness)
+    metrics.inc("reminder.failed" if event.code == EVENT_JOB_ERROR else "reminder.fired")
+    if lateness > REMINDER_SLO_SECONDS:
+        metrics.inc("reminder.late")
 
-async def process_adjnt(text, recipient_id):
-    logger.info(f"🔥 PROCESS_ADJNT STARTED: text='{text}', id='{recipient_id}'") # <--- ADD THIS
+async def process_adjnt(text, recipient_id, sender_id=None):
+    logger.info("🔥 PROCESS_ADJNT STARTED: text='%s', id='%s'", text, recipient_id, extra={"category": "start"})
+    # Webhooks are accepted as soon as the server is up; wait for warm-up here
+    if not await startup.report.wait_ready():
+        raise startup.NotReady(startup.report.error or "warm-up still running")
+    with profiler.trace(text_chars=len(text or "")):
+        await handle_message(text, recipient_id, sender_id)
+
+async def handle_message(text, recipient_id, sender_id=None):
+    prefetch = None
     try:
         # 🛡️ Normalize ID
         recipient_id = str(recipient_id).strip()
@@ -62,418 +130,601 @@ async def process_adjnt(text, recipient_id):
         now = datetime.now(tz)
         now_str = now.strftime("%Y-%m-%d %H:%M:%S")
         
-        analysis = await brain.decide(text, now_str)
+        # Rule-parsed messages are free; only LLM-bound ones spend rate-limit tokens
+        analysis = brain.quick_decide(text)
+        if analysis is None and not admission.admit(recipient_id, sender_id):
+            metrics.inc("throttle.dropped")
+            # One notice per chat per refill window; the rest of a flood is shed silently
+            if admission.should_notify(recipient_id):
+                quoted = text if len(text) <= 60 else text[:57] + "..."
+                await send_wa(recipient_id, f"🐢 Too many messages at once, so I'm skipping some, starting with: "
+                                            f"'{quoted}'. Please send them again in a minute.")
+            return
+        prefetch = Prefetch(recipient_id, text)
+        if analysis is None:
+            with profiler.stage("brain"):
+                analysis = await brain.decide(text, now_str)
         
         intent = analysis.get('intent', 'UNKNOWN')
         data = analysis.get('data', {})
         response_msg = ""
+        # Long listings: several size-capped messages sent in order
+        response_chunks = None
+        profiler.annotate(intent=intent, items=len(data.get('items') or []))
 
-        with Session(engine) as session:
-            if not session.get(Group, recipient_id):
-                session.add(Group(id=recipient_id, admin_id=recipient_id))
-                session.commit()
+        await prefetch.group
 
-            # --- 1. TASK (ADD) ---
-            if intent == "TASK":
-                items = data.get('items', [])
-                if not items and data.get('item'):
-                    items = [{'name': data.get('item'), 'count': data.get('count', 1), 'store': data.get('store', 'General')}]
-                
-                added_log = []
-                for item in items:
-                    name = item.get('name', '').lower().strip()
-                    count = int(item.get('count', item.get('quantity', 1)))
-                    store = item.get('store', 'General')
-
-                    # Auto-Location
-                    if store == "General":
-                        ex = session.exec(select(Task).where(Task.group_id == recipient_id, Task.description == name)).first()
-                        if ex: store = ex.store
-
-                    for _ in range(count):
-                        session.add(Task(description=name, group_id=recipient_id, store=store))
-                    added_log.append(f"{name} (x{count})")
-                
-                session.commit()
-                response_msg = f"✅ *Vaulted:* {', '.join(added_log)}."
-
-            # --- 2. LIST VAULT ---
-            elif intent == "LIST":
-                target_store = data.get('store', 'All')
-                statement = select(Task).where(Task.group_id == recipient_id)
-                if target_store.lower() != "all":
-                    statement = statement.where(Task.store.ilike(target_store))
-                
-                tasks = session.exec(statement).all()
-                if not tasks:
-                    response_msg = f"Vault is empty for *{target_store}*."
+        # --- 1. TASK (ADD) ---
+        if intent == "TASK":
+            items = data.get('items', [])
+            if not items and data.get('item'):
+                items = [{'name': data.get('item'), 'count': data.get('count', 1), 'store': data.get('store', 'General')}]
+            
+            added = await repo.add_items(recipient_id, items)
+            added_log = [f"{name} (x{count})" for _, name, count in added]
+            response_msg = f"✅ *Vaulted:* {', '.join(added_log)}."
+
+        # --- 2. LIST VAULT ---
+        elif intent == "LIST":
+            target_store = data.get('store', 'All')
+            vault = await prefetch.vault()
+            if vault.store_names(target_store):
+                response_chunks = paging.pager.start(
+                    recipient_id, paging.chunks(f"📋 *Vault ({target_store}):*", vault.iter_blocks(target_store))
+                )
+            else:
+                response_msg = vault.render(target_store)
+
+        # --- 3. LIST REMINDERS ---
+        elif intent == "LIST_REMINDERS":
+            jobs = await prefetch.reminder_jobs()
+            date_filter = data.get('date_filter')
+            
+            # Parse date filter
+            filter_date = None
+            if date_filter:
+                if date_filter == 'today':
+                    filter_date = now.date()
+                elif date_filter == 'tomorrow':
+                    filter_date = (now + timedelta(days=1)).date()
+                elif date_filter == 'this_week':
+                    # Show reminders for the rest of this week
+                    filter_date = 'week'
+                elif date_filter in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']:
+                    # Find next occurrence of this day
+                    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+                    target_idx = days.index(date_filter)
+                    current_idx = now.weekday()
+                    days_ahead = (target_idx - current_idx) % 7
+                    if days_ahead == 0:
+                        days_ahead = 7
+                    filter_date = (now + timedelta(days=days_ahead)).date()
                 else:
-                    grouped = {}
-                    for t in tasks:
-                        s_name = t.store.capitalize()
-                        if s_name not in grouped: grouped[s_name] = Counter()
-                        grouped[s_name][t.description] += 1
-                    
-                    response_msg = f"📋 *Vault ({target_store}):*"
-                    for s_name, counts in grouped.items():
-                        response_msg += f"\n\n📍 *{s_name}*\n" + "\n".join([f"- {k} (x{v})" if v>1 else f"- {k}" for k,v in counts.items()])
-
-            # --- 3. LIST REMINDERS ---
-            elif intent == "LIST_REMINDERS":
-                jobs = scheduler.get_jobs()
-                date_filter = data.get('date_filter')
-                
-                # Parse date filter
-                filter_date = None
-                if date_filter:
-                    if date_filter == 'today':
-                        filter_date = now.date()
-                    elif date_filter == 'tomorrow':
-                        filter_date = (now + timedelta(days=1)).date()
-                    elif date_filter == 'this_week':
-                        # Show reminders for the rest of this week
-                        filter_date = 'week'
-                    elif date_filter in ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']:
-                        # Find next occurrence of this day
-                        days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-                        target_idx = days.index(date_filter)
-                        current_idx = now.weekday()
-                        days_ahead = (target_idx - current_idx) % 7
-                        if days_ahead == 0:
-                            days_ahead = 7
-                        filter_date = (now + timedelta(days=days_ahead)).date()
-                    else:
-                        # Try parsing as date string (e.g., "2026-01-25")
-                        try:
-                            filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
-                        except:
-                            pass
-                
-                rem_list = []
-                for j in jobs:
-                    if j.id.startswith(f"rem_{recipient_id}"):
-                        # Convert to timezone-aware time
-                        next_run = j.next_run_time
-                        if next_run.tzinfo is None:
-                            next_run = tz.localize(next_run)
-                        else:
-                            next_run = next_run.astimezone(tz)
-                        
-                        # Apply date filter
-                        if filter_date:
-                            if filter_date == 'week':
-                                # Check if within this week
-                                week_end = now + timedelta(days=(6 - now.weekday()))
-                                if next_run.date() > week_end.date():
-                                    continue
-                            elif next_run.date() != filter_date:
-                                continue
-                        
-                        time_str = next_run.strftime("%a %b %d, %I:%M %p %Z")
-                        msg = j.args[1].replace("⏰ *REMINDER:* ", "")
-                        
-                        # Check if recurring
-                        if hasattr(j.trigger, 'interval'):
-                            rem_list.append(f"🔁 {msg} ({time_str}) - Recurring")
-                        else:
-                            rem_list.append(f"🔔 {msg} ({time_str})")
-                
-                if date_filter:
-                    filter_text = date_filter.replace('_', ' ').title()
-                    response_msg = f"🗓️ *Reminders for {filter_text}:*\n\n" + "\n".join(rem_list) if rem_list else f"No reminders for {filter_text}."
+                    # Try parsing as date string (e.g., "2026-01-25")
+                    try:
+                        filter_date = datetime.strptime(date_filter, "%Y-%m-%d").date()
+                    except:
+                        pass
+            
+            rem_list = []
+            for j in jobs:
+                # Convert to timezone-aware time
+                next_run = j.next_run_time
+                if next_run is None:
+                    # Paused: no date to filter on
+                    if not filter_date:
+                        rem_list.append(f"⏸️ {j.args[1].replace('⏰ *REMINDER:* ', '')} - Paused")
+                    continue
+                if next_run.tzinfo is None:
+                    next_run = tz.localize(next_run)
                 else:
-                    response_msg = "🗓️ *Upcoming Reminders:*\n\n" + "\n".join(rem_list) if rem_list else "No active reminders."
-
-            # --- 4. DELETE ---
-            elif intent == "DELETE":
-                mode = data.get('mode', 'SINGLE')
-                items = data.get('items', [])
-                if not items and data.get('item'):
-                    items = [{'name': data.get('item'), 'count': data.get('count', 1), 'store': data.get('store')}]
+                    next_run = next_run.astimezone(tz)
                 
-                if mode == "CLEAR_ALL":
-                    all_tasks = session.exec(select(Task).where(Task.group_id == recipient_id)).all()
-                    for t in all_tasks: session.delete(t)
-                    session.commit()
-                    response_msg = "🧹 Vault cleared."
-                elif mode == "CLEAR_STORE":
-                    # Clear specific store only
-                    store_to_clear = data.get('store', '').capitalize()
-                    store_tasks = session.exec(
-                        select(Task).where(
-                            Task.group_id == recipient_id,
-                            Task.store.ilike(store_to_clear)
-                        )
-                    ).all()
-                    for t in store_tasks: session.delete(t)
-                    session.commit()
-                    response_msg = f"🧹 Cleared all items from {store_to_clear}."
-                else:
-                    removed = []
-                    for item in items:
-                        name = item.get('name', '').lower().strip()
-                        stmt = select(Task).where(Task.group_id == recipient_id, Task.description == name)
-                        if item.get('store'): 
-                            stmt = stmt.where(Task.store.ilike(item.get('store')))
-                        
-                        tasks = session.exec(stmt.limit(int(item.get('count', 1))) if mode == 'SINGLE' else stmt).all()
-                        for t in tasks: session.delete(t)
-                        if tasks: removed.append(f"{name} (x{len(tasks)})")
-                    session.commit()
-                    response_msg = f"🗑️ Removed: {', '.join(removed)}" if removed else "❓ Not found in vault."
-
-            # --- 5. DELETE_REMINDERS ---
-            elif intent == "DELETE_REMINDERS":
-                item_to_remove = data.get('item', '').lower()
-                jobs = scheduler.get_jobs()
-                removed_count = 0
-                removed_names = []
+                # Apply date filter
+                if filter_date:
+                    if filter_date == 'week':
+                        # Check if within this week
+                        week_end = now + timedelta(days=(6 - now.weekday()))
+                        if next_run.date() > week_end.date():
+                            continue
+                    elif next_run.date() != filter_date:
+                        continue
                 
-                for job in jobs:
-                    if job.id.startswith(f"rem_{recipient_id}"):
-                        job_msg = job.args[1].replace("⏰ *REMINDER:* ", "").lower()
-                        # Match if item_to_remove is substring or no filter specified
-                        if not item_to_remove or item_to_remove in job_msg:
-                            removed_names.append(job.args[1].replace("⏰ *REMINDER:* ", ""))
-                            scheduler.remove_job(job.id)
-                            removed_count += 1
+                time_str = next_run.strftime("%a %b %d, %I:%M %p %Z")
+                msg = j.args[1].replace("⏰ *REMINDER:* ", "")
                 
-                if removed_count > 0:
-                    response_msg = f"🗑️ Deleted {removed_count} reminder(s): {', '.join(removed_names[:3])}"
+                # Check if recurring
+                if hasattr(j.trigger, 'interval'):
+                    rem_list.append(f"🔁 {msg} ({time_str}) - Recurring")
                 else:
-                    response_msg = f"❓ No reminders found matching '{item_to_remove}'"
-
-            # --- 6. REMIND ---
-            elif intent == "REMIND":
-                item = data.get('item', 'Reminder')
-                ts, mins = data.get('timestamp'), data.get('minutes')
-                recurrence = data.get('recurrence')
-                day_of_week = data.get('day_of_week')
-                interval = data.get('interval', 1)
+                    rem_list.append(f"🔔 {msg} ({time_str})")
+            
+            if date_filter:
+                filter_text = date_filter.replace('_', ' ').title()
+                title, empty = f"🗓️ *Reminders for {filter_text}:*", f"No reminders for {filter_text}."
+            else:
+                title, empty = "🗓️ *Upcoming Reminders:*", "No active reminders."
+            if rem_list:
+                response_chunks = paging.pager.start(recipient_id, paging.chunks(title + "\n", rem_list, sep="\n"))
+            else:
+                response_msg = empty
+
+        # --- 4. DELETE ---
+        elif intent == "DELETE":
+            mode = data.get('mode', 'SINGLE')
+            items = data.get('items', [])
+            if not items and data.get('item'):
+                items = [{'name': data.get('item'), 'count': data.get('count', 1), 'store': data.get('store')}]
+            
+            if mode == "CLEAR_ALL":
+                await repo.clear_vault(recipient_id)
+                response_msg = "🧹 Vault cleared."
+            elif mode == "CLEAR_STORE":
+                # Clear specific store only
+                store_to_clear = data.get('store', '').capitalize()
+                await repo.clear_store(recipient_id, store_to_clear)
+                response_msg = f"🧹 Cleared all items from {store_to_clear}."
+            else:
+                removed = await repo.delete_items(recipient_id, items, mode)
+                removed = [f"{name} (x{n})" for name, n in removed.items()]
+                response_msg = f"🗑️ Removed: {', '.join(removed)}" if removed else "❓ Not found in vault."
+
+        # --- 5. DELETE_REMINDERS ---
+        elif intent == "DELETE_REMINDERS":
+            item_to_remove = data.get('item', '').lower()
+            # Indexed, ranked lookup; no filter means every reminder
+            matches = await repo.search_reminders(recipient_id, item_to_remove)
+            # Every match goes in one job-store transaction
+            removed = set(await repo.remove_reminders(job_id for job_id, _, _ in matches))
+            removed_names = []
+            
+            for job_id, job_msg, score in matches:
+                if job_id in removed:
+                    logger.info("🔎 Reminder match '%s' score=%s", job_msg, score, extra={"category": "match"})
+                    removed_names.append(job_msg)
+            removed_count = len(removed_names)
+            
+            if removed_count > 0:
+                response_msg = f"🗑️ Deleted {removed_count} reminder(s): {', '.join(removed_names[:3])}"
+            else:
+                response_msg = f"❓ No reminders found matching '{item_to_remove}'"
+
+        # --- 6. REMIND ---
+        elif intent == "REMIND":
+            item = data.get('item', 'Reminder')
+            ts, mins = data.get('timestamp'), data.get('minutes')
+            recurrence = data.get('recurrence')
+            day_of_week = data.get('day_of_week')
+            interval = data.get('interval', 1)
+            
+            # Calculate run time in timezone
+            if ts:
+                run_time = tz.localize(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"))
+            else:
+                run_time = now + timedelta(minutes=int(mins or 5))
+            
+            # Handle recurring reminders
+            if recurrence:
+                job_id = f"rem_{recipient_id}_{item.replace(' ', '_')}_{run_time.timestamp()}"
                 
-                # Calculate run time in timezone
-                if ts:
-                    run_time = tz.localize(datetime.strptime(ts, "%Y-%m-%d %H:%M:%S"))
-                else:
-                    run_time = now + timedelta(minutes=int(mins or 5))
+                if recurrence == 'daily':
+                    await repo.add_reminder(
+                        fire_reminder,
+                        'interval',
+                        days=1,
+                        start_date=run_time,
+                        args=[recipient_id, f"⏰ *REMINDER:* {item}"],
+                        id=job_id,
+                        **catchup.RECURRING_JOB_OPTS
+                    )
+                    response_msg = f"🔁 Recurring reminder set: '{item}' daily at {run_time.strftime('%I:%M %p %Z')}."
                 
-                # Handle recurring reminders
-                if recurrence:
-                    job_id = f"rem_{recipient_id}_{item.replace(' ', '_')}_{run_time.timestamp()}"
-                    
-                    if recurrence == 'daily':
-                        scheduler.add_job(
-                            send_wa,
-                            'interval',
-                            days=1,
-                            start_date=run_time,
-                            args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                            id=job_id
-                        )
-                        response_msg = f"🔁 Recurring reminder set: '{item}' daily at {run_time.strftime('%I:%M %p %Z')}."
-                    
-                    elif recurrence == 'weekly':
-                        if day_of_week:
-                            # Specific day of week
-                            days_map = {'Monday': 'mon', 'Tuesday': 'tue', 'Wednesday': 'wed', 
-                                       'Thursday': 'thu', 'Friday': 'fri', 'Saturday': 'sat', 'Sunday': 'sun'}
-                            scheduler.add_job(
-                                send_wa,
-                                'cron',
-                                day_of_week=days_map.get(day_of_week, 'mon'),
-                                hour=run_time.hour,
-                                minute=run_time.minute,
-                                timezone=tz,  # Important: specify timezone for cron jobs
-                                args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                                id=job_id
-                            )
-                            response_msg = f"🔁 Recurring reminder set: '{item}' every {day_of_week} at {run_time.strftime('%I:%M %p %Z')}."
-                        else:
-                            # Just weekly
-                            scheduler.add_job(
-                                send_wa,
-                                'interval',
-                                weeks=1,
-                                start_date=run_time,
-                                args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                                id=job_id
-                            )
-                            response_msg = f"🔁 Recurring reminder set: '{item}' weekly starting {run_time.strftime('%a %b %d, %I:%M %p %Z')}."
-                    
-                    elif recurrence == 'weekdays':
-                        scheduler.add_job(
-                            send_wa,
+                elif recurrence == 'weekly':
+                    if day_of_week:
+                        # Specific day of week
+                        days_map = {'Monday': 'mon', 'Tuesday': 'tue', 'Wednesday': 'wed', 
+                                   'Thursday': 'thu', 'Friday': 'fri', 'Saturday': 'sat', 'Sunday': 'sun'}
+                        await repo.add_reminder(
+                            fire_reminder,
                             'cron',
-                            day_of_week='mon-fri',
+                            day_of_week=days_map.get(day_of_week, 'mon'),
                             hour=run_time.hour,
                             minute=run_time.minute,
                             timezone=tz,  # Important: specify timezone for cron jobs
                             args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                            id=job_id
+                            id=job_id,
+                            **catchup.RECURRING_JOB_OPTS
                         )
-                        response_msg = f"🔁 Recurring reminder set: '{item}' every weekday at {run_time.strftime('%I:%M %p %Z')}."
-                    
-                    elif recurrence == 'weekend':
-                        scheduler.add_job(
-                            send_wa,
-                            'cron',
-                            day_of_week='sat,sun',
-                            hour=run_time.hour,
-                            minute=run_time.minute,
-                            timezone=tz,  # Important: specify timezone for cron jobs
-                            args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                            id=job_id
-                        )
-                        response_msg = f"🔁 Recurring reminder set: '{item}' every weekend at {run_time.strftime('%I:%M %p %Z')}."
-                    
-                    elif recurrence == 'monthly':
-                        scheduler.add_job(
-                            send_wa,
-                            'interval',
-                            months=interval,
-                            start_date=run_time,
-                            args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                            id=job_id
-                        )
-                        freq_text = "monthly" if interval == 1 else f"every {interval} months"
-                        response_msg = f"🔁 Recurring reminder set: '{item}' {freq_text} starting {run_time.strftime('%a %b %d, %I:%M %p %Z')}."
-                    
-                    elif recurrence == 'yearly':
-                        scheduler.add_job(
-                            send_wa,
+                        response_msg = f"🔁 Recurring reminder set: '{item}' every {day_of_week} at {run_time.strftime('%I:%M %p %Z')}."
+                    else:
+                        # Just weekly
+                        await repo.add_reminder(
+                            fire_reminder,
                             'interval',
-                            years=1,
+                            weeks=1,
                             start_date=run_time,
                             args=[recipient_id, f"⏰ *REMINDER:* {item}"],
-                            id=job_id
+                            id=job_id,
+                            **catchup.RECURRING_JOB_OPTS
                         )
-                        response_msg = f"🔁 Recurring reminder set: '{item}' yearly on {run_time.strftime('%b %d at %I:%M %p %Z')}."
+                        response_msg = f"🔁 Recurring reminder set: '{item}' weekly starting {run_time.strftime('%a %b %d, %I:%M %p %Z')}."
                 
-                else:
-                    # One-time reminder
-                    scheduler.add_job(
-                        send_wa, 
-                        'date', 
-                        run_date=run_time, 
-                        args=[recipient_id, f"⏰ *REMINDER:* {item}"], 
-                        id=f"rem_{recipient_id}_{run_time.timestamp()}"
+                elif recurrence == 'weekdays':
+                    await repo.add_reminder(
+                        fire_reminder,
+                        'cron',
+                        day_of_week='mon-fri',
+                        hour=run_time.hour,
+                        minute=run_time.minute,
+                        timezone=tz,  # Important: specify timezone for cron jobs
+                        args=[recipient_id, f"⏰ *REMINDER:* {item}"],
+                        id=job_id,
+                        **catchup.RECURRING_JOB_OPTS
                     )
-                    
-                    # Format time nicely with timezone
-                    time_str = run_time.strftime('%a %b %d, %I:%M %p')
-                    tz_abbr = run_time.strftime('%Z')  # e.g., PST, PDT
-                    response_msg = f"🗓️ Scheduled: '{item}' for {time_str} {tz_abbr}."
-
-            # --- 7. UPDATE_REMINDER (NEW) ---
-            elif intent == "UPDATE_REMINDER":
-                item_search = data.get('item', '').lower()
-                new_timestamp = data.get('new_timestamp')
+                    response_msg = f"🔁 Recurring reminder set: '{item}' every weekday at {run_time.strftime('%I:%M %p %Z')}."
                 
-                if not new_timestamp:
-                    response_msg = "❌ No new time specified."
-                else:
-                    try:
-                        new_time = tz.localize(datetime.strptime(new_timestamp, "%Y-%m-%d %H:%M:%S"))
-                        jobs = scheduler.get_jobs()
-                        updated = False
-                        
-                        for job in jobs:
-                            if job.id.startswith(f"rem_{recipient_id}"):
-                                job_msg = job.args[1].replace("⏰ *REMINDER:* ", "")
-                                if item_search in job_msg.lower():
-                                    # Remove old job and create new one
-                                    scheduler.remove_job(job.id)
-                                    scheduler.add_job(
-                                        send_wa,
-                                        'date',
-                                        run_date=new_time,
-                                        args=[recipient_id, f"⏰ *REMINDER:* {job_msg}"],
-                                        id=f"rem_{recipient_id}_{new_time.timestamp()}"
-                                    )
-                                    time_str = new_time.strftime('%a %b %d, %I:%M %p')
-                                    tz_abbr = new_time.strftime('%Z')
-                                    response_msg = f"🔄 Updated '{job_msg}' to {time_str} {tz_abbr}."
-                                    updated = True
-                                    break
-                        
-                        if not updated:
-                            response_msg = f"❓ No reminder found matching '{item_search}'"
-                    
-                    except ValueError:
-                        response_msg = "❌ Invalid time format."
-
-            # --- 8. MOVE ---
-            elif intent == "MOVE":
-                item_name = data.get('item', '').lower()
-                f_s = data.get('from_store', 'General')
-                t_s = data.get('to_store', 'General')
-                move_all = data.get('move_all', True)  # Default to moving all
+                elif recurrence == 'weekend':
+                    await repo.add_reminder(
+                        fire_reminder,
+                        'cron',
+                        day_of_week='sat,sun',
+                        hour=run_time.hour,
+                        minute=run_time.minute,
+                        timezone=tz,  # Important: specify timezone for cron jobs
+                        args=[recipient_id, f"⏰ *REMINDER:* {item}"],
+                        id=job_id,
+                        **catchup.RECURRING_JOB_OPTS
+                    )
+                    response_msg = f"🔁 Recurring reminder set: '{item}' every weekend at {run_time.strftime('%I:%M %p %Z')}."
                 
-                tasks = session.exec(
-                    select(Task).where(
-                        Task.group_id == recipient_id, 
-                        Task.description == item_name, 
-                        Task.store.ilike(f_s)
+                elif recurrence == 'monthly':
+                    await repo.add_reminder(
+                        fire_reminder,
+                        'interval',
+                        months=interval,
+                        start_date=run_time,
+                        args=[recipient_id, f"⏰ *REMINDER:* {item}"],
+                        id=job_id,
+                        **catchup.RECURRING_JOB_OPTS
                     )
-                ).all()
+                    freq_text = "monthly" if interval == 1 else f"every {interval} months"
+                    response_msg = f"🔁 Recurring reminder set: '{item}' {freq_text} starting {run_time.strftime('%a %b %d, %I:%M %p %Z')}."
                 
-                if tasks:
-                    moved_count = len(tasks)
-                    for task in tasks:
-                        task.store = t_s
-                        session.add(task)
-                    session.commit()
-                    response_msg = f"🚚 Moved {moved_count} {item_name}(s) from {f_s} to {t_s}."
-                else:
-                    response_msg = f"❓ No {item_name} found in {f_s}."
+                elif recurrence == 'yearly':
+                    await repo.add_reminder(
+                        fire_reminder,
+                        'interval',
+                        years=1,
+                        start_date=run_time,
+                        args=[recipient_id, f"⏰ *REMINDER:* {item}"],
+                        id=job_id,
+                        **catchup.RECURRING_JOB_OPTS
+                    )
+                    response_msg = f"🔁 Recurring reminder set: '{item}' yearly on {run_time.strftime('%b %d at %I:%M %p %Z')}."
+            
+            else:
+                # One-time reminder
+                await repo.add_reminder(
+                    fire_reminder, 
+                    'date', 
+                    run_date=run_time, 
+                    args=[recipient_id, f"⏰ *REMINDER:* {item}"], 
+                    id=f"rem_{recipient_id}_{run_time.timestamp()}",
+                    **catchup.ONESHOT_JOB_OPTS
+                )
+                
+                # Format time nicely with timezone
+                time_str = run_time.strftime('%a %b %d, %I:%M %p')
+                tz_abbr = run_time.strftime('%Z')  # e.g., PST, PDT
+                response_msg = f"🗓️ Scheduled: '{item}' for {time_str} {tz_abbr}."
 
-            # --- 9. CHAT ---
-            elif intent == "CHAT": 
-                response_msg = data.get('answer', "I'm here to help! Try 'help' for commands.")
+        # --- 7. UPDATE_REMINDER (NEW) ---
+        elif intent == "UPDATE_REMINDER":
+            item_search = data.get('item', '').lower()
+            new_timestamp = data.get('new_timestamp')
             
-            # --- 10. ONBOARD ---
-            elif intent == "ONBOARD": 
-                response_msg = get_guide()
+            if not new_timestamp:
+                response_msg = "❌ No new time specified."
+            else:
+                try:
+                    new_time = tz.localize(datetime.strptime(new_timestamp, "%Y-%m-%d %H:%M:%S"))
+                    matches = await repo.search_reminders(recipient_id, item_search, limit=1)
+                    updated = False
+                    
+                    if matches:
+                        job_id, job_msg, score = matches[0]
+                        logger.info("🔎 Reminder match '%s' score=%s", job_msg, score, extra={"category": "match"})
+                        # Same job, now a one-shot at the new time
+                        if await repo.reschedule_reminders({job_id: new_time}, **catchup.ONESHOT_JOB_OPTS):
+                            time_str = new_time.strftime('%a %b %d, %I:%M %p')
+                            tz_abbr = new_time.strftime('%Z')
+                            response_msg = f"🔄 Updated '{job_msg}' to {time_str} {tz_abbr}."
+                            updated = True
+                    
+                    if not updated:
+                        response_msg = f"❓ No reminder found matching '{item_search}'"
+                
+                except ValueError:
+                    response_msg = "❌ Invalid time format."
+
+        # --- 7b. PAUSE_REMINDERS (pause / resume) ---
+        elif intent == "PAUSE_REMINDERS":
+            matches = await repo.search_reminders(recipient_id, data.get('item', '').lower())
+            job_ids = [job_id for job_id, _, _ in matches]
+            if data.get('resume'):
+                changed = await repo.resume_reminders(job_ids, now)
+                response_msg = f"▶️ Resumed {len(changed)} reminder(s)." if changed else "❓ No paused reminders found."
+            else:
+                changed = await repo.pause_reminders(job_ids)
+                response_msg = (f"⏸️ Paused {len(changed)} reminder(s). Say 'resume reminders' to turn them back on."
+                                if changed else "❓ No active reminders found.")
+
+        # --- 8. MOVE ---
+        elif intent == "MOVE":
+            item_name = data.get('item', '').lower()
+            f_s = data.get('from_store', 'General')
+            t_s = data.get('to_store', 'General')
+            move_all = data.get('move_all', True)  # Default to moving all
             
-            # --- 11. UNKNOWN ---
+            moved_count = await repo.move_items(recipient_id, item_name, f_s, t_s)
+            
+            if moved_count:
+                response_msg = f"🚚 Moved {moved_count} {item_name}(s) from {f_s} to {t_s}."
             else:
-                response_msg = "🤔 I didn't understand that. Try 'help' for guidance."
+                response_msg = f"❓ No {item_name} found in {f_s}."
+
+        # --- 8b. DIGEST (reminder batching prefs) ---
+        elif intent == "DIGEST":
+            if 'window' in data:
+                window = max(0, min(int(data['window']), digest.DIGEST_MAX_WINDOW_SECONDS))
+                await repo.set_prefs(recipient_id, digest_window=window, digest_enabled=True)
+                response_msg = f"⏰ Reminders due within {window}s of each other will arrive as one message."
+            elif data.get('enabled'):
+                await repo.set_prefs(recipient_id, digest_enabled=True)
+                response_msg = "⏰ Reminder digest is *on*: reminders due together arrive as one message."
+            else:
+                await repo.set_prefs(recipient_id, digest_enabled=False)
+                response_msg = "🔔 Reminder digest is *off*: every reminder arrives on its own."
+
+        # --- 8c. STATS (purchase history) ---
+        elif intent == "STATS":
+            response_msg = rollups.render(await repo.stats(recipient_id))
+
+        # --- 8d. MORE (next page of a long listing) ---
+        elif intent == "MORE":
+            response_chunks = paging.pager.more(recipient_id)
+            if not response_chunks:
+                response_msg = "✅ That's everything."
 
-        if response_msg: 
-            send_wa(recipient_id, response_msg)
-            logger.info(f"✅ Response sent to {recipient_id}: {response_msg}")
+        # --- 9. CHAT ---
+        elif intent == "CHAT": 
+            response_msg = data.get('answer', "I'm here to help! Try 'help' for commands.")
+        
+        # --- 10. ONBOARD ---
+        elif intent == "ONBOARD": 
+            response_msg = get_guide()
+        
+        # --- 11. UNKNOWN ---
+        else:
+            response_msg = "🤔 I didn't understand that. Try 'help' for guidance."
+
+        if response_chunks:
+            profiler.annotate(reply_chars=sum(map(len, response_chunks)), reply_messages=len(response_chunks))
+            for chunk in response_chunks:
+                await send_wa(recipient_id, chunk)
+            logger.info("✅ Response sent to %s: %d message(s)", recipient_id, len(response_chunks), extra={"category": "reply"})
+        elif response_msg: 
+            profiler.annotate(reply_chars=len(response_msg))
+            await send_wa(recipient_id, response_msg)
+            logger.info("✅ Response sent to %s: %s", recipient_id, response_msg, extra={"category": "reply"})
+        startup.report.mark_first_webhook()
     
     except Exception as e:
         logger.error(f"❌ Process Error: {e}", exc_info=True)
-        send_wa(recipient_id, "❌ Sorry, something went wrong. Please try again.")
+        # The inbox retries the message and apologizes once it gives up
+        raise
+    finally:
+        if prefetch:
+            prefetch.close()
+
+async def give_up(recipient_id):
+    """Inbox on_failed: the message could not be processed after every retry."""
+    await send_wa(recipient_id, "❌ Sorry, something went wrong. Please try again.")
+
+def init_storage():
+    with startup.report.phase("db_init"):
+        init_db()
+        for _, db in router.all_engines():
+            rollups.backfill(db)
+        reminder_index.index.init()
+        inbox.queue.init()
+
+def init_llm():
+    with startup.report.phase("llm_client"):
+        try:
+            brain.client
+        except Exception as e:
+            logger.error(f"❌ LLM client setup failed: {e}")
+
+def load_scheduler(loop):
+    """Start the scheduler paused, resolve overdue jobs, index reminders, resume."""
+    sched = build_scheduler(tz, loop)
+    sched.add_listener(on_reminder_event, EVENT_JOB_EXECUTED | EVENT_JOB_ERROR | EVENT_JOB_MISSED)
+    # Start paused so overdue reminders are resolved by the catch-up policy
+    # instead of all being released in one burst
+    sched.start(paused=True)
+    migrate_reminder_jobs(sched)
+    catchup.plan_catch_up(sched, tz)
+    reminder_index.index.rebuild(sched.get_jobs())
+    sched.add_listener(reminder_index.index.listener(sched), reminder_index.EVENTS)
+    sched.resume()
+    return sched
+
+async def warm_up():
+    """Bring up storage, LLM client and scheduler; webhooks wait until this is done."""
+    global scheduler
+    try:
+        # DB and LLM client setup are independent and mostly blocking I/O
+        await asyncio.gather(asyncio.to_thread(init_storage), asyncio.to_thread(init_llm), waha.start())
+        # Storage is up: webhooks can be queued while the scheduler loads
+        inbox.queue.ready.set()
+
+        with startup.report.phase("scheduler_load"):
+            # Job-store reads and index rebuild block; keep the loop free for webhooks
+            scheduler = await asyncio.to_thread(load_scheduler, asyncio.get_running_loop())
+            repo.bind_scheduler(scheduler)
+
+        startup.report.mark_ready()
+        spawn(inbox.queue.run(process_adjnt, on_failed=give_up, retry_on=RETRY_ERRORS))
+        spawn(waha.monitor())
+    except Exception as e:
+        inbox.queue.fail(e)
+        startup.report.mark_failed(e)
+
+def spawn(coro):
+    task = asyncio.create_task(coro)
+    background.add(task)
+    task.add_done_callback(background.discard)
+    return task
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    init_db()
-    scheduler.start()
+    # Serve immediately; heavy setup runs in the background and /ready reports it
+    spawn(warm_up())
     logger.info("🚀 Adjnt started successfully")
     yield
-    scheduler.shutdown()
+    for task in list(background):
+        task.cancel()
+    inbox.queue.stop()
+    if scheduler and scheduler.running:
+        scheduler.shutdown()
+    await waha.close()
     logger.info("🛑 Adjnt shutdown")
 
 app = FastAPI(lifespan=lifespan)
 
 @app.post("/webhook")
-async def webhook(request: Request, bg: BackgroundTasks):
-    data = await request.json()
-    payload = data.get('payload', {})
-    msg_id = payload.get('id')
-    
-    if msg_id in processed_ids: 
+async def webhook(request: Request):
+    msg, reason = ingress.parse(await request.body())
+    if msg is None:
+        return {"status": "duplicate_ignored" if reason == "duplicate" else "ignored"}
+    waha.pin(msg.chat_id, msg.session)
+    if startup.report.error:
+        ingress.forget(msg)
+        return JSONResponse({"error": "startup failed"}, status_code=503)
+
+    # Acked once the message is durably queued; the inbox dispatcher runs it.
+    # Refused (and redelivered by WAHA) while storage is not up
+    try:
+        added = await inbox.queue.append(msg, timeout=startup.READY_WAIT_SECONDS)
+    except (asyncio.TimeoutError, RuntimeError) as e:
+        metrics.inc("webhook.unavailable")
+        logger.warning(f"⚠️ Webhook refused, inbox not ready: {e or 'timed out'}")
+        ingress.forget(msg)
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    if not added:
         return {"status": "duplicate_ignored"}
-    
-    if not payload.get('fromMe') and payload.get('body'):
-        processed_ids.add(msg_id)
-        clean_id = str(payload.get('from', '')).strip()
-        bg.add_task(process_adjnt, payload.get('body'), clean_id)
-    
     return {"status": "ok"}
 
 @app.get("/health")
 async def health():
-    return {"status": "healthy", "reminders": len(scheduler.get_jobs())}
\ No newline at end of file
+    shards = await repo.run(shard_stats) if startup.report.ready.is_set() else []
+    return {"status": "healthy", "reminders": len(scheduler.get_jobs()) if scheduler else 0, "catchup": catchup.last_report, "shards": shards, "waha": waha.status()}
+
+@app.get("/ready")
+async def ready():
+    report = startup.report.snapshot()
+    if not report["ready"]:
+        return JSONResponse(report, status_code=503)
+    return report
+
+@app.get("/metrics")
+async def get_metrics():
+    snapshot = metrics.snapshot()
+    if startup.report.ready.is_set():
+        snapshot["shards"] = await repo.run(shard_stats)
+    return snapshot
+
+@app.get("/usage")
+async def get_usage():
+    return usage.tracker.stats()
+
+@app.get("/shadow")
+async def get_shadow():
+    return shadow.evaluator.stats()
+
+def require_admin(x_admin_token: str = Header(None)):
+    # Admin endpoints are open unless ADMIN_TOKEN is configured
+    if ADMIN_TOKEN and x_admin_token != ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="forbidden")
+
+@app.get("/groups/{group_id}/export", dependencies=[Depends(require_admin)])
+async def export_group(group_id: str, format: str = "ndjson"):
+    if format not in transfer.FORMATS:
+        return JSONResponse({"error": f"format must be one of {list(transfer.FORMATS)}"}, status_code=400)
+    if not startup.report.ready.is_set():
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    # Sync generator: Starlette pulls each chunk on a worker thread
+    return StreamingResponse(
+        transfer.export_stream(scheduler, group_id, format),
+        media_type=transfer.FORMATS[format],
+        headers={"Content-Disposition": f'attachment; filename="adjnt-{group_id}.{format}"'},
+    )
+
+@app.post("/admin/reminders/cleanup", dependencies=[Depends(require_admin)])
+async def cleanup_inactive(action: str = "remove", dry_run: bool = False):
+    """Remove (or pause) every reminder of groups marked inactive."""
+    if action not in ("remove", "pause"):
+        return JSONResponse({"error": "action must be 'remove' or 'pause'"}, status_code=400)
+    if not startup.report.ready.is_set():
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    groups = await repo.run(inactive_groups)
+    job_ids = await repo.run(bulk.reminder_ids, groups)
+    if dry_run:
+        return {"action": action, "groups": len(groups), "reminders": len(job_ids), "dry_run": True}
+    if action == "remove":
+        changed = await repo.remove_reminders(job_ids)
+    else:
+        changed = await repo.pause_reminders(job_ids)
+    logger.info(f"🧹 Cleanup ({action}): {len(changed)} reminder(s) of {len(groups)} inactive group(s)")
+    return {"action": action, "groups": len(groups), "reminders": len(changed)}
+
+@app.get("/groups/{group_id}/stats", dependencies=[Depends(require_admin)])
+async def group_stats(group_id: str):
+    if not startup.report.ready.is_set():
+        return JSONResponse({"error": "not ready"}, status_code=503)
+    return await repo.stats(group_id)
+
+@app.post("/groups/{group_id}/import", dependencies=[Depends(require_admin)])
+async def import_group(group_id: str, request: Request, format: str = "ndjson"):
+    if format not in transfer.FORMATS:
+        return JSONResponse({"error": f"format must be one of {list(transfer.FORMATS)}"}, status_code=400)
+    if not startup.report.ready.is_set():
+        return JSONResponse({"error": "not ready"}, status_code=503)
+
+    await repo.ensure_group(group_id)
+    counts = {"tasks": 0, "reminders": 0, "skipped": 0}
+    batch = []
+    try:
+        async for row in transfer.parse_rows(request.stream(), format):
+            if row.get("type") == "task":
+                batch.append(transfer.task_row(group_id, row))
+                if len(batch) >= transfer.IMPORT_BATCH:
+                    counts["tasks"] += await repo.import_tasks(group_id, batch)
+                    batch = []
+            elif row.get("type") == "reminder":
+                kind, kwargs = transfer.reminder_job(group_id, row)
+                opts = catchup.ONESHOT_JOB_OPTS if kind == "date" else catchup.RECURRING_JOB_OPTS
+                await repo.add_reminder(fire_reminder, kind, **kwargs, **opts)
+                counts["reminders"] += 1
+            else:
+                counts["skipped"] += 1
+        if batch:
+            counts["tasks"] += await repo.import_tasks(group_id, batch)
+    except (ValueError, KeyError, TypeError) as e:
+        # Batches already committed stay imported; report how far we got
+        logger.error(f"❌ Import into {group_id} failed: {e}")
+        return JSONResponse({"error": str(e), "imported": counts}, status_code=400)
+
+    logger.info(f"📥 Imported into {group_id}: {counts}")
+    return {"imported": counts}
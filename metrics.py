@@ -0,0 +1,141 @@
+import threading, time
+from collections import deque
+
+# In-process metrics registry, served as JSON on /metrics.
+# Counters are plain monotonically increasing numbers; histograms keep a
+# rolling window of recent observations so percentiles track current load.
+
+HISTOGRAM_WINDOW = 5000
+
+_lock = threading.Lock()
+_counters = {}
+_histograms = {}
+_gauges = {}
+_slos = {}
+
+
+class Histogram:
+    def __init__(self, name, window=HISTOGRAM_WINDOW):
+        self.name = name
+        self.values = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        with _lock:
+            self.values.append(value)
+            self.count += 1
+            self.total += value
+
+    def snapshot(self):
+        with _lock:
+            ordered = sorted(self.values)
+            count, total = self.count, self.total
+        if not ordered:
+            return {"count": count}
+
+        def pick(pct):
+            return round(ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))], 4)
+
+        return {
+            "count": count,
+            "mean": round(total / count, 4),
+            "p50": pick(50), "p95": pick(95), "p99": pick(99),
+            "max": round(ordered[-1], 4),
+        }
+
+
+class Slo:
+    """Fraction of recent observations that must stay under a threshold."""
+
+    def __init__(self, name, histogram, threshold, objective):
+        self.name = name
+        self.histogram = histogram
+        self.threshold = threshold
+        self.objective = objective
+
+    def snapshot(self):
+        with _lock:
+            values = list(self.histogram.values)
+        if not values:
+            return {"threshold": self.threshold, "objective": self.objective, "compliance": None, "breached": False}
+        good = sum(1 for v in values if v <= self.threshold)
+        compliance = good / len(values)
+        return {
+            "threshold": self.threshold,
+            "objective": self.objective,
+            "compliance": round(compliance, 4),
+            "breached": compliance < self.objective,
+        }
+
+
+def inc(name, n=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + n
+
+
+def get(name):
+    with _lock:
+        return _counters.get(name, 0)
+
+
+def histogram(name):
+    with _lock:
+        if name not in _histograms:
+            _histograms[name] = Histogram(name)
+        return _histograms[name]
+
+
+def observe(name, value):
+    histogram(name).observe(value)
+
+
+def gauge(name, fn):
+    """Register a callable that is evaluated lazily when metrics are read."""
+    with _lock:
+        _gauges[name] = fn
+
+
+def slo(name, histogram_name, threshold, objective):
+    s = Slo(name, histogram(histogram_name), threshold, objective)
+    with _lock:
+        _slos[name] = s
+    return s
+
+
+class timer:
+    """Context manager that observes elapsed seconds into a histogram."""
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.elapsed = time.perf_counter() - self.start
+        observe(self.name, self.elapsed)
+        return False
+
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        histograms = list(_histograms.values())
+        gauges = dict(_gauges)
+        slos = list(_slos.values())
+
+    gauge_values = {}
+    for name, fn in gauges.items():
+        try:
+            gauge_values[name] = fn()
+        except Exception as e:
+            gauge_values[name] = f"error: {e}"
+
+    return {
+        "counters": counters,
+        "gauges": gauge_values,
+        "histograms": {h.name: h.snapshot() for h in histograms},
+        "slos": {s.name: s.snapshot() for s in slos},
+    }
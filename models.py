@@ -25,4 +25,40 @@ class Task(SQLModel, table=True):
     due_at: Optional[datetime] = None
     
     group_id: str = Field(foreign_key="group.id")
-    group: Group = Relationship(back_populates="tasks")
\ No newline at end of file
+    group: Group = Relationship(back_populates="tasks")
+
+class ItemCatalog(SQLModel, table=True):
+    # One row per canonical item name in a group's vault history
+    group_id: str = Field(foreign_key="group.id", primary_key=True)
+    name: str = Field(primary_key=True)
+    # JSON list of spellings that resolve to this name
+    aliases: str = ""
+    last_store: str = "General"
+    updated_at: datetime = Field(default_factory=datetime.now)
+
+class GroupPrefs(SQLModel, table=True):
+    # Per-group settings; a missing row means the defaults
+    group_id: str = Field(foreign_key="group.id", primary_key=True)
+    # Combine reminders that fire close together into one message
+    digest_enabled: bool = True
+    # Seconds to wait for more reminders; None means DIGEST_WINDOW_SECONDS
+    digest_window: Optional[int] = None
+
+class ItemStats(SQLModel, table=True):
+    # Purchase-history rollup per item, kept current by every vault write
+    group_id: str = Field(foreign_key="group.id", primary_key=True)
+    name: str = Field(primary_key=True)
+    added: int = 0
+    # Units that left the list (deleted or cleared)
+    removed: int = 0
+    # Summed add-to-delete time of the removed units
+    dwell_seconds: float = 0.0
+    last_added_at: Optional[datetime] = None
+
+class StoreStats(SQLModel, table=True):
+    # Per-store rollup; `open` is how many items are on the list there now
+    group_id: str = Field(foreign_key="group.id", primary_key=True)
+    store: str = Field(primary_key=True)
+    added: int = 0
+    removed: int = 0
+    open: int = 0
@@ -0,0 +1,80 @@
+import os
+from itertools import chain, islice
+from cache import LRUCache
+
+# Long LIST / LIST_REMINDERS replies are streamed as size-capped WhatsApp
+# messages, split between stores (or reminder lines), a few per reply; the
+# rest waits behind a per-chat cursor until the user says "more".
+MESSAGE_MAX_CHARS = int(os.getenv("MESSAGE_MAX_CHARS", "3500"))
+PAGE_MESSAGES = int(os.getenv("PAGE_MESSAGES", "3"))
+PAGER_CHATS = int(os.getenv("PAGER_CHATS", "10000"))
+
+MORE_HINT = "\n\n➡️ Reply *more* for the rest."
+
+
+def _split(block, max_chars):
+    """A block as pieces of at most max_chars, cut on line boundaries."""
+    if len(block) <= max_chars:
+        yield block
+        return
+    piece = ""
+    for line in block.split("\n"):
+        while len(line) > max_chars:
+            if piece:
+                yield piece
+                piece = ""
+            yield line[:max_chars]
+            line = line[max_chars:]
+        candidate = f"{piece}\n{line}" if piece else line
+        if len(candidate) > max_chars:
+            yield piece
+            candidate = line
+        piece = candidate
+    if piece:
+        yield piece
+
+
+def chunks(header, blocks, sep="\n\n", max_chars=MESSAGE_MAX_CHARS - len(MORE_HINT)):
+    """Pack header + sep-joined blocks into messages of at most max_chars.
+
+    Blocks are consumed lazily and only split when one alone is too big.
+    """
+    buf = header
+    for block in blocks:
+        for piece in _split(block, max_chars):
+            candidate = f"{buf}{sep}{piece}" if buf else piece
+            if len(candidate) <= max_chars:
+                buf = candidate
+            else:
+                yield buf
+                buf = piece
+    if buf:
+        yield buf
+
+
+class Pager:
+    def __init__(self, max_chats=PAGER_CHATS):
+        self.cursors = LRUCache("paging.cursors", max_chats)
+
+    def start(self, chat_id, messages):
+        """First page of a new reply; replaces any unfinished one for this chat."""
+        self.cursors.pop(chat_id)
+        return self._page(chat_id, iter(messages))
+
+    def more(self, chat_id):
+        """Next page for this chat, or None if nothing is pending."""
+        cursor = self.cursors.peek(chat_id)
+        return self._page(chat_id, cursor) if cursor is not None else None
+
+    def _page(self, chat_id, cursor):
+        page = list(islice(cursor, PAGE_MESSAGES))
+        following = next(cursor, None)
+        if following is None:
+            self.cursors.pop(chat_id)
+        else:
+            self.cursors.put(chat_id, chain([following], cursor))
+            page[-1] += MORE_HINT
+        return page
+
+
+pager = Pager()
@@ -0,0 +1,47 @@
+import asyncio
+from repo import repo
+from profiler import profiler
+import intent_model
+
+# Group data a message will probably need, fetched while brain.decide is in
+# flight: group registration, the vault aggregate and the reminder list.
+REMINDER_LIST_INTENTS = {"LIST_REMINDERS"}
+
+
+class Prefetch:
+    def __init__(self, group_id, text):
+        self.group_id = group_id
+        self.group = self._spawn(repo.ensure_group(group_id))
+        self._vault = self._spawn(repo.vault(group_id))
+        # Loading jobs is the costly one: only start it early when the local
+        # model thinks a reminder listing is likely. Without a model it is
+        # loaded on demand instead
+        prediction = intent_model.predict(text)
+        likely = prediction is not None and (
+            prediction[0] in REMINDER_LIST_INTENTS or prediction[1] < intent_model.INTENT_CONFIDENCE
+        )
+        self._reminders = self._spawn(repo.reminder_jobs(group_id)) if likely else None
+
+    def _spawn(self, coro):
+        async def run():
+            with profiler.stage("prefetch"):
+                return await coro
+        return asyncio.create_task(run())
+
+    async def vault(self):
+        return await self._vault
+
+    async def reminder_jobs(self):
+        if self._reminders is None:
+            return await repo.reminder_jobs(self.group_id)
+        return await self._reminders
+
+    def close(self):
+        """Drop unused prefetches (group registration is left to finish)."""
+        for task in (self._vault, self._reminders):
+            if task is None:
+                continue
+            if task.done():
+                task.exception()   # retrieved: a failed unused prefetch is not an error
+            else:
+                task.cancel()
@@ -0,0 +1,124 @@
+import os, time, json, random, logging, cProfile
+from contextlib import contextmanager
+from contextvars import ContextVar
+import metrics
+
+logger = logging.getLogger("Adjnt.Profiler")
+
+# Slow-path profiler. Every message gets a cheap stage breakdown (brain,
+# prefetch, db, scheduler, send); it is logged for a sampled fraction of
+# messages and for any message slower than SLOW_MESSAGE_SECONDS. With
+# PROFILE_DIR set, sampled messages also run under cProfile and their stats
+# are dumped there.
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0.0"))
+SLOW_MESSAGE_SECONDS = float(os.getenv("SLOW_MESSAGE_SECONDS", "2.0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "")
+
+STAGES = ("brain", "prefetch", "db", "scheduler", "send")
+
+_trace = ContextVar("adjnt_trace", default=None)
+_stage = ContextVar("adjnt_stage", default=None)
+
+
+class Trace:
+    __slots__ = ("started", "stages", "info", "sampled", "profile")
+
+    def __init__(self, sampled):
+        self.started = time.perf_counter()
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.info = {}
+        self.sampled = sampled
+        self.profile = None
+
+    def report(self, total):
+        # Prefetch runs concurrently with the brain, so it is not part of the sum
+        other = total - sum(v for k, v in self.stages.items() if k != "prefetch")
+        return {
+            "total": round(total, 4),
+            "stages": {k: round(v, 4) for k, v in self.stages.items()},
+            "other": round(max(other, 0.0), 4),
+            **self.info,
+        }
+
+
+class Profiler:
+    def __init__(self, sample_rate=PROFILE_SAMPLE_RATE, slow_seconds=SLOW_MESSAGE_SECONDS, out_dir=PROFILE_DIR):
+        self.sample_rate = sample_rate
+        self.slow_seconds = slow_seconds
+        self.out_dir = out_dir
+        # cProfile is per-thread and exclusive: only one message at a time.
+        # It sees everything the loop runs meanwhile, so dumps are approximate.
+        self._profiling = False
+
+    @contextmanager
+    def trace(self, **info):
+        """Time one message end to end; stages inside are attributed to it."""
+        t = Trace(sampled=random.random() < self.sample_rate)
+        t.info.update(info)
+        token = _trace.set(t)
+        if t.sampled and self.out_dir and not self._profiling:
+            self._profiling = True
+            t.profile = cProfile.Profile()
+            t.profile.enable()
+        try:
+            yield t
+        finally:
+            if t.profile:
+                t.profile.disable()
+                self._profiling = False
+            _trace.reset(token)
+            self._finish(t, time.perf_counter() - t.started)
+
+    @contextmanager
+    def stage(self, name):
+        """Attribute the wall time of a block to a stage of the current message."""
+        t = _trace.get()
+        # Outside a message, or nested in another stage: counted by the outer one
+        if t is None or _stage.get() is not None:
+            yield
+            return
+        token = _stage.set(name)
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            t.stages[name] += time.perf_counter() - started
+            _stage.reset(token)
+
+    def annotate(self, **info):
+        """Attach intent, sizes etc. to the current message's report."""
+        t = _trace.get()
+        if t is not None:
+            t.info.update(info)
+
+    def _finish(self, t, total):
+        metrics.observe("message.seconds", total)
+        for name, spent in t.stages.items():
+            if spent:
+                metrics.observe(f"message.{name}_seconds", spent)
+        slow = total >= self.slow_seconds
+        if slow:
+            metrics.inc("message.slow")
+        if not (slow or t.sampled):
+            return
+        report = t.report(total)
+        if slow:
+            logger.warning(f"🐌 SLOW MESSAGE: {json.dumps(report)}")
+        else:
+            logger.info(f"🔬 SAMPLED MESSAGE: {json.dumps(report)}")
+        if t.profile:
+            self._dump(t, report)
+
+    def _dump(self, t, report):
+        try:
+            os.makedirs(self.out_dir, exist_ok=True)
+            base = os.path.join(self.out_dir, f"msg-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{id(t):x}")
+            t.profile.dump_stats(base + ".prof")
+            with open(base + ".json", "w") as f:
+                json.dump(report, f, indent=2)
+            metrics.inc("message.profiled")
+        except Exception as e:
+            logger.error(f"❌ Profile dump failed: {e}")
+
+
+profiler = Profiler()
@@ -0,0 +1,90 @@
+import os, time
+from cache import LRUCache
+import metrics
+
+# Token buckets in front of the LLM. Each chat (recipient_id) and each sender
+# inside a group chat has its own bucket; a message reaches the brain only if
+# both have a token. In a one-to-one chat the sender is the chat, so only the
+# chat bucket applies. Messages the rule parser handles never reach the LLM and
+# spend no tokens; over-limit LLM-bound messages are dropped, with at most one
+# notice per chat each time its bucket could refill.
+CHAT_RATE_PER_MIN = float(os.getenv("CHAT_RATE_PER_MIN", "20"))
+CHAT_BURST = float(os.getenv("CHAT_BURST", "10"))
+# One member of a group chat
+SENDER_RATE_PER_MIN = float(os.getenv("SENDER_RATE_PER_MIN", "10"))
+SENDER_BURST = float(os.getenv("SENDER_BURST", "5"))
+
+
+class TokenBucket:
+    def __init__(self, rate_per_sec, burst):
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return self.tokens
+
+
+class BucketSet:
+    """Buckets keyed by id; idle keys age out of a bounded LRU."""
+
+    def __init__(self, name, rate_per_min, burst, max_keys=10000):
+        self.name = name
+        self.rate = rate_per_min / 60
+        self.burst = burst
+        self.buckets = LRUCache(f"ratelimit.{name}", max_keys)
+
+    def bucket(self, key):
+        b = self.buckets.peek(key)
+        if b is None:
+            b = TokenBucket(self.rate, self.burst)
+            self.buckets.put(key, b)
+        return b
+
+
+class Admission:
+    def __init__(self):
+        self.chats = BucketSet("chat", CHAT_RATE_PER_MIN, CHAT_BURST)
+        self.senders = BucketSet("sender", SENDER_RATE_PER_MIN, SENDER_BURST)
+        # chat_id -> when the last throttle notice went out
+        self.notices = LRUCache("ratelimit.notices", 10000)
+        # Time for an empty chat bucket to refill completely
+        self.notice_window = self.chats.burst / self.chats.rate if self.chats.rate else float("inf")
+
+    def admit(self, chat_id, sender_id=None):
+        """Take a token from the chat and sender buckets; False if either is empty."""
+        chat = self.chats.bucket(chat_id)
+        # One-to-one chat: the chat bucket already is the sender's
+        sender = None if sender_id in (None, chat_id) else self.senders.bucket((chat_id, sender_id))
+        if chat.refill() < 1:
+            metrics.inc("throttle.chat")
+            return False
+        if sender and sender.refill() < 1:
+            metrics.inc("throttle.sender")
+            return False
+        chat.tokens -= 1
+        if sender:
+            sender.tokens -= 1
+        metrics.inc("throttle.admitted")
+        return True
+
+    def should_notify(self, chat_id):
+        """True for the first dropped message in a chat per refill window.
+
+        Answering every dropped message would double a flood instead of
+        shedding it, and could feed a reply loop with another bot.
+        """
+        now = time.monotonic()
+        last = self.notices.peek(chat_id)
+        if last is not None and now - last < self.notice_window:
+            metrics.inc("throttle.silent")
+            return False
+        self.notices.put(chat_id, now)
+        return True
+
+
+admission = Admission()
@@ -0,0 +1,99 @@
+"""Move each group's vault to the database that owns it under the current DB_SHARDS.
+
+Run with the service stopped, after changing DB_SHARDS (or to migrate the
+single adjnt_vault.db into shards):
+
+    DB_SHARDS=4 python rebalance.py [--dry-run]
+
+Consistent hashing keeps most groups in place when the shard count changes.
+Each group is copied in one transaction on the target and only then deleted
+from the source, so an interrupted run can simply be repeated.
+"""
+import sys
+from collections import Counter
+from sqlmodel import Session, select, delete
+from dotenv import load_dotenv
+
+load_dotenv()
+
+from database import router, init_db, existing_databases, shard_stats
+from models import Group, Task, ItemCatalog, GroupPrefs, ItemStats, StoreStats
+
+
+def engine_named(name):
+    return router.engine_named(None if name == "main" else name)
+
+
+def plan():
+    """[(group_id, source, target)] for every group stored on the wrong database."""
+    moves = []
+    for name, engine in existing_databases():
+        with Session(engine) as session:
+            group_ids = set(session.exec(select(Group.id)).all())
+            group_ids.update(session.exec(select(Task.group_id).distinct()).all())
+        for group_id in sorted(group_ids):
+            target = router.shard_for(group_id) or "main"
+            if target != name:
+                moves.append((group_id, name, target))
+    return moves
+
+
+def move(group_id, source, target):
+    with Session(engine_named(source)) as src, Session(engine_named(target)) as dst:
+        groups = src.exec(select(Group).where(Group.id == group_id)).all()
+        tasks = src.exec(select(Task).where(Task.group_id == group_id)).all()
+        catalog = src.exec(select(ItemCatalog).where(ItemCatalog.group_id == group_id)).all()
+        prefs = src.exec(select(GroupPrefs).where(GroupPrefs.group_id == group_id)).all()
+        item_stats = src.exec(select(ItemStats).where(ItemStats.group_id == group_id)).all()
+        store_stats = src.exec(select(StoreStats).where(StoreStats.group_id == group_id)).all()
+
+        # Target side first; a leftover partial copy from an earlier run is replaced
+        dst.exec(delete(StoreStats).where(StoreStats.group_id == group_id))
+        dst.exec(delete(ItemStats).where(ItemStats.group_id == group_id))
+        dst.exec(delete(GroupPrefs).where(GroupPrefs.group_id == group_id))
+        dst.exec(delete(ItemCatalog).where(ItemCatalog.group_id == group_id))
+        dst.exec(delete(Task).where(Task.group_id == group_id))
+        dst.exec(delete(Group).where(Group.id == group_id))
+        for g in groups:
+            dst.add(Group(**g.model_dump(exclude={"tasks"})))
+        for t in tasks:
+            # Task ids are per database; let the target assign new ones
+            dst.add(Task(**t.model_dump(exclude={"id", "group"})))
+        for c in catalog:
+            dst.add(ItemCatalog(**c.model_dump()))
+        for p in prefs:
+            dst.add(GroupPrefs(**p.model_dump()))
+        for r in item_stats:
+            dst.add(ItemStats(**r.model_dump()))
+        for r in store_stats:
+            dst.add(StoreStats(**r.model_dump()))
+        dst.commit()
+
+        src.exec(delete(StoreStats).where(StoreStats.group_id == group_id))
+        src.exec(delete(ItemStats).where(ItemStats.group_id == group_id))
+        src.exec(delete(GroupPrefs).where(GroupPrefs.group_id == group_id))
+        src.exec(delete(ItemCatalog).where(ItemCatalog.group_id == group_id))
+        src.exec(delete(Task).where(Task.group_id == group_id))
+        src.exec(delete(Group).where(Group.id == group_id))
+        src.commit()
+    return len(tasks)
+
+
+def main(dry_run=False):
+    init_db()
+    moves = plan()
+    print(f"🧭 {len(router.names) or 'no'} shard(s); {len(moves)} group(s) to move")
+    for (source, target), n in sorted(Counter((s, t) for _, s, t in moves).items()):
+        print(f"   {source} → {target}: {n} group(s)")
+    if dry_run:
+        return
+
+    for group_id, source, target in moves:
+        n = move(group_id, source, target)
+        print(f"📦 {group_id}: {source} → {target} ({n} task(s))")
+    for row in shard_stats():
+        print(f"✅ {row['shard']}: {row['groups']} group(s), {row['tasks']} task(s)")
+
+
+if __name__ == "__main__":
+    main(dry_run="--dry-run" in sys.argv)
@@ -0,0 +1,125 @@
+import re, logging
+from sqlalchemy import text as sql
+from apscheduler.events import EVENT_JOB_ADDED, EVENT_JOB_REMOVED, EVENT_ALL_JOBS_REMOVED
+from database import engine
+
+logger = logging.getLogger("Adjnt.ReminderIndex")
+
+REMINDER_PREFIX = "⏰ *REMINDER:* "
+# Words that carry no meaning when matching a reminder by name
+STOPWORDS = {"the", "a", "an", "on", "at", "in", "my", "for", "to", "all", "of", "reminder", "reminders"}
+# Shorter words (the "s" of "mom's") would prefix-match almost anything
+MIN_TOKEN = 2
+EVENTS = EVENT_JOB_ADDED | EVENT_JOB_REMOVED | EVENT_ALL_JOBS_REMOVED
+
+
+class ReminderIndex:
+    """Full-text index of reminder text, scoped per recipient.
+
+    Backed by an SQLite FTS5 table next to the vault. Falls back to a plain
+    table with LIKE matching when the SQLite build lacks FTS5.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.fts = True
+
+    def init(self):
+        with self.engine.begin() as conn:
+            try:
+                conn.execute(sql(
+                    "CREATE VIRTUAL TABLE IF NOT EXISTS reminder_fts "
+                    "USING fts5(text, job_id UNINDEXED, recipient_id UNINDEXED, tokenize='porter unicode61')"
+                ))
+            except Exception as e:
+                logger.warning(f"⚠️ FTS5 unavailable, using LIKE matching: {e}")
+                self.fts = False
+                conn.execute(sql("CREATE TABLE IF NOT EXISTS reminder_fts (text TEXT, job_id TEXT, recipient_id TEXT)"))
+
+    def rebuild(self, jobs):
+        """Re-index every reminder job (used at startup to repair drift)."""
+        rows = [self._row(j) for j in jobs if j.id.startswith("rem_")]
+        with self.engine.begin() as conn:
+            conn.execute(sql("DELETE FROM reminder_fts"))
+            if rows:
+                conn.execute(sql("INSERT INTO reminder_fts (text, job_id, recipient_id) VALUES (:text, :job_id, :recipient_id)"), rows)
+        logger.info(f"🔎 Reminder index rebuilt: {len(rows)} reminder(s)")
+
+    def add(self, job):
+        with self.engine.begin() as conn:
+            conn.execute(sql("DELETE FROM reminder_fts WHERE job_id = :job_id"), {"job_id": job.id})
+            conn.execute(sql("INSERT INTO reminder_fts (text, job_id, recipient_id) VALUES (:text, :job_id, :recipient_id)"), self._row(job))
+
+    def remove(self, job_id):
+        with self.engine.begin() as conn:
+            conn.execute(sql("DELETE FROM reminder_fts WHERE job_id = :job_id"), {"job_id": job_id})
+
+    def remove_many(self, job_ids):
+        if not job_ids:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(sql("DELETE FROM reminder_fts WHERE job_id = :job_id"), [{"job_id": j} for j in job_ids])
+
+    def clear(self):
+        with self.engine.begin() as conn:
+            conn.execute(sql("DELETE FROM reminder_fts"))
+
+    def all_for(self, recipient_id):
+        """Every indexed reminder for a recipient as (job_id, text, score)."""
+        with self.engine.connect() as conn:
+            rows = conn.execute(sql("SELECT job_id, text FROM reminder_fts WHERE recipient_id = :r"), {"r": recipient_id}).all()
+        return [(job_id, text, 0.0) for job_id, text in rows]
+
+    def search(self, recipient_id, query, limit=20):
+        """Ranked matches for a recipient as (job_id, text, score), best first.
+
+        Only reminders containing every query word are returned: callers delete
+        or reschedule whatever comes back, so a partial match is no match.
+        """
+        tokens = [t for t in re.findall(r"\w+", query.lower()) if len(t) >= MIN_TOKEN and t not in STOPWORDS]
+        if not tokens:
+            return []
+        return self._query(recipient_id, tokens, limit)
+
+    def _query(self, recipient_id, tokens, limit):
+        with self.engine.connect() as conn:
+            if self.fts:
+                expr = " AND ".join(f'"{t}"*' for t in tokens)
+                rows = conn.execute(sql(
+                    "SELECT job_id, text, bm25(reminder_fts) FROM reminder_fts "
+                    "WHERE reminder_fts MATCH :expr AND recipient_id = :r "
+                    "ORDER BY bm25(reminder_fts) LIMIT :limit"
+                ), {"expr": expr, "r": recipient_id, "limit": limit}).all()
+                return [(job_id, text, round(-rank, 6)) for job_id, text, rank in rows]
+
+            rows = conn.execute(sql("SELECT job_id, text FROM reminder_fts WHERE recipient_id = :r"), {"r": recipient_id}).all()
+        scored = []
+        for job_id, text in rows:
+            words = re.findall(r"\w+", text.lower())
+            if all(any(w.startswith(t) for w in words) for t in tokens):
+                scored.append((job_id, text, 1.0))
+        return scored[:limit]
+
+    def _row(self, job):
+        return {"text": job.args[1].replace(REMINDER_PREFIX, ""), "job_id": job.id, "recipient_id": job.args[0]}
+
+    def listener(self, scheduler):
+        """Scheduler event listener that keeps the index in step with the job store."""
+        def on_event(event):
+            try:
+                if event.code == EVENT_ALL_JOBS_REMOVED:
+                    self.clear()
+                elif not event.job_id.startswith("rem_"):
+                    return
+                elif event.code == EVENT_JOB_ADDED:
+                    job = scheduler.get_job(event.job_id)
+                    if job:
+                        self.add(job)
+                else:
+                    self.remove(event.job_id)
+            except Exception as e:
+                logger.error(f"❌ Reminder index update failed: {e}")
+        return on_event
+
+
+index = ReminderIndex(engine)
@@ -0,0 +1,298 @@
+import os, asyncio, weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from sqlmodel import select
+from sqlalchemy.dialects.sqlite import insert
+from apscheduler.jobstores.base import JobLookupError
+from database import engine, session_for
+from models import Task, Group, GroupPrefs
+from cache import LRUCache
+import catalog, vault_cache, reminder_index, rollups, bulk
+from profiler import profiler
+from batcher import WriteBatcher
+
+# Blocking SQLite / job-store work runs on a dedicated thread pool so a slow
+# fsync or lock wait in one chat never stalls the event loop for the others.
+DB_WORKERS = int(os.getenv("DB_WORKERS", "4"))
+
+
+class Repository:
+    """Async data access for groups, vault tasks and reminders."""
+
+    def __init__(self, engine, workers=DB_WORKERS):
+        self.engine = engine
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="adjnt-db")
+        self.scheduler = None
+        self.known_groups = LRUCache("groups", 10000)
+        self.group_prefs = LRUCache("prefs", 10000)
+        # Writes to one group are serialized; different groups run in parallel
+        self._locks = weakref.WeakValueDictionary()
+        self.batcher = WriteBatcher(self.run)
+
+    async def run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        with profiler.stage("db"):
+            return await loop.run_in_executor(self.executor, partial(fn, *args, **kwargs))
+
+    async def run_scheduler(self, fn, *args, **kwargs):
+        """Job-store work: same pool, timed as the scheduler stage."""
+        with profiler.stage("scheduler"):
+            return await self.run(fn, *args, **kwargs)
+
+    def bind_scheduler(self, scheduler):
+        self.scheduler = scheduler
+
+    def group_lock(self, group_id):
+        lock = self._locks.get(group_id)
+        if lock is None:
+            lock = self._locks[group_id] = asyncio.Lock()
+        return lock
+
+    async def write(self, group_id, fn, *args):
+        """Run fn(session, group_id, *args) in the next group commit, one at a time per group."""
+        async with self.group_lock(group_id):
+            with profiler.stage("db"):
+                return await self.batcher.submit(group_id, fn, *args)
+
+    # --- groups ---
+
+    async def ensure_group(self, group_id):
+        if self.known_groups.get(group_id) is None:
+            await self.batcher.submit(group_id, self._ensure_group)
+            self.known_groups.put(group_id, True)
+
+    def _ensure_group(self, session, group_id):
+        session.exec(insert(Group).values(id=group_id, admin_id=group_id, platform="whatsapp", is_active=True).on_conflict_do_nothing())
+
+    # --- vault ---
+
+    async def vault(self, group_id):
+        """The group's aggregated vault (from cache when warm)."""
+        vault = vault_cache.cache.lookup(group_id)
+        if vault is None:
+            version = vault_cache.cache.version(group_id)
+            vault = await self.run(self._load_vault, group_id)
+            vault_cache.cache.store(group_id, vault, version)
+        return vault
+
+    def _load_vault(self, group_id):
+        with session_for(group_id) as session:
+            return vault_cache.cache.load(session, group_id)
+
+    async def add_items(self, group_id, items):
+        """Add items (auto-locating 'General' ones). Returns [(store, name, count)]."""
+        with vault_cache.cache.writing(group_id):
+            added = await self.write(group_id, self._add_items, items)
+            vault_cache.cache.apply(group_id, added=added)
+        return added
+
+    def _add_items(self, session, group_id, items):
+        added = []
+        cat = catalog.cache.get(session, group_id)
+        for item in items:
+            raw_name = item.get('name', '')
+            name = cat.canonical(raw_name)
+            count = int(item.get('count', item.get('quantity', 1)))
+            store = item.get('store', 'General')
+
+            # Auto-Location from the catalog's store affinity
+            if store == "General":
+                store = cat.store_for(name) or store
+
+            for _ in range(count):
+                session.add(Task(description=name, group_id=group_id, store=store))
+            cat.record(name, store, alias=raw_name)
+            added.append((store, name, count))
+
+        catalog.cache.flush(session, cat)
+        rollups.added(session, group_id, added)
+        return added
+
+    async def import_tasks(self, group_id, rows):
+        """Bulk-insert prepared task rows in one transaction. Returns how many."""
+        with vault_cache.cache.writing(group_id):
+            added = await self.write(group_id, self._import_tasks, rows)
+            vault_cache.cache.apply(group_id, added=added)
+        return len(added)
+
+    def _import_tasks(self, session, group_id, rows):
+        rows = [r for r in rows if r["description"]]
+        if not rows:
+            return []
+        session.exec(insert(Task), params=rows)
+        cat = catalog.cache.get(session, group_id)
+        for r in rows:
+            cat.record(r["description"], r["store"])
+        catalog.cache.flush(session, cat)
+        added = [(r["store"], r["description"], 1) for r in rows]
+        rollups.added(session, group_id, added)
+        return added
+
+    async def clear_vault(self, group_id):
+        with vault_cache.cache.writing(group_id):
+            await self.write(group_id, self._clear_vault)
+            vault_cache.cache.reset(group_id)
+
+    def _clear_vault(self, session, group_id):
+        tasks = session.exec(select(Task).where(Task.group_id == group_id)).all()
+        rollups.removed(session, group_id, tasks)
+        for t in tasks:
+            session.delete(t)
+
+    async def clear_store(self, group_id, store):
+        with vault_cache.cache.writing(group_id):
+            cleared = await self.write(group_id, self._clear_store, store)
+            vault_cache.cache.apply(group_id, removed=cleared)
+        return cleared
+
+    def _clear_store(self, session, group_id, store):
+        store_tasks = session.exec(
+            select(Task).where(
+                Task.group_id == group_id,
+                Task.store.ilike(store)
+            )
+        ).all()
+        cleared = [(t.store, t.description, 1) for t in store_tasks]
+        rollups.removed(session, group_id, store_tasks)
+        for t in store_tasks: session.delete(t)
+        return cleared
+
+    async def delete_items(self, group_id, items, mode):
+        """Delete by name (SINGLE: up to count, ALL: every match). Returns {name: removed}."""
+        with vault_cache.cache.writing(group_id):
+            removed, deleted = await self.write(group_id, self._delete_items, items, mode)
+            vault_cache.cache.apply(group_id, removed=deleted)
+        return removed
+
+    def _delete_items(self, session, group_id, items, mode):
+        removed = {}
+        deleted = []
+        for item in items:
+            name = item.get('name', '').lower().strip()
+            stmt = select(Task).where(Task.group_id == group_id, Task.description == name)
+            if item.get('store'):
+                stmt = stmt.where(Task.store.ilike(item.get('store')))
+
+            tasks = session.exec(stmt.limit(int(item.get('count', 1))) if mode == 'SINGLE' else stmt).all()
+            rollups.removed(session, group_id, tasks)
+            for t in tasks: session.delete(t)
+            deleted.extend((t.store, t.description, 1) for t in tasks)
+            if tasks: removed[name] = removed.get(name, 0) + len(tasks)
+        return removed, deleted
+
+    async def move_items(self, group_id, name, from_store, to_store):
+        """Move every `name` in from_store to to_store. Returns how many moved."""
+        with vault_cache.cache.writing(group_id):
+            moves = await self.write(group_id, self._move_items, name, from_store, to_store)
+            if moves:
+                vault_cache.cache.apply(group_id, removed=moves, added=[(to_store, name, len(moves))])
+        return len(moves)
+
+    def _move_items(self, session, group_id, name, from_store, to_store):
+        tasks = session.exec(
+            select(Task).where(
+                Task.group_id == group_id,
+                Task.description == name,
+                Task.store.ilike(from_store)
+            )
+        ).all()
+        moves = [(task.store, task.description, 1) for task in tasks]
+        if tasks:
+            for task in tasks:
+                task.store = to_store
+                session.add(task)
+            cat = catalog.cache.get(session, group_id)
+            cat.record(name, to_store)
+            catalog.cache.flush(session, cat)
+            rollups.moved(session, group_id, moves, to_store)
+        return moves
+
+    # --- stats ---
+
+    async def stats(self, group_id):
+        """The group's vault statistics, read from the rollup tables."""
+        return await self.run(self._load_stats, group_id)
+
+    def _load_stats(self, group_id):
+        with session_for(group_id) as session:
+            return rollups.load(session, group_id)
+
+    # --- prefs ---
+
+    async def prefs(self, group_id):
+        """The group's GroupPrefs (defaults if it never changed any)."""
+        prefs = self.group_prefs.get(group_id)
+        if prefs is None:
+            prefs = await self.run(self._load_prefs, group_id)
+            self.group_prefs.put(group_id, prefs)
+        return prefs
+
+    def _load_prefs(self, group_id):
+        with session_for(group_id) as session:
+            prefs = session.get(GroupPrefs, group_id)
+            return GroupPrefs(**prefs.model_dump()) if prefs else GroupPrefs(group_id=group_id)
+
+    async def set_prefs(self, group_id, **changes):
+        prefs = await self.write(group_id, self._set_prefs, changes)
+        self.group_prefs.put(group_id, prefs)
+        return prefs
+
+    def _set_prefs(self, session, group_id, changes):
+        prefs = session.get(GroupPrefs, group_id) or GroupPrefs(group_id=group_id)
+        for k, v in changes.items():
+            setattr(prefs, k, v)
+        session.add(prefs)
+        # Detached copy for the cache; the session's row expires on commit
+        return GroupPrefs(**prefs.model_dump())
+
+    # --- reminders ---
+
+    async def reminder_jobs(self, recipient_id):
+        """The recipient's reminder jobs in run order (paused last).
+
+        Only this recipient's jobs are loaded, by id from the reminder index,
+        rather than unpickling every job in the store.
+        """
+        return await self.run_scheduler(self._reminder_jobs, recipient_id)
+
+    def _reminder_jobs(self, recipient_id):
+        jobs = []
+        for job_id, _, _ in reminder_index.index.all_for(recipient_id):
+            job = self.scheduler.get_job(job_id)
+            if job is not None:
+                jobs.append(job)
+        return sorted(jobs, key=lambda j: (j.next_run_time is None, j.next_run_time or 0))
+
+    async def add_reminder(self, *args, **kwargs):
+        return await self.run_scheduler(self.scheduler.add_job, *args, **kwargs)
+
+    async def remove_reminder(self, job_id):
+        """Remove a reminder job; False if it no longer exists."""
+        try:
+            await self.run_scheduler(self.scheduler.remove_job, job_id)
+            return True
+        except JobLookupError:
+            await self.run_scheduler(reminder_index.index.remove, job_id)
+            return False
+
+    async def remove_reminders(self, job_ids):
+        """Remove many reminder jobs in one transaction. Returns the ids that existed."""
+        return await self.run_scheduler(bulk.remove, self.scheduler, list(job_ids))
+
+    async def reschedule_reminders(self, run_times, **opts):
+        """Move jobs to new one-shot times ({job_id: datetime}) in one transaction."""
+        return await self.run_scheduler(bulk.reschedule, self.scheduler, run_times, **opts)
+
+    async def pause_reminders(self, job_ids):
+        return await self.run_scheduler(bulk.pause, self.scheduler, list(job_ids))
+
+    async def resume_reminders(self, job_ids, now):
+        return await self.run_scheduler(bulk.resume, self.scheduler, list(job_ids), now)
+
+    async def search_reminders(self, recipient_id, query, limit=20):
+        if not query:
+            return await self.run(reminder_index.index.all_for, recipient_id)
+        return await self.run(reminder_index.index.search, recipient_id, query, limit)
+
+
+repo = Repository(engine)
@@ -0,0 +1,160 @@
+import os, logging
+from collections import Counter
+from datetime import datetime
+from sqlmodel import Session, select, func
+from sqlalchemy.dialects.sqlite import insert
+from models import Task, ItemStats, StoreStats
+
+logger = logging.getLogger("Adjnt.Rollups")
+
+# Vault statistics: per-item and per-store rollups that TASK, DELETE and MOVE
+# update in the same transaction as the task rows, so reading a group's stats
+# touches only its rollup rows and never scans the task table.
+STATS_TOP_ITEMS = int(os.getenv("STATS_TOP_ITEMS", "5"))
+
+
+def _upsert(session, model, keys, rows, replace=()):
+    """Insert rows, or add their counters onto the existing ones."""
+    if not rows:
+        return
+    stmt = insert(model)
+    counters = [c for c in rows[0] if c not in keys and c not in replace]
+    set_ = {c: getattr(model, c) + getattr(stmt.excluded, c) for c in counters}
+    set_.update({c: getattr(stmt.excluded, c) for c in replace})
+    session.exec(stmt.on_conflict_do_update(index_elements=list(keys), set_=set_), params=rows)
+
+
+def added(session, group_id, entries, now=None):
+    """Count [(store, name, count)] just put on the list."""
+    now = now or datetime.now()
+    items, stores = Counter(), Counter()
+    for store, name, count in entries:
+        items[name] += count
+        stores[store] += count
+    _upsert(session, ItemStats, ("group_id", "name"), [
+        {"group_id": group_id, "name": name, "added": n, "removed": 0, "dwell_seconds": 0.0, "last_added_at": now}
+        for name, n in items.items()
+    ], replace=("last_added_at",))
+    _upsert(session, StoreStats, ("group_id", "store"), [
+        {"group_id": group_id, "store": store, "added": n, "removed": 0, "open": n}
+        for store, n in stores.items()
+    ])
+
+
+def removed(session, group_id, tasks, now=None):
+    """Count Task rows about to be deleted, with how long each sat on the list."""
+    now = now or datetime.now()
+    items, dwell, stores = Counter(), Counter(), Counter()
+    for t in tasks:
+        items[t.description] += 1
+        dwell[t.description] += max((now - t.created_at).total_seconds(), 0.0) if t.created_at else 0.0
+        stores[t.store] += 1
+    _upsert(session, ItemStats, ("group_id", "name"), [
+        {"group_id": group_id, "name": name, "added": 0, "removed": n, "dwell_seconds": dwell[name]}
+        for name, n in items.items()
+    ])
+    _upsert(session, StoreStats, ("group_id", "store"), [
+        {"group_id": group_id, "store": store, "added": 0, "removed": n, "open": -n}
+        for store, n in stores.items()
+    ])
+
+
+def moved(session, group_id, moves, to_store):
+    """Shift open counts for [(from_store, name, count)] moved to to_store."""
+    stores = Counter()
+    for store, _, count in moves:
+        stores[store] -= count
+        stores[to_store] += count
+    _upsert(session, StoreStats, ("group_id", "store"), [
+        {"group_id": group_id, "store": store, "added": 0, "removed": 0, "open": n}
+        for store, n in stores.items() if n
+    ])
+
+
+def backfill(engine):
+    """Seed the rollups of a database whose tasks predate them (one-off scan)."""
+    with Session(engine) as session:
+        if session.exec(select(StoreStats.group_id).limit(1)).first() is not None:
+            return 0
+        items = session.exec(
+            select(Task.group_id, Task.description, func.count(), func.max(Task.created_at))
+            .group_by(Task.group_id, Task.description)
+        ).all()
+        if not items:
+            return 0
+        stores = session.exec(
+            select(Task.group_id, Task.store, func.count()).group_by(Task.group_id, Task.store)
+        ).all()
+        session.exec(insert(ItemStats), params=[
+            {"group_id": g, "name": name, "added": n, "last_added_at": last} for g, name, n, last in items
+        ])
+        session.exec(insert(StoreStats), params=[
+            {"group_id": g, "store": store, "added": n, "open": n} for g, store, n in stores
+        ])
+        session.commit()
+    groups = len({g for g, *_ in items})
+    logger.info(f"📊 Stats backfilled for {groups} group(s)")
+    return groups
+
+
+def _item(row):
+    return {
+        "name": row.name,
+        "added": row.added,
+        "removed": row.removed,
+        "avg_dwell_hours": round(row.dwell_seconds / row.removed / 3600, 1) if row.removed else None,
+    }
+
+
+def load(session, group_id, top=STATS_TOP_ITEMS):
+    """A group's stats from its rollup rows."""
+    stores = session.exec(
+        select(StoreStats).where(StoreStats.group_id == group_id).order_by(StoreStats.added.desc())
+    ).all()
+    items, removed, dwell = session.exec(
+        select(func.count(), func.coalesce(func.sum(ItemStats.removed), 0), func.coalesce(func.sum(ItemStats.dwell_seconds), 0.0))
+        .where(ItemStats.group_id == group_id)
+    ).one()
+    frequent = session.exec(
+        select(ItemStats).where(ItemStats.group_id == group_id)
+        .order_by(ItemStats.added.desc(), ItemStats.name).limit(top)
+    ).all()
+    slowest = session.exec(
+        select(ItemStats).where(ItemStats.group_id == group_id, ItemStats.removed > 0)
+        .order_by((ItemStats.dwell_seconds / ItemStats.removed).desc()).limit(top)
+    ).all()
+    return {
+        "group_id": group_id,
+        "items": items,
+        "added": sum(s.added for s in stores),
+        "removed": sum(s.removed for s in stores),
+        "open": sum(s.open for s in stores),
+        "avg_dwell_hours": round(dwell / removed / 3600, 1) if removed else None,
+        "top_items": [_item(r) for r in frequent],
+        "slowest_items": [_item(r) for r in slowest],
+        "stores": [{"store": s.store, "added": s.added, "removed": s.removed, "open": s.open} for s in stores],
+    }
+
+
+def _hours(h):
+    return f"{h}h" if h < 48 else f"{round(h / 24, 1)} days"
+
+
+def render(stats):
+    """WhatsApp text for a group's stats."""
+    if not stats["added"]:
+        return "📊 No vault history yet. Add something first!"
+    lines = [
+        "📊 *VAULT STATS*",
+        f"🛒 Added: {stats['added']} · ✅ Removed: {stats['removed']} · 📋 On list: {stats['open']}",
+    ]
+    if stats["avg_dwell_hours"] is not None:
+        lines.append(f"⏱️ Avg time on list: {_hours(stats['avg_dwell_hours'])}")
+    lines.append("\n🔝 *Most added*")
+    lines += [f"- {i['name']} ×{i['added']}" for i in stats["top_items"]]
+    if stats["slowest_items"]:
+        lines.append("\n🐢 *Longest on the list*")
+        lines += [f"- {i['name']}: {_hours(i['avg_dwell_hours'])}" for i in stats["slowest_items"]]
+    lines.append("\n🏪 *Stores*")
+    lines += [f"- {s['store']}: {s['open']} open, {s['added']} added" for s in stats["stores"] if s["added"] or s["open"]]
+    return "\n".join(lines)
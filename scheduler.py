@@ -1,10 +1,23 @@
-from apscheduler.schedulers.background import BackgroundScheduler
+import os
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
 
-# This tells APScheduler to store its 'to-do list' in a local SQLite file
-jobstores = {
-    'default': SQLAlchemyJobStore(url='sqlite:///adjnt_jobs.sqlite')
-}
+# Reminders are stored next to the vault unless DATABASE_URL says otherwise
+DB_URL = os.getenv("DATABASE_URL", "sqlite:///adjnt_vault.db")
+# How late a job may start before APScheduler treats it as missed
+MISFIRE_GRACE_SECONDS = int(os.getenv("MISFIRE_GRACE_SECONDS", "300"))
 
-scheduler = BackgroundScheduler(jobstores=jobstores)
-scheduler.start()
\ No newline at end of file
+
+def build_scheduler(tz, event_loop=None):
+    """Create the reminder scheduler. Nothing is loaded until start() is called.
+
+    Jobs run on the app's event loop; send_wa is a coroutine so a reminder wave
+    fans out concurrently through the shared WAHA connection pool. Pass the
+    loop explicitly to start the scheduler from a worker thread.
+    """
+    return AsyncIOScheduler(
+        jobstores={'default': SQLAlchemyJobStore(url=DB_URL)},
+        job_defaults={'misfire_grace_time': MISFIRE_GRACE_SECONDS, 'coalesce': True},
+        timezone=tz,
+        event_loop=event_loop,
+    )
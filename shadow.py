@@ -0,0 +1,180 @@
+import os, json, time, copy, random, asyncio, logging, threading, contextvars
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+logger = logging.getLogger("Adjnt.Shadow")
+
+# Shadow evaluation: a sampled fraction of messages that went through the LLM
+# is parsed again, in the background, by a candidate model / prompt / wire
+# format. Its intent and data are diffed against the primary parse and the
+# agreement and latency of both are aggregated for /shadow. The reply never
+# waits for, or uses, the candidate.
+SHADOW_RATE = float(os.getenv("SHADOW_RATE", "0.0"))
+SHADOW_MODEL = os.getenv("SHADOW_MODEL", "")                # default: the primary model
+SHADOW_WIRE_FORMAT = os.getenv("SHADOW_WIRE_FORMAT", "")    # default: the primary format
+# Candidate system prompt; "{current_now}" is filled in. Default: the primary prompt
+SHADOW_PROMPT_FILE = os.getenv("SHADOW_PROMPT_FILE", "")
+# Samples beyond this many in flight are skipped rather than queued
+SHADOW_MAX_INFLIGHT = int(os.getenv("SHADOW_MAX_INFLIGHT", "4"))
+SHADOW_WINDOW = int(os.getenv("SHADOW_WINDOW", "1000"))
+# JSONL of every comparison, message text included, for offline review
+SHADOW_LOG = os.getenv("SHADOW_LOG", "")
+
+# Free text the two parses are not expected to agree on
+IGNORED_FIELDS = {"answer"}
+
+
+def _norm(key, value):
+    if key == "items" and isinstance(value, list):
+        return sorted(json.dumps(i, sort_keys=True) for i in value)
+    if isinstance(value, str):
+        return value.strip().lower()
+    return value
+
+
+def diff(primary, candidate):
+    """Data fields on which two parses disagree (items compared as a multiset)."""
+    keys = (set(primary) | set(candidate)) - IGNORED_FIELDS
+    return sorted(k for k in keys if _norm(k, primary.get(k)) != _norm(k, candidate.get(k)))
+
+
+def _dist(values):
+    values = sorted(values)
+    if not values:
+        return None
+    return {
+        "p50": round(values[len(values) // 2], 4),
+        "p95": round(values[min(len(values) - 1, int(len(values) * 0.95))], 4),
+        "avg": round(sum(values) / len(values), 4),
+    }
+
+
+class ShadowEvaluator:
+    def __init__(self, rate=SHADOW_RATE, model=SHADOW_MODEL, wire_format=SHADOW_WIRE_FORMAT,
+                 prompt_file=SHADOW_PROMPT_FILE, window=SHADOW_WINDOW):
+        self.rate = rate
+        self.model = model
+        self.wire_format = wire_format
+        self.prompt = None
+        if prompt_file:
+            with open(prompt_file) as fh:
+                self.prompt = fh.read()
+        self.records = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.candidate = None
+        self.tasks = set()
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adjnt-shadow") if SHADOW_LOG else None
+
+    def observe(self, primary_brain, text, current_now, result, primary_seconds, primary_model):
+        """Maybe shadow this message; returns at once."""
+        if self.rate <= 0 or random.random() >= self.rate:
+            return
+        if len(self.tasks) >= SHADOW_MAX_INFLIGHT:
+            metrics.inc("shadow.skipped")
+            return
+        primary = (copy.deepcopy(result), primary_seconds, primary_model)
+        # Fresh context: none of the candidate's time is charged to the message
+        task = contextvars.Context().run(
+            asyncio.create_task, self._run(primary_brain, text, current_now, primary)
+        )
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def _candidate_for(self, primary_brain):
+        if self.candidate is None:
+            candidate = type(primary_brain)()
+            candidate.model = self.model or primary_brain.model
+            candidate.wire_format = self.wire_format or primary_brain.wire_format
+            # Its spend shows up in /usage apart from the primary's
+            candidate.usage_label = "shadow:"
+            candidate._client = primary_brain.client
+            self.candidate = candidate
+        return self.candidate
+
+    async def _run(self, primary_brain, text, current_now, primary):
+        result, primary_seconds, primary_model = primary
+        candidate = self._candidate_for(primary_brain)
+        if self.prompt:
+            system_prompt = self.prompt.replace("{current_now}", current_now)
+        else:
+            system_prompt = candidate.system_prompt(current_now)
+        started = time.perf_counter()
+        try:
+            shadow = await candidate._complete(candidate._wire(system_prompt), text, current_now, candidate.model)
+        except Exception as e:
+            logger.error(f"❌ Shadow call failed: {e}")
+            shadow = {"intent": "UNKNOWN", "data": {}}
+        candidate_seconds = time.perf_counter() - started
+        self.record(text, result, shadow, primary_seconds, candidate_seconds, primary_model, candidate.model)
+
+    def record(self, text, primary, candidate, primary_seconds, candidate_seconds, primary_model, candidate_model):
+        intent_agree = primary.get("intent") == candidate.get("intent")
+        fields = diff(primary.get("data") or {}, candidate.get("data") or {}) if intent_agree else None
+        rec = {
+            "ts": time.time(),
+            "primary_model": primary_model,
+            "candidate_model": candidate_model,
+            "primary_intent": primary.get("intent"),
+            "candidate_intent": candidate.get("intent"),
+            "intent_agree": intent_agree,
+            "data_agree": intent_agree and not fields,
+            "fields": fields,
+            "primary_seconds": round(primary_seconds, 4),
+            "candidate_seconds": round(candidate_seconds, 4),
+        }
+        with self.lock:
+            self.records.append(rec)
+        metrics.inc("shadow.calls")
+        metrics.inc("shadow.intent_agree" if intent_agree else "shadow.intent_disagree")
+        if rec["data_agree"]:
+            metrics.inc("shadow.data_agree")
+        metrics.observe("shadow.primary_seconds", primary_seconds)
+        metrics.observe("shadow.candidate_seconds", candidate_seconds)
+        if not rec["data_agree"]:
+            logger.info("🕵️ Shadow disagreement: %s", rec, extra={"category": "shadow"})
+        if self._writer:
+            self._writer.submit(self._write, {**rec, "text": text, "primary": primary, "candidate": candidate})
+        return rec
+
+    def _write(self, rec):
+        try:
+            with open(SHADOW_LOG, "a") as fh:
+                fh.write(json.dumps(rec, default=str) + "\n")
+        except OSError as e:
+            logger.error(f"❌ Shadow log write failed: {e}")
+
+    def stats(self):
+        """Agreement and latency over the recent window."""
+        with self.lock:
+            records = list(self.records)
+        n = len(records)
+        by_intent = {}
+        for r in records:
+            s = by_intent.setdefault(r["primary_intent"], {"calls": 0, "intent_agree": 0, "data_agree": 0})
+            s["calls"] += 1
+            s["intent_agree"] += r["intent_agree"]
+            s["data_agree"] += r["data_agree"]
+        confusion = Counter((r["primary_intent"], r["candidate_intent"]) for r in records if not r["intent_agree"])
+        fields = Counter(f for r in records for f in (r["fields"] or ()))
+        return {
+            "rate": self.rate,
+            "candidate": {
+                "model": self.candidate.model if self.candidate else (self.model or None),
+                "wire_format": self.candidate.wire_format if self.candidate else (self.wire_format or None),
+                "custom_prompt": self.prompt is not None,
+            },
+            "window": n,
+            "intent_agreement": round(sum(r["intent_agree"] for r in records) / n, 4) if n else None,
+            "data_agreement": round(sum(r["data_agree"] for r in records) / n, 4) if n else None,
+            "by_intent": by_intent,
+            "confusion": [{"primary": p, "candidate": c, "count": k} for (p, c), k in confusion.most_common(10)],
+            "field_disagreements": dict(fields.most_common()),
+            "latency": {
+                "primary": _dist([r["primary_seconds"] for r in records]),
+                "candidate": _dist([r["candidate_seconds"] for r in records]),
+            },
+        }
+
+
+evaluator = ShadowEvaluator()
@@ -0,0 +1,84 @@
+import os, time, asyncio, logging
+from contextlib import contextmanager
+import metrics
+
+logger = logging.getLogger("Adjnt.Startup")
+
+# Target for process start to the first served webhook
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "5"))
+# How long a webhook or queued message waits for warm-up before giving up
+READY_WAIT_SECONDS = float(os.getenv("READY_WAIT_SECONDS", "10"))
+
+
+class NotReady(RuntimeError):
+    """Warm-up failed or had not finished in time."""
+
+
+class StartupReport:
+    """Timing breakdown of a cold start: import, DB init, scheduler load, LLM client."""
+
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.phases = {}
+        self.ready = asyncio.Event()
+        self.done = asyncio.Event()   # set on ready and on failure
+        self.ready_after = None
+        self.first_webhook_after = None
+        self.error = None
+
+    def record_import(self, started):
+        self.t0 = started
+        self.phases["import"] = round(time.perf_counter() - started, 4)
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = round(time.perf_counter() - start, 4)
+
+    def mark_ready(self):
+        self.ready_after = round(time.perf_counter() - self.t0, 4)
+        self.ready.set()
+        self.done.set()
+        metrics.observe("startup.ready_seconds", self.ready_after)
+        logger.info(f"⏱️ Startup ready in {self.ready_after}s: {self.phases}")
+
+    def mark_failed(self, error):
+        self.error = str(error)
+        self.done.set()
+        metrics.inc("startup.failed")
+        logger.error(f"❌ Startup failed after {self.phases}: {error}", exc_info=error)
+
+    async def wait_ready(self, timeout=READY_WAIT_SECONDS):
+        """True once warm-up is done; False if it failed or is still running after timeout."""
+        if not self.done.is_set():
+            try:
+                await asyncio.wait_for(self.done.wait(), timeout)
+            except asyncio.TimeoutError:
+                return False
+        return self.ready.is_set()
+
+    def mark_first_webhook(self):
+        if self.first_webhook_after is not None:
+            return
+        self.first_webhook_after = round(time.perf_counter() - self.t0, 4)
+        metrics.observe("startup.first_webhook_seconds", self.first_webhook_after)
+        if self.first_webhook_after > STARTUP_BUDGET_SECONDS:
+            logger.warning(f"🐢 First webhook served after {self.first_webhook_after}s (budget {STARTUP_BUDGET_SECONDS}s)")
+        else:
+            logger.info(f"⏱️ First webhook served after {self.first_webhook_after}s")
+
+    def snapshot(self):
+        return {
+            "ready": self.ready.is_set(),
+            "phases": self.phases,
+            "ready_after": self.ready_after,
+            "first_webhook_after": self.first_webhook_after,
+            "budget": STARTUP_BUDGET_SECONDS,
+            "error": self.error,
+        }
+
+
+report = StartupReport()
@@ -9,6 +9,8 @@ This script lets you test your intent classification without WhatsApp.
 import asyncio
 import json
 from datetime import datetime
+from dotenv import load_dotenv
+load_dotenv()
 from brain import AdjntBrain
 from colorama import init, Fore, Style
 
@@ -0,0 +1,72 @@
+import asyncio
+from types import SimpleNamespace
+import pytest
+from sqlalchemy.pool import StaticPool
+from sqlmodel import SQLModel, Session, create_engine, select
+from models import Group, Task
+import batcher
+
+
+@pytest.fixture
+def engine(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Group(id="g1", admin_id="g1"))
+        session.commit()
+    monkeypatch.setattr(batcher, "router", SimpleNamespace(shard_for=lambda group_id: None,
+                                                           engine_named=lambda shard: engine))
+    return engine
+
+
+@pytest.fixture
+def writes():
+    async def run(fn, *args):
+        return await asyncio.to_thread(fn, *args)
+
+    w = batcher.WriteBatcher(run, window_ms=20, max_batch=64)
+    commits = []
+    apply = w._apply
+    w._apply = lambda shard, batch: commits.append(len(batch)) or apply(shard, batch)
+    w.commits = commits
+    return w
+
+
+def add_task(session, group_id, description):
+    if description == "bad":
+        raise ValueError("rejected")
+    session.add(Task(group_id=group_id, description=description))
+    return description
+
+
+def descriptions(engine):
+    with Session(engine) as session:
+        return sorted(session.exec(select(Task.description)).all())
+
+
+@pytest.mark.asyncio
+async def test_concurrent_writes_share_one_commit(engine, writes):
+    results = await asyncio.gather(*(writes.submit("g1", add_task, f"item {i}") for i in range(5)))
+    assert results == [f"item {i}" for i in range(5)]
+    assert writes.commits == [5]
+    assert descriptions(engine) == [f"item {i}" for i in range(5)]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_capped_at_max_batch(engine, writes):
+    writes.max_batch = 2
+    await asyncio.gather(*(writes.submit("g1", add_task, f"item {i}") for i in range(5)))
+    assert writes.commits == [2, 2, 1]
+
+
+@pytest.mark.asyncio
+async def test_bad_write_fails_only_its_own_caller(engine, writes):
+    results = await asyncio.gather(
+        writes.submit("g1", add_task, "milk"),
+        writes.submit("g1", add_task, "bad"),
+        writes.submit("g1", add_task, "egg"),
+        return_exceptions=True,
+    )
+    assert results[0] == "milk" and results[2] == "egg"
+    assert isinstance(results[1], ValueError)
+    assert descriptions(engine) == ["egg", "milk"]
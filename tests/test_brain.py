@@ -0,0 +1,70 @@
+import json
+from types import SimpleNamespace
+import pytest
+import brain, usage
+
+NOW = "2026-01-01 09:00:00"
+
+
+class FakeCompletions:
+    """Replays canned (content, finish_reason, completion_tokens) replies."""
+
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.max_tokens = []
+
+    def create(self, **kwargs):
+        self.max_tokens.append(kwargs["max_tokens"])
+        content, finish_reason, completion_tokens = self.replies.pop(0)
+        return SimpleNamespace(
+            model="fake-model",
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)],
+            usage=SimpleNamespace(prompt_tokens=100, completion_tokens=completion_tokens, queue_time=None),
+        )
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = usage.UsageTracker(sink="")
+    monkeypatch.setattr(usage, "tracker", tracker)
+    return tracker
+
+
+def brain_with(replies):
+    b = brain.AdjntBrain()
+    b.wire_format = "verbose"
+    completions = FakeCompletions(replies)
+    b._client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    return b, completions
+
+
+LIST = json.dumps({"intent": "LIST", "data": {"store": "All"}})
+
+
+@pytest.mark.asyncio
+async def test_truncated_reply_is_retried_and_recorded_once(tracker):
+    b, completions = brain_with([('{"intent": "TA', "length", 256), (LIST, "stop", 300)])
+    result = await b._complete("prompt", "what's in the vault", NOW, b.model, 256)
+
+    assert result["intent"] == "LIST"
+    assert completions.max_tokens == [256, brain.LLM_MAX_TOKENS_RETRY]
+    [rec] = tracker.records
+    assert (rec["intent"], rec["retried"], rec["error"]) == ("LIST", True, None)
+    assert (rec["prompt_tokens"], rec["completion_tokens"], rec["queue_seconds"]) == (200, 556, None)
+
+
+@pytest.mark.asyncio
+async def test_complete_reply_is_one_plain_record(tracker):
+    b, completions = brain_with([(LIST, "stop", 20)])
+    assert (await b._complete("prompt", "list", NOW, b.model, 256))["intent"] == "LIST"
+    [rec] = tracker.records
+    assert (rec["retried"], rec["completion_tokens"]) == (False, 20)
+    assert tracker.stats()["by_intent"]["LIST"]["calls"] == 1
+
+
+@pytest.mark.asyncio
+async def test_unparseable_reply_is_unknown(tracker):
+    b, _ = brain_with([("not json", "stop", 5)])
+    assert (await b._complete("prompt", "hm", NOW, b.model, 256))["intent"] == "UNKNOWN"
+    [rec] = tracker.records
+    assert (rec["intent"], rec["parse_failed"], rec["error"]) == ("UNKNOWN", True, "JSONDecodeError")
@@ -0,0 +1,89 @@
+from datetime import datetime, timedelta
+import pytest
+import pytz
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from apscheduler.schedulers.background import BackgroundScheduler
+from apscheduler.jobstores.sqlalchemy import SQLAlchemyJobStore
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+import bulk
+from reminder_index import ReminderIndex
+
+NOW = pytz.utc.localize(datetime(2026, 1, 1, 9, 0))
+
+
+def fire(to, text, due_at=None):
+    """Stands in for main.fire_reminder; never runs (the scheduler stays paused)."""
+
+
+@pytest.fixture
+def store():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    return SQLAlchemyJobStore(engine=engine)
+
+
+@pytest.fixture(params=["raw", "each"])
+def scheduler(request, store, monkeypatch):
+    if request.param == "each":
+        # As if the job store internals were not the known layout
+        monkeypatch.setattr(bulk, "_raw_store", lambda scheduler: None)
+    index = ReminderIndex(store.engine)
+    index.init()
+    monkeypatch.setattr(bulk.reminder_index, "index", index)
+
+    scheduler = BackgroundScheduler(jobstores={"default": store}, timezone=pytz.utc)
+    # Paused: jobs are stored but nothing fires during the test
+    scheduler.start(paused=True)
+    scheduler.add_job(fire, "date", run_date=NOW + timedelta(hours=1), args=["g1", "once"], id="rem_once")
+    scheduler.add_job(fire, IntervalTrigger(hours=24, start_date=NOW), args=["g1", "daily"], id="rem_daily")
+    scheduler.add_job(fire, "date", run_date=NOW + timedelta(hours=2), args=["g2", "late"], id="rem_late",
+                      kwargs={"due_at": NOW.isoformat()})
+    index.rebuild(scheduler.get_jobs())
+    yield scheduler
+    scheduler.shutdown(wait=False)
+
+
+def test_raw_path_recognizes_the_installed_job_store(store):
+    scheduler = BackgroundScheduler(jobstores={"default": store})
+    # An APScheduler upgrade that moves these internals fails here, not in production
+    assert bulk._raw_store(scheduler) is store
+
+
+def test_remove_returns_only_jobs_that_existed(scheduler):
+    assert sorted(bulk.remove(scheduler, ["rem_once", "rem_daily", "rem_gone"])) == ["rem_daily", "rem_once"]
+    assert [j.id for j in scheduler.get_jobs()] == ["rem_late"]
+    assert bulk.reminder_ids(["g1"]) == []
+    assert bulk.reminder_ids(["g2"]) == ["rem_late"]
+
+
+def test_pause_and_resume(scheduler):
+    assert sorted(bulk.pause(scheduler, ["rem_once", "rem_daily", "rem_gone"])) == ["rem_daily", "rem_once"]
+    assert scheduler.get_job("rem_once").next_run_time is None
+    assert scheduler.get_job("rem_daily").next_run_time is None
+    # Already paused: nothing to do
+    assert bulk.pause(scheduler, ["rem_once"]) == []
+
+    later = NOW + timedelta(hours=30)
+    assert sorted(bulk.resume(scheduler, ["rem_once", "rem_daily", "rem_late"], later)) == ["rem_daily", "rem_once"]
+    # A one-shot whose time passed while paused fires right away
+    assert scheduler.get_job("rem_once").next_run_time == later
+    assert scheduler.get_job("rem_daily").next_run_time == NOW + timedelta(hours=48)
+    # Untouched jobs keep their state
+    assert scheduler.get_job("rem_late").next_run_time == NOW + timedelta(hours=2)
+
+
+def test_reschedule_turns_jobs_into_one_shots(scheduler):
+    new_time = NOW + timedelta(days=3)
+    updated = bulk.reschedule(scheduler, {"rem_daily": new_time, "rem_late": new_time, "rem_gone": new_time},
+                              misfire_grace_time=None)
+    assert sorted(updated) == ["rem_daily", "rem_late"]
+    for job_id in updated:
+        job = scheduler.get_job(job_id)
+        assert isinstance(job.trigger, DateTrigger) and job.trigger.run_date == new_time
+        assert job.next_run_time == new_time
+        assert job.misfire_grace_time is None
+        assert "due_at" not in job.kwargs
+        assert job.args[0] in ("g1", "g2")
+    # Job order in the store follows the new run times
+    assert [j.id for j in scheduler.get_jobs()] == ["rem_once", "rem_daily", "rem_late"]
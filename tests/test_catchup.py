@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+import pytest
+import pytz
+from apscheduler.job import Job
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+import catchup
+
+tz = pytz.utc
+
+
+def fire(to, text, due_at=None):
+    pass
+
+
+class StubScheduler:
+    """The slice of the scheduler API plan_catch_up uses, over real Job objects."""
+
+    timezone = tz
+
+    def __init__(self):
+        self.jobs = {}
+
+    def add_job(self, func, trigger, args=(), kwargs=None, id=None, replace_existing=False,
+                next_run_time=None, misfire_grace_time=1, coalesce=False):
+        assert replace_existing or id not in self.jobs
+        self.jobs[id] = Job(
+            self, id=id, func=func, trigger=trigger, executor="default", args=args, kwargs=kwargs or {},
+            name=id, misfire_grace_time=misfire_grace_time, coalesce=coalesce, max_instances=1,
+            next_run_time=next_run_time or trigger.get_next_fire_time(None, datetime.now(tz)),
+        )
+        return self.jobs[id]
+
+    def get_jobs(self):
+        return sorted(self.jobs.values(), key=lambda j: j.next_run_time)
+
+    def modify_job(self, job_id, jobstore=None, **changes):
+        self.jobs[job_id]._modify(**changes)
+
+    def remove_job(self, job_id, jobstore=None):
+        del self.jobs[job_id]
+
+
+@pytest.fixture
+def scheduler(monkeypatch):
+    monkeypatch.setattr(catchup, "CATCHUP_POLICY", "replay")
+    monkeypatch.setattr(catchup, "CATCHUP_RATE", 2.0)
+    return StubScheduler()
+
+
+def oneshot(scheduler, job_id, due, **opts):
+    return scheduler.add_job(fire, DateTrigger(due), args=("g1", f"⏰ *REMINDER:* {job_id}"), id=job_id,
+                             **{**catchup.ONESHOT_JOB_OPTS, **opts})
+
+
+def test_overdue_oneshot_is_rescheduled_not_removed(scheduler):
+    due = datetime.now(tz) - timedelta(minutes=10)
+    oneshot(scheduler, "rem_a", due)
+
+    assert catchup.plan_catch_up(scheduler, tz) == 1
+    job = scheduler.jobs["rem_a"]
+    assert job.next_run_time >= datetime.now(tz) - timedelta(seconds=1)
+    assert isinstance(job.trigger, DateTrigger)
+    assert job.kwargs["due_at"] == due
+    assert catchup.last_report == {"overdue": 1, "replayed": 1, "coalesced": 0, "dropped": 0}
+
+
+def test_replays_are_paced_oldest_first(scheduler):
+    now = datetime.now(tz)
+    for i, minutes in enumerate((5, 30, 15)):
+        oneshot(scheduler, f"rem_{i}", now - timedelta(minutes=minutes))
+
+    catchup.plan_catch_up(scheduler, tz)
+    order = sorted(scheduler.jobs.values(), key=lambda j: j.next_run_time)
+    assert [j.id for j in order] == ["rem_1", "rem_2", "rem_0"]
+    gaps = [(b.next_run_time - a.next_run_time).total_seconds() for a, b in zip(order, order[1:])]
+    assert gaps == [0.5, 0.5]
+
+
+def test_oneshot_past_grace_is_dropped(scheduler):
+    oneshot(scheduler, "rem_old", datetime.now(tz) - timedelta(hours=2), misfire_grace_time=60)
+
+    assert catchup.plan_catch_up(scheduler, tz) == 0
+    assert scheduler.jobs == {}
+    assert catchup.last_report["dropped"] == 1
+
+
+def test_recurring_moves_on_and_replays_once(scheduler):
+    now = datetime.now(tz)
+    trigger = IntervalTrigger(minutes=1, start_date=now - timedelta(minutes=5, seconds=30))
+    scheduler.add_job(fire, trigger, args=("g1", "⏰ *REMINDER:* standup"), id="rem_standup",
+                      next_run_time=now - timedelta(minutes=5, seconds=30), **catchup.RECURRING_JOB_OPTS)
+
+    assert catchup.plan_catch_up(scheduler, tz) == 1
+    assert scheduler.jobs["rem_standup"].next_run_time > now
+    replay = scheduler.jobs["rem_standup_catchup"]
+    assert isinstance(replay.trigger, DateTrigger)
+    assert replay.args == ("g1", "⏰ *REMINDER:* standup")
+    assert replay.kwargs["due_at"] == now - timedelta(minutes=5, seconds=30)
+    assert catchup.last_report["coalesced"] == 5
+
+
+def test_drop_policy_replays_nothing(scheduler, monkeypatch):
+    monkeypatch.setattr(catchup, "CATCHUP_POLICY", "drop")
+    oneshot(scheduler, "rem_a", datetime.now(tz) - timedelta(minutes=1))
+
+    assert catchup.plan_catch_up(scheduler, tz) == 0
+    assert "rem_a" not in scheduler.jobs
+
+
+def test_grace_counts_from_the_original_due_time(scheduler):
+    # Replayed by an earlier catch-up, then the process was down again
+    now = datetime.now(tz)
+    oneshot(scheduler, "rem_a", now - timedelta(minutes=1), kwargs={"due_at": now - timedelta(hours=7)})
+
+    assert catchup.plan_catch_up(scheduler, tz) == 0
+    assert "rem_a" not in scheduler.jobs
+
+
+def test_future_and_foreign_jobs_are_untouched(scheduler):
+    now = datetime.now(tz)
+    future = oneshot(scheduler, "rem_future", now + timedelta(hours=1))
+    scheduler.add_job(fire, DateTrigger(now - timedelta(minutes=1)), args=("x", "y"), id="maintenance")
+
+    assert catchup.plan_catch_up(scheduler, tz) == 0
+    assert scheduler.jobs["rem_future"].next_run_time == future.next_run_time
+    assert "maintenance" in scheduler.jobs
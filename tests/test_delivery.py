@@ -0,0 +1,77 @@
+import httpx
+import pytest
+import delivery
+from delivery import WahaClient, parse_sessions
+
+
+def test_parse_sessions():
+    assert parse_sessions("a@http://w1:3000, b@http://w2:3000", "http://waha:3000") == [
+        ("a", "http://w1:3000"), ("b", "http://w2:3000"),
+    ]
+    assert parse_sessions("solo", "http://waha:3000") == [("solo", "http://waha:3000")]
+    assert parse_sessions("", "http://waha:3000") == [("default", "http://waha:3000")]
+
+
+def test_route_is_stable_and_pin_comes_first():
+    client = WahaClient([("a", "http://a"), ("b", "http://b"), ("c", "http://c")])
+    order = [s.name for s in client.route("chat1")]
+    assert sorted(order) == ["a", "b", "c"]
+    assert [s.name for s in WahaClient([("a", "http://a"), ("b", "http://b"), ("c", "http://c")]).route("chat1")] == order
+
+    client.pin("chat1", order[-1])
+    assert [s.name for s in client.route("chat1")][0] == order[-1]
+    client.pin("chat1", "unknown")
+    assert [s.name for s in client.route("chat1")][0] == order[-1]
+
+
+def client_with(first):
+    """Two sessions; the chat's preferred one answers with `first`, the other succeeds."""
+    hits = []
+
+    def handler(request):
+        host = request.url.host
+        hits.append(host)
+        outcome = first if host == "a" else "ok"
+        if outcome == "connect":
+            raise httpx.ConnectError("refused")
+        if outcome == "read":
+            raise httpx.ReadTimeout("slow")
+        return httpx.Response({"ok": 200}.get(outcome) or int(outcome), json={})
+
+    client = WahaClient([("a", "http://a"), ("b", "http://b")])
+    for url in ("http://a", "http://b"):
+        client._clients[url] = httpx.AsyncClient(base_url=url, transport=httpx.MockTransport(handler))
+    chat = next(f"c{i}" for i in range(100) if client.route(f"c{i}")[0].name == "a")
+    return client, chat, hits
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("first", ["connect", "500", "503"])
+async def test_fails_over_when_the_send_surely_did_not_happen(first):
+    client, chat, hits = client_with(first)
+    assert await client.send(chat, "hi")
+    assert hits == ["a", "b"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("first", ["read", "400"])
+async def test_no_resend_when_the_message_may_have_gone_out_or_is_bad(first):
+    client, chat, hits = client_with(first)
+    assert not await client.send(chat, "hi")
+    assert hits == ["a"]
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_session_is_skipped_after_repeated_failures(monkeypatch):
+    monkeypatch.setattr(delivery, "WAHA_FAIL_THRESHOLD", 2)
+    client, chat, hits = client_with("connect")
+    await client.send(chat, "one")
+    await client.send(chat, "two")
+    hits.clear()
+    # Marked down: the healthy session is tried first
+    assert await client.send(chat, "three")
+    assert hits == ["b"]
+    assert [s["up"] for s in client.status()] == [False, True]
+    await client.close()
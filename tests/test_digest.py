@@ -0,0 +1,57 @@
+import asyncio
+import pytest
+import digest
+
+
+def test_render_single_reminder_is_unchanged():
+    assert digest.render(["⏰ *REMINDER:* dentist"]) == "⏰ *REMINDER:* dentist"
+
+
+def test_render_several_as_one_list():
+    texts = ["⏰ *REMINDER:* dentist", "⏰ *REMINDER:* call mom", "water plants"]
+    assert digest.render(texts) == "⏰ *REMINDERS (3):*\n- dentist\n- call mom\n- water plants"
+
+
+class Prefs:
+    digest_enabled = True
+    digest_window = None
+
+
+async def prefs(group_id):
+    return Prefs()
+
+
+@pytest.fixture
+def fast(monkeypatch):
+    monkeypatch.setattr(digest, "DIGEST_SETTLE_SECONDS", 0.01)
+    monkeypatch.setattr(digest, "DIGEST_WINDOW_SECONDS", 0.2)
+
+
+@pytest.mark.asyncio
+async def test_one_wave_is_one_message(fast):
+    sent = []
+
+    async def send(to, text):
+        sent.append((to, text))
+
+    d = digest.Digester(send, prefs)
+    await asyncio.gather(d.fire("g1", "⏰ *REMINDER:* a"), d.fire("g1", "⏰ *REMINDER:* b"), d.fire("g2", "⏰ *REMINDER:* c"))
+    assert sorted(sent) == [("g1", "⏰ *REMINDERS (2):*\n- a\n- b"), ("g2", "⏰ *REMINDER:* c")]
+    assert not d.tasks
+
+
+@pytest.mark.asyncio
+async def test_lone_reminder_is_not_held_for_the_window(fast):
+    sent = []
+
+    async def send(to, text):
+        sent.append(asyncio.get_running_loop().time())
+
+    d = digest.Digester(send, prefs)
+    started = asyncio.get_running_loop().time()
+    await d.fire("g1", "⏰ *REMINDER:* a")
+    assert sent[0] - started < digest.DIGEST_WINDOW_SECONDS
+
+    # The next one, inside the window, waits for it to end
+    await d.fire("g1", "⏰ *REMINDER:* b")
+    assert sent[1] - sent[0] >= digest.DIGEST_WINDOW_SECONDS - 0.01
@@ -0,0 +1,181 @@
+import asyncio
+import pytest
+from sqlalchemy import create_engine, text as sql
+from sqlalchemy.pool import StaticPool
+import inbox
+from ingress import Message
+
+
+@pytest.fixture
+def queue():
+    # One shared in-memory database for the writer thread and the test
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    q = inbox.Inbox(engine, workers=2, batch=8)
+    q.init()
+    q.ready.set()
+    yield q
+    q.stop()
+
+
+def msg(n, chat="c1"):
+    return Message(f"m{n}", chat, chat, f"text {n}")
+
+
+def statuses(q):
+    with q.engine.connect() as conn:
+        return dict(conn.execute(sql("SELECT message_id, status FROM inbox")).all())
+
+
+async def run_until(q, handler, done, on_failed=None, timeout=5, **opts):
+    runner = asyncio.create_task(q.run(handler, on_failed, **opts))
+    try:
+        await asyncio.wait_for(done(), timeout)
+    finally:
+        runner.cancel()
+        await asyncio.gather(runner, return_exceptions=True)
+
+
+@pytest.mark.asyncio
+async def test_append_dedupes_on_message_id(queue):
+    assert await queue.append(msg(1))
+    assert not await queue.append(msg(1))
+    assert queue.backlog == 1
+
+
+@pytest.mark.asyncio
+async def test_claim_takes_oldest_rows_of_idle_chats(queue):
+    for n, chat in enumerate(["a", "b", "a", "c", "b"]):
+        await queue.append(msg(n, chat))
+    rows = await queue._write(queue._claim, ["b"], 1, 8, 0.0)
+    assert [(r.chat_id, r.text) for r in rows] == [("a", "text 0"), ("a", "text 2")]
+    assert statuses(queue) == {"m0": "processing", "m1": "pending", "m2": "processing", "m3": "pending", "m4": "pending"}
+
+
+@pytest.mark.asyncio
+async def test_rows_run_in_order_per_chat(queue):
+    for n in range(6):
+        await queue.append(msg(n, "a" if n % 2 else "b"))
+    seen = []
+
+    async def handler(text, chat_id, sender_id):
+        await asyncio.sleep(0.01)
+        seen.append((chat_id, text))
+
+    async def all_done():
+        while len(seen) < 6 or queue.inflight:
+            await asyncio.sleep(0.01)
+
+    await run_until(queue, handler, all_done)
+    assert [t for c, t in seen if c == "a"] == ["text 1", "text 3", "text 5"]
+    assert [t for c, t in seen if c == "b"] == ["text 0", "text 2", "text 4"]
+    assert set(statuses(queue).values()) == {"done"}
+
+
+@pytest.mark.asyncio
+async def test_busy_chat_does_not_hold_up_others(queue):
+    for n in range(5):
+        await queue.append(msg(n, "busy"))
+    await queue.append(msg(9, "other"))
+    release, seen = asyncio.Event(), []
+
+    async def handler(text, chat_id, sender_id):
+        seen.append(chat_id)
+        if chat_id == "busy":
+            await release.wait()
+
+    async def other_done():
+        while "other" not in seen:
+            await asyncio.sleep(0.01)
+
+    await run_until(queue, handler, other_done)
+    assert seen == ["busy", "other"]
+
+
+@pytest.mark.asyncio
+async def test_failed_row_is_retried_then_given_up(queue, monkeypatch):
+    monkeypatch.setattr(inbox, "INBOX_MAX_ATTEMPTS", 2)
+    await queue.append(msg(1))
+    await queue.append(msg(2))
+    calls, failed = [], []
+
+    async def handler(text, chat_id, sender_id):
+        calls.append(text)
+        if text == "text 1":
+            raise RuntimeError("boom")
+
+    async def on_failed(chat_id):
+        failed.append(chat_id)
+
+    async def settled():
+        while statuses(queue).get("m2") != "done":
+            await asyncio.sleep(0.01)
+
+    await run_until(queue, handler, settled, on_failed)
+    # The later row waited behind both attempts of the failing one
+    assert calls == ["text 1", "text 1", "text 2"]
+    assert failed == ["c1"]
+    assert statuses(queue) == {"m1": "failed", "m2": "done"}
+
+
+def test_init_replays_rows_left_processing(queue, monkeypatch):
+    monkeypatch.setattr(inbox, "INBOX_MAX_ATTEMPTS", 2)
+    with queue.engine.begin() as conn:
+        for message_id, attempts in (("x1", 1), ("x2", 2)):
+            conn.execute(sql(
+                "INSERT INTO inbox (message_id, chat_id, text, status, attempts, received_at) "
+                "VALUES (:m, 'c1', 'left over', 'processing', :a, 0)"
+            ), {"m": message_id, "a": attempts})
+
+    queue.init()
+    assert statuses(queue) == {"x1": "pending", "x2": "failed"}
+    assert queue.backlog == 1
+    assert queue.given_up == ["c1"]
+
+
+@pytest.mark.asyncio
+async def test_non_retryable_error_fails_at_once(queue):
+    await queue.append(msg(1))
+    calls, failed = [], []
+
+    async def handler(text, chat_id, sender_id):
+        calls.append(text)
+        raise ValueError("bad data")
+
+    async def on_failed(chat_id):
+        failed.append(chat_id)
+
+    async def settled():
+        while not failed:
+            await asyncio.sleep(0.01)
+
+    await run_until(queue, handler, settled, on_failed, retry_on=(ConnectionError,))
+    assert calls == ["text 1"]
+    assert statuses(queue) == {"m1": "failed"}
+
+
+@pytest.mark.asyncio
+async def test_rows_given_up_across_a_restart_get_on_failed(queue, monkeypatch):
+    monkeypatch.setattr(inbox, "INBOX_MAX_ATTEMPTS", 2)
+    with queue.engine.begin() as conn:
+        for message_id, chat_id in (("x1", "c1"), ("x2", "c1"), ("x3", "c2")):
+            conn.execute(sql(
+                "INSERT INTO inbox (message_id, chat_id, text, status, attempts, received_at) "
+                "VALUES (:m, :c, 'left over', 'processing', 2, 0)"
+            ), {"m": message_id, "c": chat_id})
+    queue.init()
+    failed = []
+
+    async def handler(text, chat_id, sender_id):
+        pass
+
+    async def on_failed(chat_id):
+        failed.append(chat_id)
+
+    async def settled():
+        while len(failed) < 2:
+            await asyncio.sleep(0.01)
+
+    await run_until(queue, handler, settled, on_failed)
+    # One apology per chat, not per lost message
+    assert failed == ["c1", "c2"]
+    assert queue.given_up == []
@@ -0,0 +1,66 @@
+import json
+import pytest
+import ingress
+import metrics
+
+
+def body(payload=None, event="message", **extra):
+    data = {"event": event, "session": "default", "payload": payload, **extra}
+    # WAHA serializes compactly; the byte filters rely on it
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def message(**fields):
+    return {"id": "m1", "from": "123@c.us", "body": "add milk", **fields}
+
+
+@pytest.fixture(autouse=True)
+def fresh_dedup():
+    ingress.seen.clear()
+
+
+def test_accepts_a_text_message():
+    msg, reason = ingress.parse(body(message()))
+    assert reason is None
+    assert (msg.id, msg.chat_id, msg.sender_id, msg.text, msg.session) == ("m1", "123@c.us", "123@c.us", "add milk", "default")
+
+
+def test_group_sender_is_the_participant():
+    msg, _ = ingress.parse(body(message(**{"from": "g1@g.us", "participant": "456@c.us"})))
+    assert (msg.chat_id, msg.sender_id) == ("g1@g.us", "456@c.us")
+
+
+@pytest.mark.parametrize("raw, reason", [
+    (b"", "empty"),
+    (body(message(fromMe=True)), "from_me"),
+    (body(message(), event="message.any"), "event"),
+    (body(message(), event="session.status"), "event"),
+    (b"{not json", "bad_json"),
+    (b"[1, 2]", "bad_json"),
+    (body(None), "bad_json"),
+    (body(message(body="")), "not_text"),
+    (body(message(body="   ")), "not_text"),
+    (body(message(body=None)), "not_text"),
+    (body(message(**{"from": ""})), "no_chat"),
+])
+def test_drop_reasons(raw, reason):
+    before = metrics.get(f"ingress.dropped.{reason}")
+    assert ingress.parse(raw) == (None, reason)
+    assert metrics.get(f"ingress.dropped.{reason}") == before + 1
+
+
+def test_from_me_is_caught_after_parsing_too():
+    # Not compact, so the byte scan misses it
+    raw = json.dumps({"event": "message", "payload": message(fromMe=True)}, indent=1).encode()
+    assert ingress.parse(raw) == (None, "from_me")
+
+
+def test_duplicate_message_id():
+    assert ingress.parse(body(message()))[1] is None
+    assert ingress.parse(body(message())) == (None, "duplicate")
+
+
+def test_forget_lets_a_redelivery_through():
+    msg, _ = ingress.parse(body(message()))
+    ingress.forget(msg)
+    assert ingress.parse(body(message()))[1] is None
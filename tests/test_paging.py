@@ -0,0 +1,71 @@
+import pytest
+import paging
+from paging import MORE_HINT, Pager, chunks
+
+
+def test_small_reply_is_one_message():
+    assert list(chunks("📋 *Vault:*", ["a", "b"], max_chars=100)) == ["📋 *Vault:*\n\na\n\nb"]
+
+
+def test_blocks_are_packed_up_to_the_cap():
+    blocks = ["x" * 40, "y" * 40, "z" * 40]
+    out = list(chunks("H", blocks, max_chars=90))
+    assert out == ["H\n\n" + "x" * 40 + "\n\n" + "y" * 40, "z" * 40]
+    assert all(len(m) <= 90 for m in out)
+
+
+def test_oversized_block_is_split_on_lines():
+    block = "\n".join(f"- item {i:02d}" for i in range(20))
+    out = list(chunks("", [block], max_chars=50))
+    assert all(len(m) <= 50 for m in out)
+    assert "\n".join(out) == block
+
+
+def test_overlong_line_is_hard_cut():
+    out = list(chunks("", ["a" * 25], max_chars=10))
+    assert out == ["a" * 10, "a" * 10, "a" * 5]
+
+
+def test_blocks_are_consumed_lazily():
+    consumed = []
+
+    def blocks():
+        for i in range(100):
+            consumed.append(i)
+            yield "b" * 30
+
+    first = next(chunks("", blocks(), max_chars=70))
+    assert first.count("b" * 30) == 2
+    assert len(consumed) == 3
+
+
+@pytest.fixture
+def pager(monkeypatch):
+    monkeypatch.setattr(paging, "PAGE_MESSAGES", 2)
+    return Pager(max_chats=10)
+
+
+def test_pager_pages_until_done(pager):
+    first = pager.start("c1", iter(["m1", "m2", "m3", "m4", "m5"]))
+    assert first == ["m1", "m2" + MORE_HINT]
+    assert pager.more("c1") == ["m3", "m4" + MORE_HINT]
+    assert pager.more("c1") == ["m5"]
+    assert pager.more("c1") is None
+
+
+def test_exact_page_has_no_more_hint(pager):
+    assert pager.start("c1", ["m1", "m2"]) == ["m1", "m2"]
+    assert pager.more("c1") is None
+
+
+def test_new_reply_replaces_the_unfinished_one(pager):
+    pager.start("c1", ["a1", "a2", "a3"])
+    assert pager.start("c1", ["b1"]) == ["b1"]
+    assert pager.more("c1") is None
+
+
+def test_cursors_are_per_chat(pager):
+    pager.start("c1", ["a1", "a2", "a3"])
+    pager.start("c2", ["b1", "b2", "b3"])
+    assert pager.more("c1") == ["a3"]
+    assert pager.more("c2") == ["b3"]
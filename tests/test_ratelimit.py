@@ -0,0 +1,84 @@
+import pytest
+import ratelimit
+from ratelimit import Admission, TokenBucket
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, "monotonic", clock)
+    return clock
+
+
+def test_bucket_refills_at_rate_up_to_burst(clock):
+    bucket = TokenBucket(rate_per_sec=2, burst=5)
+    bucket.tokens = 0
+    clock.now += 1
+    assert bucket.refill() == 2
+    clock.now += 60
+    assert bucket.refill() == 5
+
+
+def test_admission_spends_the_chat_burst(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "CHAT_BURST", 3)
+    admission = Admission()
+    assert [admission.admit("dm") for _ in range(4)] == [True, True, True, False]
+
+
+def test_direct_chat_is_not_held_to_the_sender_limit(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "CHAT_BURST", 10)
+    monkeypatch.setattr(ratelimit, "SENDER_BURST", 2)
+    admission = Admission()
+    # sender == chat in a one-to-one chat
+    assert all(admission.admit("dm", "dm") for _ in range(10))
+    assert not admission.admit("dm", "dm")
+
+
+def test_group_member_is_held_to_the_sender_limit(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "CHAT_BURST", 10)
+    monkeypatch.setattr(ratelimit, "SENDER_BURST", 2)
+    admission = Admission()
+    assert [admission.admit("grp", "alice") for _ in range(3)] == [True, True, False]
+    # Others in the same chat still have their own tokens
+    assert admission.admit("grp", "bob")
+
+
+def test_rejected_message_spends_no_tokens(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "CHAT_BURST", 10)
+    monkeypatch.setattr(ratelimit, "SENDER_BURST", 1)
+    admission = Admission()
+    admission.admit("grp", "alice")
+    assert not admission.admit("grp", "alice")
+    assert admission.chats.bucket("grp").tokens == 9
+
+
+def test_tokens_come_back_over_time(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "CHAT_BURST", 1)
+    monkeypatch.setattr(ratelimit, "CHAT_RATE_PER_MIN", 60)
+    admission = Admission()
+    assert admission.admit("dm")
+    assert not admission.admit("dm")
+    clock.now += 1
+    assert admission.admit("dm")
+
+
+def test_one_notice_per_chat_per_refill_window(clock, monkeypatch):
+    monkeypatch.setattr(ratelimit, "CHAT_BURST", 10)
+    monkeypatch.setattr(ratelimit, "CHAT_RATE_PER_MIN", 20)
+    admission = Admission()
+    # A full refill takes 10 / (20 / 60) = 30s
+    assert admission.should_notify("dm")
+    assert not admission.should_notify("dm")
+    assert admission.should_notify("other")
+    clock.now += 29
+    assert not admission.should_notify("dm")
+    clock.now += 1
+    assert admission.should_notify("dm")
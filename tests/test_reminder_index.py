@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.pool import StaticPool
+from reminder_index import ReminderIndex, REMINDER_PREFIX
+
+
+def job(job_id, recipient, text):
+    return SimpleNamespace(id=job_id, args=(recipient, REMINDER_PREFIX + text))
+
+
+JOBS = [
+    job("rem_1", "alice", "call mom"),
+    job("rem_2", "alice", "standup meeting"),
+    job("rem_3", "alice", "pay the electricity bill"),
+    job("rem_4", "bob", "call mom"),
+    job("other", "alice", "call mom"),  # not a reminder job
+]
+
+
+@pytest.fixture(params=[True, False], ids=["fts", "like"])
+def index(request):
+    idx = ReminderIndex(create_engine("sqlite://", poolclass=StaticPool))
+    idx.init()
+    idx.fts = idx.fts and request.param
+    idx.rebuild(JOBS)
+    return idx
+
+
+def ids(matches):
+    return sorted(job_id for job_id, _, _ in matches)
+
+
+def test_every_word_must_match(index):
+    assert ids(index.search("alice", "call mom")) == ["rem_1"]
+    assert ids(index.search("alice", "electric bill")) == ["rem_3"]
+
+
+def test_partial_match_returns_nothing(index):
+    # "call" alone matches "call mom"; that is no reason to delete it
+    assert index.search("alice", "call grandma") == []
+    assert index.search("alice", "dentist") == []
+
+
+def test_possessives_and_punctuation(index):
+    # The stray "s" must not prefix-match "standup"
+    assert ids(index.search("alice", "Mom's!")) == ["rem_1"]
+    assert ids(index.search("alice", "stand-up?")) == []
+    assert ids(index.search("alice", "standup, meeting.")) == ["rem_2"]
+
+
+def test_only_stopwords_or_short_words_match_nothing(index):
+    assert index.search("alice", "the reminder") == []
+    assert index.search("alice", "a s") == []
+
+
+def test_recipients_are_isolated(index):
+    assert ids(index.search("bob", "mom")) == ["rem_4"]
+    assert index.search("bob", "standup") == []
+    assert ids(index.all_for("bob")) == ["rem_4"]
+
+
+def test_add_and_remove_keep_index_in_step(index):
+    index.add(job("rem_5", "bob", "water plants"))
+    assert ids(index.search("bob", "plants")) == ["rem_5"]
+    index.remove("rem_5")
+    assert index.search("bob", "plants") == []
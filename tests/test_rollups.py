@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+import pytest
+from sqlmodel import SQLModel, Session, create_engine
+from models import Group, Task
+import rollups
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Group(id="g1", admin_id="g1"))
+        session.commit()
+    return engine
+
+
+def test_added_counts_upsert_onto_existing_rows(engine):
+    with Session(engine) as session:
+        rollups.added(session, "g1", [("Safeway", "milk", 2), ("Costco", "egg", 12)], now=T0)
+        rollups.added(session, "g1", [("Safeway", "milk", 1)], now=T0 + timedelta(hours=1))
+        session.commit()
+        stats = rollups.load(session, "g1")
+
+    assert (stats["items"], stats["added"], stats["removed"], stats["open"]) == (2, 15, 0, 15)
+    assert stats["top_items"][0] == {"name": "egg", "added": 12, "removed": 0, "avg_dwell_hours": None}
+    assert {"name": "milk", "added": 3, "removed": 0, "avg_dwell_hours": None} in stats["top_items"]
+    assert stats["stores"] == [
+        {"store": "Costco", "added": 12, "removed": 0, "open": 12},
+        {"store": "Safeway", "added": 3, "removed": 0, "open": 3},
+    ]
+
+
+def test_removed_tracks_dwell_time(engine):
+    tasks = [Task(group_id="g1", description="milk", store="Safeway", created_at=T0) for _ in range(2)]
+    with Session(engine) as session:
+        rollups.added(session, "g1", [("Safeway", "milk", 2)], now=T0)
+        rollups.removed(session, "g1", tasks, now=T0 + timedelta(hours=6))
+        session.commit()
+        stats = rollups.load(session, "g1")
+
+    assert (stats["removed"], stats["open"], stats["avg_dwell_hours"]) == (2, 0, 6.0)
+    assert stats["slowest_items"] == [{"name": "milk", "added": 2, "removed": 2, "avg_dwell_hours": 6.0}]
+
+
+def test_moved_shifts_open_counts_between_stores(engine):
+    with Session(engine) as session:
+        rollups.added(session, "g1", [("General", "milk", 3)], now=T0)
+        rollups.moved(session, "g1", [("General", "milk", 2)], "Safeway")
+        session.commit()
+        stores = {s["store"]: s for s in rollups.load(session, "g1")["stores"]}
+
+    assert stores["General"]["open"] == 1
+    assert stores["Safeway"] == {"store": "Safeway", "added": 0, "removed": 0, "open": 2}
+
+
+def test_load_of_an_unknown_group_is_empty(engine):
+    with Session(engine) as session:
+        stats = rollups.load(session, "nobody")
+    assert (stats["items"], stats["added"], stats["avg_dwell_hours"], stats["stores"]) == (0, 0, None, [])
+    assert rollups.render(stats) == "📊 No vault history yet. Add something first!"
+
+
+def test_backfill_seeds_from_existing_tasks_once(engine):
+    with Session(engine) as session:
+        session.add_all([
+            Task(group_id="g1", description="milk", store="Safeway", created_at=T0),
+            Task(group_id="g1", description="milk", store="Safeway", created_at=T0),
+            Task(group_id="g1", description="egg", store="Costco", created_at=T0),
+        ])
+        session.commit()
+
+    assert rollups.backfill(engine) == 1
+    assert rollups.backfill(engine) == 0
+    with Session(engine) as session:
+        stats = rollups.load(session, "g1")
+    assert (stats["items"], stats["added"], stats["open"]) == (2, 3, 3)
@@ -0,0 +1,88 @@
+import json, asyncio
+from types import SimpleNamespace
+import pytest
+import brain, shadow, usage
+from shadow import ShadowEvaluator, diff
+
+NOW = "2026-01-01 09:00:00"
+
+
+def test_diff_ignores_answer_item_order_and_case():
+    primary = {"items": [{"name": "milk"}, {"name": "egg"}], "store": "Safeway", "answer": "Sure!"}
+    candidate = {"items": [{"name": "egg"}, {"name": "milk"}], "store": "safeway ", "answer": "OK"}
+    assert diff(primary, candidate) == []
+    assert diff(primary, {**candidate, "items": [{"name": "egg"}]}) == ["items"]
+    assert diff({"store": "Safeway"}, {"store": "Safeway", "mode": "ALL"}) == ["mode"]
+
+
+def test_stats_aggregate_agreement_and_confusion():
+    ev = ShadowEvaluator(rate=1.0, window=10)
+    task = {"intent": "TASK", "data": {"items": [{"name": "milk"}]}}
+    ev.record("add milk", task, task, 0.2, 0.4, "big", "small")
+    ev.record("add egg", task, {"intent": "TASK", "data": {"items": [{"name": "egg"}]}}, 0.2, 0.4, "big", "small")
+    ev.record("list", {"intent": "LIST", "data": {}}, {"intent": "CHAT", "data": {}}, 0.2, 0.4, "big", "small")
+
+    stats = ev.stats()
+    assert stats["window"] == 3
+    assert stats["intent_agreement"] == round(2 / 3, 4)
+    assert stats["data_agreement"] == round(1 / 3, 4)
+    assert stats["by_intent"]["TASK"] == {"calls": 2, "intent_agree": 2, "data_agree": 1}
+    assert stats["confusion"] == [{"primary": "LIST", "candidate": "CHAT", "count": 1}]
+    assert stats["field_disagreements"] == {"items": 1}
+    assert stats["latency"]["candidate"]["p50"] == 0.4
+
+
+class FakeCompletions:
+    def __init__(self, replies):
+        self.replies = replies   # model -> reply content
+
+    def create(self, model, **kwargs):
+        return SimpleNamespace(
+            model=model,
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.replies[model]), finish_reason="stop")],
+            usage=SimpleNamespace(prompt_tokens=10, completion_tokens=5, queue_time=None),
+        )
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = usage.UsageTracker(sink="")
+    monkeypatch.setattr(usage, "tracker", tracker)
+    return tracker
+
+
+@pytest.mark.asyncio
+async def test_candidate_runs_in_the_background_and_is_labelled(tracker):
+    primary = brain.AdjntBrain()
+    primary.model = "big"
+    primary._client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions({
+        "small": json.dumps({"intent": "CHAT", "data": {"answer": "hi"}}),
+    })))
+    ev = ShadowEvaluator(rate=1.0, model="small", wire_format="verbose", window=10)
+
+    ev.observe(primary, "list", NOW, {"intent": "LIST", "data": {}}, 0.3, "big")
+    # Returned at once; the candidate call is still pending
+    assert len(ev.tasks) == 1 and not ev.records
+    await asyncio.gather(*ev.tasks)
+
+    [rec] = ev.records
+    assert (rec["primary_intent"], rec["candidate_intent"], rec["intent_agree"]) == ("LIST", "CHAT", False)
+    assert (rec["primary_model"], rec["candidate_model"]) == ("big", "small")
+    # The candidate's spend is kept apart from the primary's in /usage
+    assert [r["model"] for r in tracker.records] == ["shadow:small"]
+
+
+@pytest.mark.asyncio
+async def test_sampling_rate_and_inflight_cap(monkeypatch):
+    primary = brain.AdjntBrain()
+    ev = ShadowEvaluator(rate=0.0)
+    ev.observe(primary, "list", NOW, {"intent": "LIST", "data": {}}, 0.3, "big")
+    assert not ev.tasks
+
+    monkeypatch.setattr(shadow, "SHADOW_MAX_INFLIGHT", 1)
+    ev = ShadowEvaluator(rate=1.0)
+    ev.tasks.add(asyncio.get_running_loop().create_future())
+    skipped = shadow.metrics.get("shadow.skipped")
+    ev.observe(primary, "list", NOW, {"intent": "LIST", "data": {}}, 0.3, "big")
+    assert len(ev.tasks) == 1
+    assert shadow.metrics.get("shadow.skipped") == skipped + 1
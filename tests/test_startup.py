@@ -0,0 +1,75 @@
+import json, asyncio, threading
+import httpx
+import pytest
+from sqlalchemy import create_engine, text as sql
+from sqlalchemy.pool import StaticPool
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+import main, inbox, ingress, startup
+from reminder_index import ReminderIndex
+
+
+def webhook_body(message_id):
+    payload = {"id": message_id, "from": "123@c.us", "body": "add milk"}
+    return json.dumps({"event": "message", "session": "default", "payload": payload}, separators=(",", ":")).encode()
+
+
+@pytest.fixture
+def app_env(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    queue = inbox.Inbox(engine)
+    index = ReminderIndex(engine)
+
+    def init_storage():
+        index.init()
+        queue.init()
+
+    async def no_op():
+        pass
+
+    def spawn(coro):
+        coro.close()
+
+    monkeypatch.setattr(main.inbox, "queue", queue)
+    monkeypatch.setattr(main.reminder_index, "index", index)
+    monkeypatch.setattr(main.startup, "report", startup.StartupReport())
+    monkeypatch.setattr(main, "init_storage", init_storage)
+    monkeypatch.setattr(main, "init_llm", lambda: None)
+    monkeypatch.setattr(main.waha, "start", no_op)
+    monkeypatch.setattr(main, "spawn", spawn)
+    monkeypatch.setattr(main, "scheduler", None)
+    ingress.seen.clear()
+    yield queue
+    queue.stop()
+
+
+@pytest.mark.asyncio
+async def test_webhook_is_accepted_while_the_scheduler_loads(app_env, monkeypatch):
+    loading, release = threading.Event(), threading.Event()
+
+    class SlowScheduler(AsyncIOScheduler):
+        def start(self, paused=False):
+            # Stands in for unpickling a large job store
+            loading.set()
+            release.wait(5)
+            super().start(paused)
+
+    monkeypatch.setattr(main, "build_scheduler", lambda tz, loop=None: SlowScheduler(timezone=tz, event_loop=loop))
+    warm_up = asyncio.create_task(main.warm_up())
+    try:
+        await asyncio.wait_for(asyncio.to_thread(loading.wait), 5)
+
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            r = await asyncio.wait_for(client.post("/webhook", content=webhook_body("m1")), 1)
+
+        assert r.status_code == 200 and r.json() == {"status": "ok"}
+        assert not main.startup.report.ready.is_set()
+        with app_env.engine.connect() as conn:
+            assert conn.execute(sql("SELECT message_id, status FROM inbox")).all() == [("m1", "pending")]
+    finally:
+        release.set()
+        await asyncio.wait_for(warm_up, 5)
+
+    assert main.startup.report.ready.is_set()
+    assert main.startup.report.error is None
+    main.scheduler.shutdown(wait=False)
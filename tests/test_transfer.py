@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+from types import SimpleNamespace
+import pytest
+from sqlmodel import SQLModel, Session, create_engine
+from apscheduler.triggers.date import DateTrigger
+from models import Group, Task
+import transfer
+
+T0 = datetime(2026, 1, 1, 9, 0)
+
+
+@pytest.fixture
+def engine(tmp_path, monkeypatch):
+    # A file database: only a real file shows lock contention between connections
+    engine = create_engine(f"sqlite:///{tmp_path / 'vault.db'}", connect_args={"timeout": 0.2})
+    SQLModel.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add(Group(id="g1", admin_id="g1"))
+        session.add_all(Task(group_id="g1", description=f"item {i}", store="Safeway", created_at=T0) for i in range(7))
+        session.add(Task(group_id="g2", description="not mine", created_at=T0))
+        session.commit()
+    monkeypatch.setattr(transfer, "session_for", lambda group_id: Session(engine))
+    monkeypatch.setattr(transfer, "EXPORT_BATCH", 3)
+    return engine
+
+
+class StubIndex:
+    def __init__(self, job_ids):
+        self.job_ids = job_ids
+
+    def all_for(self, recipient_id):
+        return [(job_id, "", 0.0) for job_id in self.job_ids]
+
+
+class StubScheduler:
+    def __init__(self, jobs):
+        self.jobs = jobs
+
+    def get_job(self, job_id):
+        return self.jobs.get(job_id)
+
+
+def test_export_streams_tasks_then_reminders(engine, monkeypatch):
+    job = SimpleNamespace(args=["g1", "⏰ *REMINDER:* call mom"], trigger=DateTrigger(T0, timezone="UTC"))
+    monkeypatch.setattr(transfer.reminder_index, "index", StubIndex(["rem_1", "rem_gone"]))
+    lines = list(transfer.export_stream(StubScheduler({"rem_1": job}), "g1"))
+    rows = [json.loads(line) for line in lines]
+
+    assert [r["description"] for r in rows[:-1]] == [f"item {i}" for i in range(7)]
+    assert rows[-1] == {"type": "reminder", "text": "⏰ *REMINDER:* call mom",
+                        "trigger": {"type": "date", "run_date": "2026-01-01T09:00:00+00:00"}}
+
+
+def test_export_holds_no_transaction_between_pages(engine, monkeypatch):
+    monkeypatch.setattr(transfer.reminder_index, "index", StubIndex([]))
+    rows = transfer.export_rows(StubScheduler({}), "g1")
+    first = [next(rows) for _ in range(2)]
+
+    # A stalled client mid-page must not block writers on the database
+    with Session(engine) as session:
+        session.add(Task(group_id="g1", description="written mid-export", created_at=T0))
+        session.commit()
+
+    rest = list(rows)
+    descriptions = [r["description"] for r in first + rest]
+    assert descriptions[:7] == [f"item {i}" for i in range(7)]
+    # Pages are read fresh, so a row appended past the cursor is picked up
+    assert descriptions[7:] == ["written mid-export"]
@@ -0,0 +1,106 @@
+from vault_cache import GroupVault, VaultCache
+
+
+def cached(vault=None):
+    cache = VaultCache(max_groups=10)
+    cache.lru.put("g1", vault or GroupVault())
+    return cache
+
+
+def test_apply_adds_and_removes_on_the_cached_copy():
+    cache = cached()
+    cache.apply("g1", added=[("safeway", "milk", 2), ("costco", "egg", 12)])
+    cache.apply("g1", removed=[("safeway", "milk", 1)])
+
+    vault = cache.peek("g1")
+    assert vault.stores == {"Safeway": {"milk": 1}, "Costco": {"egg": 12}}
+
+
+def test_apply_drops_emptied_items_and_stores():
+    cache = cached()
+    cache.apply("g1", added=[("safeway", "milk", 1), ("costco", "egg", 1)])
+    cache.apply("g1", removed=[("safeway", "milk", 3)])
+
+    assert cache.peek("g1").store_names() == ["Costco"]
+
+
+def test_apply_without_a_cached_vault_is_a_no_op():
+    cache = VaultCache(max_groups=10)
+    cache.apply("g1", added=[("safeway", "milk", 1)])
+    assert cache.peek("g1") is None
+
+
+def test_apply_removes_before_adding():
+    # A MOVE is a removal from one store and an add to another
+    cache = cached()
+    cache.apply("g1", added=[("general", "milk", 1)])
+    cache.apply("g1", removed=[("general", "milk", 1)], added=[("safeway", "milk", 1)])
+
+    assert cache.peek("g1").stores == {"Safeway": {"milk": 1}}
+
+
+def test_changed_store_block_is_re_rendered():
+    vault = GroupVault()
+    vault.add("safeway", "milk")
+    assert vault.block("Safeway") == "📍 *Safeway*\n- milk"
+
+    cache = cached(vault)
+    cache.apply("g1", added=[("safeway", "milk", 2)])
+    assert vault.block("Safeway") == "📍 *Safeway*\n- milk (x3)"
+
+
+def test_render_filters_by_store_case_insensitively():
+    vault = GroupVault()
+    vault.add("safeway", "milk")
+    vault.add("costco", "egg", 2)
+
+    assert vault.render("SAFEWAY") == "📋 *Vault (SAFEWAY):*\n\n📍 *Safeway*\n- milk"
+    assert vault.render("Target") == "Vault is empty for *Target*."
+
+
+def test_store_skips_a_load_that_overlapped_a_write():
+    cache = VaultCache(max_groups=10)
+    version = cache.version("g1")
+    with cache.writing("g1"):
+        pass
+    cache.store("g1", GroupVault(), version)
+    assert cache.peek("g1") is None
+
+    cache.store("g1", GroupVault(), cache.version("g1"))
+    assert cache.peek("g1") is not None
+
+
+def test_load_overlapping_a_write_is_not_cached():
+    cache = VaultCache(max_groups=10)
+    version = cache.version("g1")
+    with cache.writing("g1"):
+        pass
+    cache.store("g1", GroupVault(), version)
+    assert cache.peek("g1") is None
+
+    version = cache.version("g1")
+    cache.store("g1", GroupVault(), version)
+    assert cache.peek("g1") is not None
+
+
+def test_write_bookkeeping_stays_bounded():
+    cache = VaultCache(max_groups=3)
+    for i in range(100):
+        with cache.writing(f"g{i}"):
+            pass
+    assert cache._writes == {}
+    assert list(cache._changed) == ["g97", "g98", "g99"]
+
+
+def test_forgotten_group_still_refuses_a_stale_load():
+    cache = VaultCache(max_groups=2)
+    version = cache.version("g1")
+    with cache.writing("g1"):
+        pass
+    # g1's change time is pushed out of the bounded map by other writes
+    for g in ("g2", "g3"):
+        with cache.writing(g):
+            pass
+    assert "g1" not in cache._changed
+    cache.store("g1", GroupVault(), version)
+    assert cache.peek("g1") is None
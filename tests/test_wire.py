@@ -0,0 +1,67 @@
+import pytest
+import wire
+
+CASES = [
+    {"intent": "TASK", "data": {"items": [{"name": "egg", "count": 3, "store": "Safeway"}, {"name": "milk", "count": 1}]}},
+    {"intent": "DELETE", "data": {"mode": "CLEAR_STORE", "store": "Safeway"}},
+    {"intent": "DELETE", "data": {"mode": "SINGLE", "items": [{"name": "milk", "count": 2}]}},
+    {"intent": "MOVE", "data": {"item": "apple", "from_store": "General", "to_store": "Costco", "move_all": False}},
+    {"intent": "REMIND", "data": {"item": "dentist", "timestamp": "2026-01-02 15:00:00", "recurrence": "weekly", "day_of_week": "Monday"}},
+    {"intent": "UPDATE_REMINDER", "data": {"item": "dentist", "new_timestamp": "2026-01-02 16:00:00"}},
+    {"intent": "PAUSE_REMINDERS", "data": {"resume": True}},
+    {"intent": "LIST_REMINDERS", "data": {"date_filter": "today"}},
+    {"intent": "CHAT", "data": {"answer": "I am doing well!"}},
+    {"intent": "TIME", "data": {}},
+]
+
+
+@pytest.mark.parametrize("result", CASES, ids=lambda r: r["intent"])
+def test_round_trip(result):
+    assert wire.decode(wire.encode(result)) == result
+
+
+def test_encoded_form_is_compact():
+    encoded = wire.encode(CASES[0])
+    assert encoded == {"i": "T", "d": {"l": [["egg", 3, "Safeway"], ["milk", 1]]}}
+
+
+def test_default_move_all_is_left_out():
+    encoded = wire.encode({"intent": "MOVE", "data": {"item": "apple", "to_store": "Costco", "move_all": True}})
+    assert "a" not in encoded["d"]
+
+
+def test_no_data_leaves_out_d():
+    assert wire.encode({"intent": "ONBOARD", "data": {}}) == {"i": "O"}
+    assert wire.decode({"i": "O"}) == {"intent": "ONBOARD", "data": {}}
+
+
+def test_item_gaps_and_dict_items_decode():
+    decoded = wire.decode({"i": "T", "d": {"l": [["egg", None, "Costco"], {"n": "milk", "count": 2}]}})
+    assert decoded["data"]["items"] == [{"name": "egg", "store": "Costco"}, {"name": "milk", "count": 2}]
+
+
+def test_verbose_reply_passes_through():
+    assert wire.decode(CASES[1]) is CASES[1]
+
+
+def test_unknown_code_is_unknown():
+    assert wire.decode({"i": "ZZ"}) == {"intent": "UNKNOWN", "data": {}}
+
+
+def test_every_intent_has_a_distinct_code():
+    assert len(set(wire.INTENTS.values())) == len(wire.INTENTS)
+    assert len(set(wire.KEYS.values())) == len(wire.KEYS)
+
+
+def test_compact_prompt_rewrites_examples_and_keeps_the_header():
+    prompt = (
+        "SYSTEM: Current time: 2026-01-01 09:00:00.\n\n"
+        "=== CORE RULES ===\n" + wire.VERBOSE_RULE + "\n"
+        "=== INTENT DEFINITIONS ===\n"
+        "  - 'add milk' → {'intent': 'TASK', 'data': {'items': [{'name': 'milk', 'count': 1, 'store': 'General'}]}}\n"
+    )
+    compact = wire.compact_prompt(prompt)
+    assert compact.startswith("SYSTEM: Current time: 2026-01-01 09:00:00.")
+    assert wire.COMPACT_RULE in compact and wire.VERBOSE_RULE not in compact
+    assert '{"i":"T","d":{"l":[["milk",1,"General"]]}}' in compact
+    assert compact.index("=== OUTPUT FORMAT") < compact.index("=== INTENT DEFINITIONS ===")
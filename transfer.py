@@ -0,0 +1,148 @@
+import os, io, csv, json, uuid, logging
+from datetime import datetime
+from sqlmodel import select
+from apscheduler.triggers.date import DateTrigger
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.triggers.cron import CronTrigger
+from models import Task
+from database import session_for
+import reminder_index
+
+logger = logging.getLogger("Adjnt.Transfer")
+
+# Streaming backup / migration of one group's vault and reminders.
+# Export reads tasks in keyset-paginated pages, each in its own short
+# transaction so a slow client never holds a read lock on the database, and
+# reminders one job at a time; import parses the body line by line and inserts in batches, so memory
+# stays flat regardless of group size.
+EXPORT_BATCH = int(os.getenv("EXPORT_BATCH", "500"))
+IMPORT_BATCH = int(os.getenv("IMPORT_BATCH", "500"))
+
+CSV_COLUMNS = ["type", "description", "store", "created_at", "text", "trigger"]
+FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+
+def trigger_to_dict(trigger):
+    if isinstance(trigger, DateTrigger):
+        return {"type": "date", "run_date": trigger.run_date.isoformat()}
+    if isinstance(trigger, IntervalTrigger):
+        return {"type": "interval", "seconds": trigger.interval.total_seconds(), "start_date": trigger.start_date.isoformat()}
+    if isinstance(trigger, CronTrigger):
+        fields = {f.name: str(f) for f in trigger.fields if not f.is_default}
+        return {"type": "cron", "timezone": str(trigger.timezone), **fields}
+    raise ValueError(f"unsupported trigger {trigger!r}")
+
+
+def trigger_kwargs(spec):
+    """add_job(trigger, **kwargs) arguments for an exported trigger dict."""
+    spec = dict(spec)
+    kind = spec.pop("type")
+    if kind == "date":
+        return kind, {"run_date": datetime.fromisoformat(spec["run_date"])}
+    if kind == "interval":
+        return kind, {"seconds": spec["seconds"], "start_date": datetime.fromisoformat(spec["start_date"])}
+    if kind == "cron":
+        return kind, spec
+    raise ValueError(f"unknown trigger type {kind!r}")
+
+
+# --- export ---
+
+def export_rows(scheduler, group_id):
+    """Yield the group's tasks, then its reminders, as plain dicts."""
+    last_id = 0
+    while True:
+        # The session is closed before any row is yielded to the client
+        with session_for(group_id) as session:
+            page = session.exec(
+                select(Task.id, Task.description, Task.store, Task.created_at)
+                .where(Task.group_id == group_id, Task.id > last_id)
+                .order_by(Task.id)
+                .limit(EXPORT_BATCH)
+            ).all()
+        for task_id, description, store, created_at in page:
+            yield {"type": "task", "description": description, "store": store, "created_at": created_at.isoformat()}
+        if len(page) < EXPORT_BATCH:
+            break
+        last_id = page[-1][0]
+
+    for job_id, _, _ in reminder_index.index.all_for(group_id):
+        job = scheduler.get_job(job_id)
+        if job is None:
+            continue
+        try:
+            trigger = trigger_to_dict(job.trigger)
+        except ValueError as e:
+            logger.warning(f"⚠️ Export skipped {job_id}: {e}")
+            continue
+        yield {"type": "reminder", "text": job.args[1], "trigger": trigger}
+
+
+def export_stream(scheduler, group_id, fmt="ndjson"):
+    """Encoded export chunks, for a StreamingResponse."""
+    rows = export_rows(scheduler, group_id)
+    if fmt == "ndjson":
+        for row in rows:
+            yield json.dumps(row) + "\n"
+        return
+
+    buf = io.StringIO()
+    writer = csv.DictWriter(buf, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+    for row in rows:
+        if row["type"] == "reminder":
+            row = {**row, "trigger": json.dumps(row["trigger"])}
+        writer.writerow(row)
+        if buf.tell() >= 64 * 1024:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+# --- import ---
+
+async def _lines(chunks):
+    pending = b""
+    async for chunk in chunks:
+        pending += chunk
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8").rstrip("\r")
+    if pending:
+        yield pending.decode("utf-8").rstrip("\r")
+
+
+async def parse_rows(chunks, fmt="ndjson"):
+    """Rows from an uploaded body, decoded line by line as it arrives."""
+    header = None
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            yield json.loads(line)
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = values
+            continue
+        row = dict(zip(header, values))
+        if row.get("type") == "reminder" and row.get("trigger"):
+            row["trigger"] = json.loads(row["trigger"])
+        yield row
+
+
+def task_row(group_id, row):
+    created_at = row.get("created_at")
+    return {
+        "description": (row.get("description") or "").lower().strip(),
+        "store": row.get("store") or "General",
+        "created_at": datetime.fromisoformat(created_at) if created_at else datetime.now(),
+        "group_id": group_id,
+    }
+
+
+def reminder_job(group_id, row):
+    """(trigger, kwargs) for re-creating an exported reminder in group_id."""
+    kind, kwargs = trigger_kwargs(row["trigger"])
+    return kind, {**kwargs, "args": [group_id, row["text"]], "id": f"rem_{group_id}_import_{uuid.uuid4().hex[:12]}"}
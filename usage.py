@@ -0,0 +1,107 @@
+import os, json, time, sqlite3, logging, threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import metrics
+
+logger = logging.getLogger("Adjnt.Usage")
+
+# Per-decision LLM accounting: model, tokens, latency, resulting intent, parse
+# failures. A decision retried after a truncated reply is one record, with the
+# tokens of both calls summed and retried set. Recent records are aggregated
+# in memory for /usage; every record can also be appended to a local sink for
+# offline analysis (.jsonl or .db).
+LLM_USAGE_SINK = os.getenv("LLM_USAGE_SINK", "")
+LLM_USAGE_WINDOW = int(os.getenv("LLM_USAGE_WINDOW", "2000"))
+
+FIELDS = ("ts", "model", "intent", "prompt_tokens", "completion_tokens", "wall_seconds",
+          "queue_seconds", "parse_failed", "error", "retried")
+
+
+class UsageTracker:
+    def __init__(self, sink=LLM_USAGE_SINK, window=LLM_USAGE_WINDOW):
+        self.records = deque(maxlen=window)
+        self.lock = threading.Lock()
+        self.sink = sink
+        # Sink writes happen on their own thread, never on the event loop
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="adjnt-usage") if sink else None
+        self._db = None
+
+    def record(self, model, intent, wall_seconds, prompt_tokens=None, completion_tokens=None,
+               queue_seconds=None, parse_failed=False, error=None, retried=False):
+        rec = {
+            "ts": time.time(), "model": model, "intent": intent,
+            "prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+            "wall_seconds": round(wall_seconds, 4), "queue_seconds": queue_seconds,
+            "parse_failed": parse_failed, "error": error, "retried": retried,
+        }
+        with self.lock:
+            self.records.append(rec)
+        metrics.inc(f"llm.calls.{model}")
+        metrics.observe("llm.wall_seconds", wall_seconds)
+        if prompt_tokens is not None:
+            metrics.inc("llm.prompt_tokens", prompt_tokens)
+        if completion_tokens is not None:
+            metrics.inc("llm.completion_tokens", completion_tokens)
+        if parse_failed:
+            metrics.inc("llm.parse_failed")
+        if self._writer:
+            self._writer.submit(self._write, rec)
+        return rec
+
+    def stats(self):
+        """Rolling per-intent and per-model aggregates over the recent window."""
+        with self.lock:
+            records = list(self.records)
+        return {
+            "window": len(records),
+            "by_intent": self._aggregate(records, "intent"),
+            "by_model": self._aggregate(records, "model"),
+        }
+
+    def _aggregate(self, records, key):
+        groups = {}
+        for r in records:
+            groups.setdefault(r[key] or "NONE", []).append(r)
+        out = {}
+        for name, rs in groups.items():
+            walls = sorted(r["wall_seconds"] for r in rs)
+            prompt = [r["prompt_tokens"] for r in rs if r["prompt_tokens"] is not None]
+            completion = [r["completion_tokens"] for r in rs if r["completion_tokens"] is not None]
+            queue = [r["queue_seconds"] for r in rs if r["queue_seconds"] is not None]
+            out[name] = {
+                "calls": len(rs),
+                "prompt_tokens": sum(prompt),
+                "completion_tokens": sum(completion),
+                "avg_prompt_tokens": round(sum(prompt) / len(prompt), 1) if prompt else None,
+                "avg_completion_tokens": round(sum(completion) / len(completion), 1) if completion else None,
+                "wall_p50": walls[len(walls) // 2],
+                "wall_p95": walls[min(len(walls) - 1, int(len(walls) * 0.95))],
+                "avg_queue_seconds": round(sum(queue) / len(queue), 4) if queue else None,
+                "parse_failures": sum(1 for r in rs if r["parse_failed"]),
+                "errors": sum(1 for r in rs if r["error"]),
+                "retried": sum(1 for r in rs if r["retried"]),
+            }
+        return out
+
+    def _write(self, rec):
+        try:
+            if self.sink.endswith((".db", ".sqlite")):
+                if self._db is None:
+                    self._db = sqlite3.connect(self.sink)
+                    self._db.execute(f"CREATE TABLE IF NOT EXISTS llm_usage ({', '.join(FIELDS)})")
+                    # Sinks created before a column existed get it added
+                    have = {row[1] for row in self._db.execute("PRAGMA table_info(llm_usage)")}
+                    for field in FIELDS:
+                        if field not in have:
+                            self._db.execute(f"ALTER TABLE llm_usage ADD COLUMN {field}")
+                self._db.execute(f"INSERT INTO llm_usage ({', '.join(FIELDS)}) VALUES ({', '.join('?' for _ in FIELDS)})",
+                                 [rec[f] for f in FIELDS])
+                self._db.commit()
+            else:
+                with open(self.sink, "a") as f:
+                    f.write(json.dumps(rec) + "\n")
+        except Exception as e:
+            logger.error(f"❌ Usage sink write failed: {e}")
+
+
+tracker = UsageTracker()
@@ -0,0 +1,140 @@
+import os
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from sqlmodel import select
+from models import Task
+from cache import LRUCache
+
+# Write-through cache of each group's aggregated vault and its rendered
+# per-store WhatsApp blocks. TASK / DELETE / MOVE apply their changes after
+# committing, so LIST is answered from memory.
+VAULT_CACHE_GROUPS = int(os.getenv("VAULT_CACHE_GROUPS", "1000"))
+
+
+class GroupVault:
+    def __init__(self):
+        self.stores = {}   # display store name -> Counter(description -> count)
+        self.blocks = {}   # display store name -> rendered block
+
+    def add(self, store, name, n=1):
+        s_name = store.capitalize()
+        self.stores.setdefault(s_name, Counter())[name] += n
+        self.blocks.pop(s_name, None)
+
+    def remove(self, store, name, n=1):
+        s_name = store.capitalize()
+        counts = self.stores.get(s_name)
+        if counts is None:
+            return
+        counts[name] -= n
+        if counts[name] <= 0:
+            del counts[name]
+        if not counts:
+            del self.stores[s_name]
+        self.blocks.pop(s_name, None)
+
+    def clear_store(self, store):
+        self.stores.pop(store.capitalize(), None)
+        self.blocks.pop(store.capitalize(), None)
+
+    def block(self, s_name):
+        if s_name not in self.blocks:
+            counts = self.stores[s_name]
+            self.blocks[s_name] = f"📍 *{s_name}*\n" + "\n".join([f"- {k} (x{v})" if v>1 else f"- {k}" for k,v in counts.items()])
+        return self.blocks[s_name]
+
+    def store_names(self, target_store="All"):
+        if target_store.lower() == "all":
+            return list(self.stores)
+        return [s for s in self.stores if s.lower() == target_store.lower()]
+
+    def iter_blocks(self, target_store="All"):
+        """Rendered store blocks, lazily; stores emptied meanwhile are skipped."""
+        for s in self.store_names(target_store):
+            if s in self.stores:
+                yield self.block(s)
+
+    def render(self, target_store="All"):
+        if not self.store_names(target_store):
+            return f"Vault is empty for *{target_store}*."
+        return f"📋 *Vault ({target_store}):*" + "".join("\n\n" + b for b in self.iter_blocks(target_store))
+
+
+class VaultCache:
+    def __init__(self, max_groups=VAULT_CACHE_GROUPS):
+        self.lru = LRUCache("vault", max_groups)
+        # Writes in flight per group and when each group last changed, so a
+        # load that overlapped a write is never cached (it may or may not
+        # include it). Both stay bounded: a group leaves _writes when its last
+        # write ends, and _changed keeps only the max_groups most recent; a
+        # forgotten group counts as changed at _floor, the newest time dropped.
+        self.max_groups = max_groups
+        self._writes = {}
+        self._changed = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+
+    def version(self, group_id):
+        """Token to pass to store() for a load starting now."""
+        return self._clock
+
+    def _touch(self, group_id):
+        self._clock += 1
+        self._changed[group_id] = self._clock
+        self._changed.move_to_end(group_id)
+        if len(self._changed) > self.max_groups:
+            _, self._floor = self._changed.popitem(last=False)
+
+    @contextmanager
+    def writing(self, group_id):
+        """Wrap a vault write; apply its changes inside the block after commit."""
+        self._writes[group_id] = self._writes.get(group_id, 0) + 1
+        self._touch(group_id)
+        try:
+            yield
+        except Exception:
+            self.lru.pop(group_id)
+            raise
+        finally:
+            self._writes[group_id] -= 1
+            if not self._writes[group_id]:
+                del self._writes[group_id]
+            self._touch(group_id)
+
+    def lookup(self, group_id):
+        """The cached vault or None, counted as a hit or miss."""
+        return self.lru.get(group_id)
+
+    def load(self, session, group_id):
+        """Build the group's vault from the DB (safe to call off the event loop)."""
+        vault = GroupVault()
+        for description, store in session.exec(select(Task.description, Task.store).where(Task.group_id == group_id)).all():
+            vault.add(store, description)
+        return vault
+
+    def store(self, group_id, vault, version):
+        """Cache a loaded vault unless a write overlapped the load."""
+        changed = self._changed.get(group_id, self._floor)
+        if changed <= version and group_id not in self._writes:
+            self.lru.put(group_id, vault)
+
+    def peek(self, group_id):
+        """The cached vault, or None; never loads and does not count as a hit."""
+        return self.lru.peek(group_id)
+
+    def apply(self, group_id, added=(), removed=()):
+        """Apply committed (store, name, count) changes to the cached copy, if any."""
+        vault = self.lru.peek(group_id)
+        if vault is None:
+            return
+        for store, name, n in removed:
+            vault.remove(store, name, n)
+        for store, name, n in added:
+            vault.add(store, name, n)
+
+    def reset(self, group_id):
+        """The group's vault is now known to be empty."""
+        self.lru.put(group_id, GroupVault())
+
+
+cache = VaultCache()
@@ -0,0 +1,151 @@
+"""Compact LLM wire format.
+
+The model answers with short intent codes, short data keys and positional
+item arrays instead of the verbose {"intent", "data"} JSON, which roughly
+halves completion tokens. decode() expands a reply back into the verbose
+structure the rest of the brain uses; verbose replies pass through unchanged.
+
+    {"intent": "TASK", "data": {"items": [{"name": "egg", "count": 3, "store": "Safeway"}]}}
+    {"i": "T", "d": {"l": [["egg", 3, "Safeway"]]}}
+"""
+import ast, json
+from functools import lru_cache
+
+INTENTS = {
+    "TASK": "T", "DELETE": "D", "MOVE": "M", "REMIND": "R", "DELETE_REMINDERS": "X",
+    "UPDATE_REMINDER": "U", "PAUSE_REMINDERS": "P", "LIST": "L", "LIST_REMINDERS": "LR",
+    "TIME": "TM", "STATS": "S", "ONBOARD": "O", "CHAT": "C", "UNKNOWN": "?",
+}
+KEYS = {
+    "items": "l", "item": "n", "store": "s", "mode": "m", "from_store": "f", "to_store": "t",
+    "move_all": "a", "minutes": "mi", "timestamp": "ts", "recurrence": "r", "day_of_week": "dw",
+    "interval": "iv", "new_timestamp": "nt", "date_filter": "df", "answer": "x", "resume": "rs",
+}
+MODES = {"SINGLE": "S", "ALL": "A", "CLEAR_STORE": "CS", "CLEAR_ALL": "CA"}
+ITEM_FIELDS = ("name", "count", "store")
+
+_INTENTS_BACK = {v: k for k, v in INTENTS.items()}
+_KEYS_BACK = {v: k for k, v in KEYS.items()}
+_MODES_BACK = {v: k for k, v in MODES.items()}
+
+VERBOSE_RULE = "1. ALWAYS return JSON with 'intent' and 'data' keys.\n"
+COMPACT_RULE = "1. ALWAYS return JSON in the compact format below: 'i' (intent code) and 'd' (data).\n"
+
+
+# --- encode (used to rewrite the prompt's examples) ---
+
+def _item_row(item):
+    row = [item.get(f) for f in ITEM_FIELDS]
+    while row and row[-1] is None:
+        row.pop()
+    return row
+
+
+def encode_data(data):
+    out = {}
+    for key, value in data.items():
+        if key == "items":
+            value = [_item_row(i) for i in value]
+        elif key == "mode":
+            value = MODES.get(value, value)
+        elif key == "move_all" and value is True:
+            continue  # the default
+        out[KEYS.get(key, key)] = value
+    return out
+
+
+def encode(result):
+    out = {"i": INTENTS.get(result.get("intent"), result.get("intent"))}
+    data = encode_data(result.get("data") or {})
+    if data:
+        out["d"] = data
+    return out
+
+
+# --- decode ---
+
+def _item(value):
+    if isinstance(value, dict):
+        # Within an item the short name key is its name
+        return {"name" if k == KEYS["item"] else _KEYS_BACK.get(k, k): v for k, v in value.items()}
+    return {f: v for f, v in zip(ITEM_FIELDS, value) if v is not None}
+
+
+def decode(obj):
+    """Expand a compact reply into {"intent", "data"}; verbose replies pass through."""
+    if "intent" in obj or "i" not in obj:
+        return obj
+    data = {}
+    for key, value in (obj.get("d") or {}).items():
+        key = _KEYS_BACK.get(key, key)
+        if key == "items":
+            value = [_item(v) for v in value or []]
+        elif key == "mode":
+            value = _MODES_BACK.get(value, value)
+        data[key] = value
+    return {"intent": _INTENTS_BACK.get(obj["i"], "UNKNOWN"), "data": data}
+
+
+# --- prompt ---
+
+def _format_section():
+    pairs = lambda table: ", ".join(f"{k}={v}" for k, v in table.items())
+    return (
+        "=== OUTPUT FORMAT (compact) ===\n"
+        "Reply with {\"i\": CODE, \"d\": {...}}; leave out \"d\" when there is no data.\n"
+        f"Intent codes: {pairs(INTENTS)}\n"
+        f"Data keys: {pairs(KEYS)}\n"
+        "Items are arrays [name, count, store]: drop trailing unknowns, null for a gap.\n"
+        f"Delete modes: {pairs(MODES)}. move_all defaults to true: leave it out.\n\n"
+    )
+
+
+def _snippets(text):
+    """(start, end) of every top-level {...} in the text."""
+    depth, start = 0, None
+    for i, ch in enumerate(text):
+        if ch == "{":
+            if depth == 0:
+                start = i
+            depth += 1
+        elif ch == "}" and depth:
+            depth -= 1
+            if depth == 0:
+                yield start, i + 1
+
+
+def _compact_snippet(snippet):
+    try:
+        value = ast.literal_eval(snippet.replace(": true", ": True").replace(": false", ": False"))
+    except (ValueError, SyntaxError):
+        return snippet
+    if not isinstance(value, dict):
+        return snippet
+    encoded = encode(value) if "intent" in value else encode_data(value)
+    return json.dumps(encoded, separators=(",", ":"), ensure_ascii=False)
+
+
+@lru_cache(maxsize=64)
+def _compact_body(body):
+    out, last = [], 0
+    for start, end in _snippets(body):
+        out.append(body[last:start])
+        out.append(_compact_snippet(body[start:end]))
+        last = end
+    out.append(body[last:])
+    body = "".join(out).replace(VERBOSE_RULE, COMPACT_RULE)
+    head, sep, rest = body.partition("=== INTENT DEFINITIONS ===")
+    # Next to the core rules, ahead of the (possibly focused) definitions
+    return head + _format_section() + sep + rest if sep else body + "\n" + _format_section()
+
+
+def compact_prompt(prompt):
+    """The prompt with its JSON examples rewritten in the compact format.
+
+    Only the part from the core rules on is rewritten (and memoized); the
+    header with the current time is kept as is.
+    """
+    head, sep, body = prompt.partition("=== CORE RULES ===")
+    if not sep:
+        return _compact_body(prompt)
+    return head + _compact_body(sep + body)